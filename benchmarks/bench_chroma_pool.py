@@ -0,0 +1,70 @@
+"""
+Per-query latency of a RAG lookup with a fresh PersistentClient per call (the
+old behaviour) against the shared ChromaPool.
+
+    python -m benchmarks.bench_chroma_pool --items 2000 --queries 200
+"""
+
+import argparse
+import random
+import statistics
+import tempfile
+import time
+
+import chromadb
+
+from nexus.nexus_base.chroma_pool import ChromaPool
+
+
+def random_vector(dimensions):
+    return [random.random() for _ in range(dimensions)]
+
+
+def report(label, timings):
+    timings = sorted(timings)
+    p50 = statistics.median(timings) * 1000
+    p99 = timings[int(len(timings) * 0.99) - 1] * 1000
+    print(f"{label:<22} p50={p50:8.3f}ms  p99={p99:8.3f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--dimensions", type=int, default=256)
+    args = parser.parse_args()
+
+    path = tempfile.mkdtemp(prefix="nexus_bench_chroma_")
+    collection = chromadb.PersistentClient(path=path).get_or_create_collection(
+        name="bench_store"
+    )
+    for start in range(0, args.items, 1000):
+        count = min(1000, args.items - start)
+        collection.add(
+            ids=[str(start + i) for i in range(count)],
+            embeddings=[random_vector(args.dimensions) for _ in range(count)],
+            documents=[f"document {start + i}" for i in range(count)],
+        )
+    queries = [random_vector(args.dimensions) for _ in range(args.queries)]
+
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        client = chromadb.PersistentClient(path=path)
+        collection = client.get_or_create_collection(name="bench_store")
+        collection.query(query_embeddings=[query], n_results=5, include=["documents"])
+        timings.append(time.perf_counter() - start)
+    report("fresh client/query", timings)
+
+    pool = ChromaPool(path)
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        collection = pool.get_collection("bench_store")
+        collection.query(query_embeddings=[query], n_results=5, include=["documents"])
+        timings.append(time.perf_counter() - start)
+    report("pooled client", timings)
+
+
+if __name__ == "__main__":
+    main()
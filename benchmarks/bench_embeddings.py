@@ -0,0 +1,54 @@
+"""
+Compares per-text, batched and coalesced embedding calls against the offline
+LocalEmbeddingBackend with a simulated provider round-trip.
+
+    python -m benchmarks.bench_embeddings --texts 500 --latency 0.05
+"""
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from nexus.nexus_base.embedding_manager import EmbeddingManager, LocalEmbeddingBackend
+
+
+def run(label, backend, fn):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed:8.3f}s  requests={backend.calls}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--texts", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--threads", type=int, default=32)
+    args = parser.parse_args()
+
+    texts = [f"chunk {i} of a long document about agents" for i in range(args.texts)]
+
+    backend = LocalEmbeddingBackend(latency=args.latency)
+    em = EmbeddingManager(backend=backend, coalesce=False, cache=False)
+    run(
+        "sequential get_embedding",
+        backend,
+        lambda: [em.get_embedding(t) for t in texts],
+    )
+
+    backend = LocalEmbeddingBackend(latency=args.latency)
+    em = EmbeddingManager(backend=backend, coalesce=False, cache=False)
+    run("get_embeddings (batched)", backend, lambda: em.get_embeddings(texts))
+
+    backend = LocalEmbeddingBackend(latency=args.latency)
+    em = EmbeddingManager(backend=backend, cache=False)
+
+    def concurrent():
+        with ThreadPoolExecutor(max_workers=args.threads) as executor:
+            list(executor.map(em.get_embedding, texts))
+
+    run(f"coalesced ({args.threads} threads)", backend, concurrent)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+New TLS handshakes per chat turns against a local HTTPS mock of the OpenAI
+API. Each turn is an embeddings call (the RAG lookup) followed by a chat
+completion, run from a few threads at once. Compared are a new client per
+turn, one client per component (the old agent and embedding backend, each
+with its own pool) and the shared clients from http_clients.create_client.
+
+    python -m benchmarks.bench_http_clients --turns 100 --concurrency 8
+"""
+
+import argparse
+import datetime
+import json
+import os
+import ssl
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+
+CHAT = {
+    "id": "chatcmpl-bench",
+    "object": "chat.completion",
+    "created": 0,
+    "model": "gpt-bench",
+    "choices": [
+        {
+            "index": 0,
+            "message": {"role": "assistant", "content": "Hello."},
+            "finish_reason": "stop",
+        }
+    ],
+    "usage": {"prompt_tokens": 5, "completion_tokens": 2, "total_tokens": 7},
+}
+EMBEDDINGS = {
+    "object": "list",
+    "model": "text-embedding-bench",
+    "data": [{"object": "embedding", "index": 0, "embedding": [0.1] * 16}],
+    "usage": {"prompt_tokens": 5, "total_tokens": 5},
+}
+
+
+def self_signed_cert(path):
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "localhost")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(days=1))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .add_extension(
+            x509.SubjectAlternativeName([x509.DNSName("localhost")]), critical=False
+        )
+        .add_extension(x509.BasicConstraints(ca=True, path_length=None), critical=True)
+        .sign(key, hashes.SHA256())
+    )
+    cert_file = os.path.join(path, "cert.pem")
+    key_file = os.path.join(path, "key.pem")
+    with open(cert_file, "wb") as f:
+        f.write(cert.public_bytes(serialization.Encoding.PEM))
+    with open(key_file, "wb") as f:
+        f.write(
+            key.private_bytes(
+                serialization.Encoding.PEM,
+                serialization.PrivateFormat.PKCS8,
+                serialization.NoEncryption(),
+            )
+        )
+    return cert_file, key_file
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep connections open between requests
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        payload = EMBEDDINGS if self.path.endswith("/embeddings") else CHAT
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MockServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, cert_file, key_file):
+        super().__init__(("localhost", 0), MockHandler)
+        context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        context.load_cert_chain(cert_file, key_file)
+        self.context = context
+        self.handshakes = 0
+        self.lock = threading.Lock()
+
+    def finish_request(self, request, client_address):
+        # one handshake per accepted connection
+        with self.lock:
+            self.handshakes += 1
+        request = self.context.wrap_socket(request, server_side=True)
+        super().finish_request(request, client_address)
+
+    def count(self):
+        with self.lock:
+            return self.handshakes
+
+
+def turn(chat_client, embedding_client):
+    embedding_client.embeddings.create(input=["hello"], model="text-embedding-bench")
+    chat_client.chat.completions.create(
+        model="gpt-bench", messages=[{"role": "user", "content": "hello"}]
+    )
+
+
+def run(label, server, turns, concurrency, clients):
+    before = server.count()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        list(pool.map(lambda i: turn(*clients()), range(turns)))
+    elapsed = time.perf_counter() - start
+    handshakes = server.count() - before
+    print(
+        f"{label:<22} handshakes={handshakes:5d}  "
+        f"per 100 turns={handshakes * 100 / turns:7.1f}  {elapsed * 1000:8.1f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as path:
+        cert_file, key_file = self_signed_cert(path)
+        server = MockServer(cert_file, key_file)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"https://localhost:{server.server_address[1]}/v1"
+        os.environ["OPENAI_API_KEY"] = "bench"
+        os.environ["OPENAI_BASE_URL"] = base_url
+        os.environ["NEXUS_HTTP_CA_BUNDLE"] = cert_file
+
+        from openai import DefaultHttpxClient, OpenAI
+
+        from nexus.nexus_base.http_clients import close_http_clients, create_client
+
+        verify = ssl.create_default_context(cafile=cert_file)
+
+        def own_client():
+            return OpenAI(http_client=DefaultHttpxClient(verify=verify))
+
+        run(
+            "client per turn",
+            server,
+            args.turns,
+            args.concurrency,
+            lambda: (own_client(), own_client()),
+        )
+
+        components = (own_client(), own_client())
+        run(
+            "client per component",
+            server,
+            args.turns,
+            args.concurrency,
+            lambda: components,
+        )
+
+        shared = (create_client("openai"), create_client("openai"))
+        run(
+            "shared (create_client)",
+            server,
+            args.turns,
+            args.concurrency,
+            lambda: shared,
+        )
+        close_http_clients()
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Latency of reading a long thread: the old full read against keyset pages of
+read_messages at the head, middle and tail of a synthetic thread, with an
+OFFSET page at the same depth for comparison. A few small threads share the
+table so the (thread, timestamp) index has something to skip.
+
+    python -m benchmarks.bench_message_reads --messages 1000000
+"""
+
+import argparse
+import datetime
+import os
+import statistics
+import tempfile
+import time
+
+from peewee import SqliteDatabase
+
+from nexus.nexus_base.chat_history import read_messages
+from nexus.nexus_base.nexus_models import ChatParticipants, Message, Thread
+
+MODELS = [ChatParticipants, Thread, Message]
+
+
+def populate(messages, batch=10000):
+    author = ChatParticipants.create(
+        user_id="bench",
+        username="bench",
+        display_name="bench",
+        participant_type="user",
+        status="Active",
+    )
+    others = [
+        Thread.create(thread_id=f"small{i}", title=f"Small {i}", type="agent")
+        for i in range(10)
+    ]
+    thread = Thread.create(thread_id="long", title="Long", type="agent")
+    start = datetime.datetime(2024, 1, 1)
+    rows = []
+    for i in range(messages):
+        # every 100th message lands in a small thread, interleaved in time
+        owner = others[i // 100 % 10] if i % 100 == 99 else thread
+        rows.append(
+            {
+                "thread": owner,
+                "author": author,
+                "role": "user" if i % 2 else "agent",
+                "content": f"message {i} " + "lorem ipsum " * 8,
+                "timestamp": start + datetime.timedelta(seconds=i),
+            }
+        )
+        if len(rows) == batch:
+            Message.insert_many(rows).execute()
+            rows = []
+    if rows:
+        Message.insert_many(rows).execute()
+    return thread
+
+
+def timed(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    p50 = statistics.median(timings) * 1000
+    p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))] * 1000
+    return p50, p99
+
+
+def report(label, p50, p99):
+    print(f"{label:<28} p50={p50:10.3f}ms  p99={p99:10.3f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=1000000)
+    parser.add_argument("--page", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--full-repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as path:
+        db = SqliteDatabase(os.path.join(path, "bench.db"))
+        with db.bind_ctx(MODELS):
+            db.create_tables(MODELS)
+            start = time.perf_counter()
+            with db.atomic():
+                thread = populate(args.messages)
+            total = Message.select().where(Message.thread == thread).count()
+            print(
+                f"inserted {args.messages} messages ({total} in the long thread) "
+                f"in {time.perf_counter() - start:.1f}s"
+            )
+
+            def full_read():
+                list(
+                    Message.select()
+                    .where(Message.thread == thread)
+                    .order_by(Message.timestamp.asc())
+                )
+
+            report("full read", *timed(full_read, args.full_repeat))
+
+            ids = [
+                m.id
+                for m in Message.select(Message.id)
+                .where(Message.thread == thread)
+                .order_by(Message.timestamp, Message.id)
+            ]
+            for label, depth in [
+                ("head", 0),
+                ("middle", total // 2),
+                ("tail", total - args.page),
+            ]:
+                before = ids[total - depth] if depth else None
+                report(
+                    f"keyset page ({label})",
+                    *timed(
+                        lambda: read_messages(thread, before, args.page), args.repeat
+                    ),
+                )
+
+                def offset_page():
+                    list(
+                        Message.select()
+                        .where(Message.thread == thread)
+                        .order_by(Message.timestamp.desc())
+                        .offset(depth)
+                        .limit(args.page)
+                    )
+
+                report(
+                    f"offset page ({label})",
+                    *timed(offset_page, max(1, args.repeat // 20)),
+                )
+
+
+if __name__ == "__main__":
+    main()
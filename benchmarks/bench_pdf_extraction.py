@@ -0,0 +1,96 @@
+"""
+Pages/second of PDF text extraction on the calling thread against the
+DocumentExtractionPool at increasing worker counts.
+
+    python -m benchmarks.bench_pdf_extraction --pages 200
+    python -m benchmarks.bench_pdf_extraction --pdf path/to/book.pdf --workers 1,2,4,8
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from nexus.nexus_base.document_extraction import (
+    DocumentExtractionPool,
+    extract_pdf_pages,
+)
+
+
+def write_sample_pdf(path, pages, lines_per_page=45):
+    """Writes a plain multi-page text PDF without any extra dependencies."""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # pages tree, filled in once the page ids are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_ids = []
+    for p in range(pages):
+        lines = [
+            f"({'Page %d line %d of the sample document for extraction.' % (p, i)}) Tj T*"
+            for i in range(lines_per_page)
+        ]
+        stream = ("BT /F1 10 Tf 12 TL 50 760 Td " + " ".join(lines) + " ET").encode()
+        objects.append(
+            b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream"
+        )
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        page_ids.append(len(objects))
+    kids = " ".join(f"{i} 0 R" for i in page_ids).encode()
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, pages)
+
+    with open(path, "wb") as f:
+        f.write(b"%PDF-1.4\n")
+        offsets = []
+        for i, body in enumerate(objects, start=1):
+            offsets.append(f.tell())
+            f.write(b"%d 0 obj\n" % i + body + b"\nendobj\n")
+        xref = f.tell()
+        f.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+        for offset in offsets:
+            f.write(b"%010d 00000 n \n" % offset)
+        f.write(
+            b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+            % (len(objects) + 1, xref)
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--pdf", help="PDF to extract, a sample is generated if omitted"
+    )
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--workers", default="1,2,4,8")
+    parser.add_argument("--pages-per-task", type=int, default=8)
+    args = parser.parse_args()
+
+    path = args.pdf
+    if path is None:
+        path = os.path.join(tempfile.mkdtemp(), "sample.pdf")
+        write_sample_pdf(path, args.pages)
+
+    print(f"cores available: {os.cpu_count()}")
+    start = time.perf_counter()
+    pages = len(extract_pdf_pages(path, 0, None))
+    elapsed = time.perf_counter() - start
+    print(f"{'calling thread':<16} {pages / elapsed:8.1f} pages/s")
+
+    for workers in [int(w) for w in args.workers.split(",")]:
+        pool = DocumentExtractionPool(
+            max_workers=workers, pages_per_task=args.pages_per_task
+        )
+        pool.get_executor().submit(os.getpid).result()  # exclude process start-up
+        start = time.perf_counter()
+        pages = sum(1 for _ in pool.iter_pdf_pages(path))
+        elapsed = time.perf_counter() - start
+        pool.shutdown()
+        print(f"{f'{workers} workers':<16} {pages / elapsed:8.1f} pages/s")
+
+
+if __name__ == "__main__":
+    main()
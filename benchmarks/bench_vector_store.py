@@ -0,0 +1,118 @@
+"""
+Recall@k and query latency of the local IVF vector store against Chroma on
+clustered synthetic embeddings. Ground truth is an exact numpy search.
+
+    python -m benchmarks.bench_vector_store --sizes 10000,100000,1000000
+
+Chroma inserts at 1M items take a long time; use --backends local to skip it.
+"""
+
+import argparse
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+from nexus.nexus_base.chroma_pool import ChromaPool
+from nexus.nexus_base.vector_store import LocalVectorStore
+
+
+def make_data(size, dimensions, queries, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(16, size // 1000), dimensions))
+    data = np.empty((size, dimensions), dtype=np.float32)
+    for start in range(0, size, 100000):
+        end = min(start + 100000, size)
+        data[start:end] = centers[
+            rng.integers(0, len(centers), end - start)
+        ] + rng.normal(scale=0.3, size=(end - start, dimensions))
+    picks = rng.integers(0, size, queries)
+    query_vectors = data[picks] + rng.normal(scale=0.05, size=(queries, dimensions))
+    return data, query_vectors.astype(np.float32)
+
+
+def exact_neighbours(data, queries, k):
+    norms = np.einsum("ij,ij->i", data, data)
+    results = []
+    for query in queries:
+        distances = norms - 2 * data @ query
+        top = np.argpartition(distances, k)[:k]
+        results.append({str(i) for i in top})
+    return results
+
+
+def run(label, collection, data, queries, truth, k, batch):
+    start = time.perf_counter()
+    ids = [str(i) for i in range(len(data))]
+    for offset in range(0, len(data), batch):
+        collection.add(
+            ids=ids[offset : offset + batch],
+            embeddings=data[offset : offset + batch].tolist(),
+        )
+    insert = time.perf_counter() - start
+    # the first query builds the local IVF index
+    collection.query(query_embeddings=[queries[0].tolist()], n_results=k)
+
+    timings = []
+    hits = 0
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        result = collection.query(
+            query_embeddings=[query.tolist()], n_results=k, include=["distances"]
+        )
+        timings.append(time.perf_counter() - start)
+        hits += len(expected & set(result["ids"][0]))
+
+    timings.sort()
+    p50 = statistics.median(timings) * 1000
+    p99 = timings[max(0, int(len(timings) * 0.99) - 1)] * 1000
+    recall = hits / (len(truth) * k)
+    print(
+        f"{label:<8} n={len(data):<8} insert={insert:8.1f}s  "
+        f"recall@{k}={recall:.3f}  p50={p50:8.3f}ms  p99={p99:8.3f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--dimensions", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--backends", default="local,chroma")
+    args = parser.parse_args()
+
+    backends = args.backends.split(",")
+    for size in [int(s) for s in args.sizes.split(",")]:
+        data, queries = make_data(size, args.dimensions, args.queries)
+        truth = exact_neighbours(data, queries, args.k)
+        if "local" in backends:
+            with tempfile.TemporaryDirectory() as path:
+                store = LocalVectorStore(path)
+                run(
+                    "local",
+                    store.get_collection("bench"),
+                    data,
+                    queries,
+                    truth,
+                    args.k,
+                    10000,
+                )
+                store.invalidate()
+        if "chroma" in backends:
+            with tempfile.TemporaryDirectory() as path:
+                store = ChromaPool(path)
+                run(
+                    "chroma",
+                    store.get_collection("bench"),
+                    data,
+                    queries,
+                    truth,
+                    args.k,
+                    5000,
+                )
+
+
+if __name__ == "__main__":
+    main()
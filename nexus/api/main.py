@@ -1,8 +1,9 @@
-from typing import List
+from typing import List, Optional
 
 from fastapi import Depends, FastAPI
 from pydantic import BaseModel
 
+from nexus.nexus_base.event_loop import aiterate
 from nexus.nexus_base.nexus import ChatSystem
 
 app = FastAPI()
@@ -43,8 +44,16 @@ async def get_threads(chat: ChatSystem = Depends(chat)):
 
 
 @app.get("/read_messages/{thread_id}", response_model=List[Message])
-async def get_messages(thread_id: int, chat: ChatSystem = Depends(chat)):
-    messages = [message.to_dict() for message in chat.read_messages(thread_id)]
+async def get_messages(
+    thread_id: int,
+    before: Optional[int] = None,
+    limit: Optional[int] = None,
+    chat: ChatSystem = Depends(chat),
+):
+    messages = [
+        message.to_dict()
+        for message in chat.read_messages(thread_id, before=before, limit=limit)
+    ]
     return messages
 
 
@@ -77,10 +86,11 @@ async def call_agent(request: AgentCallRequest, chat: ChatSystem = Depends(chat)
     agent.chat_history = messages[:-1]  # get all messages except the last one
     # agent.actions = agent_actions
 
-    generator = agent.get_response_stream(messages[-1].content, 0)
+    generator = agent.aget_response_stream(messages[-1].content, 0)
 
+    # the engine's async client runs on the shared loop, not the server's
     responses = []
-    for item in generator():
+    async for item in aiterate(generator()):
         responses.append(item)
     response = "".join(responses)
 
@@ -1,13 +1,91 @@
 import ast
+import contextvars
 import functools
 import importlib.util
 import inspect
+import json
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from nexus.nexus_base.event_loop import run_coroutine
+
+DEFAULT_ACTION_TIMEOUT = float(os.getenv("NEXUS_ACTION_TIMEOUT", 30))
+ACTION_WORKERS = int(os.getenv("NEXUS_ACTION_WORKERS", 8))
+# a timed out call can't be stopped; up to this many keep running without
+# holding one of the ACTION_WORKERS slots, further ones keep their slot
+MAX_ABANDONED_ACTIONS = int(os.getenv("NEXUS_ABANDONED_ACTIONS", 8))
+# how long a call may wait for a free slot before it is answered with an error
+ACTION_QUEUE_TIMEOUT = float(os.getenv("NEXUS_ACTION_QUEUE_TIMEOUT", 60))
+
+action_slots = threading.Semaphore(ACTION_WORKERS)
+abandoned_slots = threading.Semaphore(MAX_ABANDONED_ACTIONS)
+# shared by every agent, so concurrent chats can't start unbounded threads
+action_executor = ThreadPoolExecutor(
+    max_workers=ACTION_WORKERS + MAX_ABANDONED_ACTIONS,
+    thread_name_prefix="nexus-action",
+)
+
+
+class ToolCallRun:
+    """
+    One tool call on the shared action executor. The call's timeout counts
+    from when it gets an action slot, not from when it was queued.
+    """
+
+    def __init__(self, function, timeout):
+        self.function = function
+        self.timeout = timeout
+        self.started = threading.Event()
+        self.start = None
+        self.lock = threading.Lock()
+        self.done = False
+        self.abandoned = False
+        # actions see the caller's tracking context
+        self.future = action_executor.submit(contextvars.copy_context().run, self._run)
+
+    def _run(self):
+        if not action_slots.acquire(timeout=ACTION_QUEUE_TIMEOUT):
+            self.started.set()
+            raise RuntimeError("no action worker became free")
+        self.start = time.monotonic()
+        self.started.set()
+        try:
+            return self.function()
+        finally:
+            with self.lock:
+                self.done = True
+                if self.abandoned:
+                    abandoned_slots.release()
+                else:
+                    action_slots.release()
+
+    def result(self):
+        if not self.started.wait(ACTION_QUEUE_TIMEOUT) and self.future.cancel():
+            raise RuntimeError("no action worker became free")
+        self.started.wait()
+        remaining = self.timeout
+        if self.start is not None:
+            remaining = self.start + self.timeout - time.monotonic()
+        try:
+            return self.future.result(timeout=max(0, remaining))
+        except FutureTimeoutError:
+            self._abandon()
+            raise
+
+    def _abandon(self):
+        # hands the slot to queued calls while the timed out one finishes
+        with self.lock:
+            if not self.done and abandoned_slots.acquire(blocking=False):
+                self.abandoned = True
+                action_slots.release()
 
 
 def handle_semantic_function_call(prompt, agent):
     system, user = parse_prompt(prompt)
-    response = agent.get_semantic_response(system, user)
+    response = run_coroutine(agent.aget_semantic_response(system, user))
     return response
 
 
@@ -40,7 +118,15 @@ def parse_prompt(prompt):
     return parsed_contents["System"], parsed_contents["User"]
 
 
-def agent_action(func):
+def agent_action(func=None, *, timeout=None):
+    """
+    Marks a function as an action agents can call. Use it bare, or as
+    @agent_action(timeout=60) to give the action longer (or shorter) than
+    NEXUS_ACTION_TIMEOUT seconds to run.
+    """
+    if func is None:
+        return functools.partial(agent_action, timeout=timeout)
+
     @functools.wraps(func)
     def wrapper(*args, _caller_agent=None, **kwargs):
         # Check if _prompt_template is set and format the prompt
@@ -108,9 +194,54 @@ def agent_action(func):
         wrapper._prompt_template = prompt_template
 
     wrapper._agent_action = func_spec
+    wrapper._timeout = timeout
     return wrapper
 
 
+def run_tool_calls(tool_calls, actions, agent):
+    """
+    Runs the tool calls of one model turn concurrently on the shared action
+    executor and returns their tool messages in the order of tool_calls.
+    Each call gets its action's timeout, counted from when it starts; a call
+    that fails or runs out of time is answered with an error the model can
+    read, and a timed out call is left to finish in the background.
+    """
+    available_functions = {action["name"]: action for action in actions}
+
+    def call(tool_call):
+        action = available_functions[tool_call["function"]["name"]]
+        function_args = json.loads(tool_call["function"]["arguments"] or "{}")
+        return action["pointer"](**function_args, _caller_agent=agent)
+
+    pending = []
+    for tool_call in tool_calls:
+        action = available_functions.get(tool_call["function"]["name"], {})
+        timeout = action.get("timeout") or DEFAULT_ACTION_TIMEOUT
+        run = ToolCallRun(functools.partial(call, tool_call), timeout)
+        pending.append((tool_call, run))
+
+    messages = []
+    for tool_call, run in pending:
+        function_name = tool_call["function"]["name"]
+        try:
+            content = str(run.result())
+        except FutureTimeoutError:
+            content = f"Error: {function_name} timed out after {run.timeout:g} seconds."
+            print(content)
+        except Exception as e:
+            content = f"Error: {function_name} failed: {e}"
+            print(content)
+        messages.append(
+            {
+                "tool_call_id": tool_call["id"],
+                "role": "tool",
+                "name": function_name,
+                "content": content,
+            }
+        )
+    return messages
+
+
 class ActionManager:
     def __init__(self):
         self.actions = []  # Initialize an empty list to store actions
@@ -148,6 +279,9 @@ class ActionManager:
         for node in ast.walk(tree):
             if isinstance(node, ast.FunctionDef):
                 for decorator in node.decorator_list:
+                    # @agent_action(timeout=...) is a call of the decorator
+                    if isinstance(decorator, ast.Call):
+                        decorator = decorator.func
                     if (
                         isinstance(decorator, ast.Name)
                         and decorator.id == "agent_action"
@@ -167,6 +301,7 @@ class ActionManager:
                                 "prompt_template": getattr(
                                     function_pointer, "_prompt_template", None
                                 ),
+                                "timeout": getattr(function_pointer, "_timeout", None),
                             }
                         )
         return decorated_actions
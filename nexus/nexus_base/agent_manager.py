@@ -1,6 +1,19 @@
+import asyncio
+import atexit
 import functools
 import importlib.util
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from nexus.nexus_base.chat_history import HISTORY_STRATEGIES, get_history_strategy
+from nexus.nexus_base.context_assembler import (
+    fit_messages,
+    get_context_budget,
+    get_token_counter,
+    message_field,
+)
 
 
 class BaseAgent:
@@ -14,6 +27,30 @@ class BaseAgent:
         self._actions = []
         self._profile = None
         self.attribute_options = {}
+        self.context_budget = None  # prompt tokens, defaults to NEXUS_CONTEXT_TOKENS
+        self.context_usage = {}  # tokens used by each prompt section
+        self.history_strategy = os.getenv("NEXUS_HISTORY_STRATEGY", "token_window")
+        self.history_messages = 20
+        self.history_summary = None  # summary of the thread before the history
+
+        self.add_attribute_options(
+            "history_strategy",
+            {
+                "type": "string",
+                "default": self.history_strategy,
+                "options": HISTORY_STRATEGIES,
+            },
+        )
+        self.add_attribute_options(
+            "history_messages",
+            {
+                "type": "numeric",
+                "default": 20,
+                "min": 2,
+                "max": 100,
+                "step": 1,
+            },
+        )
 
     def add_attribute_options(self, name, details):
         """Add or update an attribute with its details."""
@@ -39,6 +76,25 @@ class BaseAgent:
         # Placeholder method for streaming responses, to be implemented by subclasses
         raise NotImplementedError("This method should be implemented by subclasses.")
 
+    async def aget_semantic_response(self, system, user):
+        # engines without an async client answer on a worker thread
+        return await asyncio.to_thread(self.get_semantic_response, system, user)
+
+    def aget_response_stream(self, user_input, thread_id=None):
+        # Async counterpart of get_response_stream, returning an async generator function
+        raise NotImplementedError("This method should be implemented by subclasses.")
+
+    @classmethod
+    def check_config(cls):
+        # Raises if the engine is not configured, e.g. its API key is missing.
+        # Engines override this with a check that does not build the agent.
+        cls()
+
+    @classmethod
+    def check_health(cls):
+        # Raises if the engine cannot reach its provider; run by AgentHealthChecker
+        cls.check_config()
+
     def append_chat_history(self, thread_id, user_input, response):
         # Method to append user input and bot response to the chat history
         self._chat_history.append(
@@ -48,6 +104,39 @@ class BaseAgent:
             {"role": "bot", "content": response, "thread_id": thread_id}
         )
 
+    def load_history(self, thread_id):
+        """Loads the part of a thread chosen by the agent's history strategy."""
+        summary, messages = get_history_strategy(self).select(thread_id, self)
+        self.chat_history = messages
+        self.history_summary = summary
+
+    def get_history_summary(self):
+        if not self.history_summary:
+            return ""
+        return f"Summary of the earlier conversation:\n{self.history_summary}"
+
+    def get_context_messages(self, messages=None, include_summary=True):
+        """
+        Returns the history to send to the model: the history summary, if
+        any, and the most recent messages that fit in the agent's context
+        budget.
+        """
+        messages = self.messages if messages is None else messages
+        if include_summary and self.history_summary:
+            summary = {"role": "system", "content": self.get_history_summary()}
+            messages = (
+                [m for m in messages if message_field(m, "role") == "system"]
+                + [summary]
+                + [m for m in messages if message_field(m, "role") != "system"]
+            )
+        counter = get_token_counter(getattr(self, "model", None))
+        messages = fit_messages(messages, get_context_budget(self), counter)
+        self.context_usage = {
+            **self.context_usage,
+            "history": sum(counter.count_message(m) for m in messages),
+        }
+        return messages
+
     def load_chat_history(self):
         # Placeholder method to load and format chat history for the specific tool
         raise NotImplementedError("This method should be implemented by subclasses.")
@@ -64,6 +153,8 @@ class BaseAgent:
     @chat_history.setter
     def chat_history(self, chat_history):
         self._chat_history = chat_history
+        self.messages = []
+        self.history_summary = None
         self.load_chat_history()
 
     @property
@@ -126,26 +217,180 @@ def get_nested_attr(obj, attr_path):
     return current
 
 
+class AgentHealthChecker:
+    """
+    Checks in the background that each agent engine can reach its provider
+    and keeps each result for ttl seconds (NEXUS_AGENT_HEALTH_TTL). Checks
+    run in parallel, so a slow provider does not hold up the others, and an
+    expired result is still returned while it is being rechecked. Checks
+    call the engine classes' check_health, so no agent is built for them,
+    and a change of an engine's health is printed once. Nothing is checked
+    until start is called.
+    """
+
+    def __init__(self, agent_manager, ttl=None):
+        self.agent_manager = agent_manager
+        self.ttl = ttl or float(os.getenv("NEXUS_AGENT_HEALTH_TTL", 300))
+        self.results = {}  # agent name: (healthy, error, checked at)
+        self.configured = {}  # agent name: whether check_config passed
+        self.pending = set()
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(
+            max_workers=4, thread_name_prefix="nexus-agent-health"
+        )
+        self.stopped = threading.Event()
+        self.worker = None
+
+    def start(self):
+        with self.lock:
+            if self.worker is None:
+                self.worker = threading.Thread(
+                    target=self._run, name="nexus-agent-health", daemon=True
+                )
+                self.worker.start()
+                atexit.register(self.stop)
+
+    def stop(self):
+        self.stopped.set()
+        if self.worker is not None and self.worker is not threading.current_thread():
+            self.worker.join(timeout=5)
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def status(self, agent_name):
+        """Returns (healthy, error) for agent_name, or None if not checked yet."""
+        with self.lock:
+            result = self.results.get(agent_name)
+        if result is None or time.monotonic() - result[2] > self.ttl:
+            self.schedule(agent_name)
+        return result[:2] if result else None
+
+    def is_configured(self, agent_name):
+        """Whether the engine's check_config passes; checked once per engine."""
+        with self.lock:
+            configured = self.configured.get(agent_name)
+        if configured is None:
+            try:
+                self.agent_manager.agent_classes[agent_name].check_config()
+                configured = True
+            except Exception as e:
+                print(f"Agent {agent_name} is not configured: {e}")
+                configured = False
+            with self.lock:
+                self.configured[agent_name] = configured
+        return configured
+
+    def schedule(self, agent_name):
+        with self.lock:
+            if (
+                self.worker is None
+                or agent_name in self.pending
+                or self.stopped.is_set()
+            ):
+                return
+            self.pending.add(agent_name)
+        try:
+            self.executor.submit(self.check, agent_name)
+        except RuntimeError:
+            # shut down by stop
+            with self.lock:
+                self.pending.discard(agent_name)
+
+    def check(self, agent_name):
+        try:
+            self.agent_manager.agent_classes[agent_name].check_health()
+            result = (True, None)
+        except Exception as e:
+            result = (False, str(e))
+        with self.lock:
+            previous = self.results.get(agent_name)
+            self.results[agent_name] = (*result, time.monotonic())
+            self.pending.discard(agent_name)
+        if not result[0] and (previous is None or previous[0]):
+            print(f"Agent {agent_name} is unavailable: {result[1]}")
+        elif result[0] and previous is not None and not previous[0]:
+            print(f"Agent {agent_name} is available again.")
+        return result
+
+    def _run(self):
+        while not self.stopped.is_set():
+            for agent_name in self.agent_manager.agent_classes:
+                self.status(agent_name)
+            self.stopped.wait(min(self.ttl, 30))
+
+
 class AgentManager:
-    def __init__(self, tracking_manager=None):
+    """
+    Finds the agent engines in nexus_agents and creates each one on first
+    use, so no provider is contacted at start up. Whether each engine can
+    reach its provider is checked in the background by AgentHealthChecker,
+    started by start_health_checks; the UI calls it, and health_checks (or
+    NEXUS_AGENT_HEALTH_CHECKS=on) starts it here. Until then engines are
+    listed when their check_config passes.
+    """
+
+    def __init__(self, tracking_manager=None, health_checks=None):
         agent_directory = os.path.join(os.path.dirname(__file__), "nexus_agents")
-        self.agents = self._load_agents(agent_directory)
+        self.agent_classes = self._load_agents(agent_directory)
+        self.agents = {}
+        self.lock = threading.Lock()
         self.tracking_manager = tracking_manager
-        if self.tracking_manager:
-            self.track_agents(self.agents)
+        self.health_checker = AgentHealthChecker(self)
+        if health_checks is None:
+            health_checks = os.getenv("NEXUS_AGENT_HEALTH_CHECKS", "off").lower() in (
+                "1",
+                "on",
+                "true",
+                "yes",
+            )
+        if health_checks:
+            self.start_health_checks()
+
+    def start_health_checks(self):
+        self.health_checker.start()
+
+    def stop(self):
+        self.health_checker.stop()
 
     def get_agent(self, agent_name):
-        for agent in self.agents:
-            if agent.name == agent_name:
-                return agent
-        return None
+        agent_class = self.agent_classes.get(agent_name)
+        if agent_class is None:
+            return None
+        with self.lock:
+            if agent_name not in self.agents:
+                try:
+                    agent = agent_class()
+                except Exception as e:
+                    print(f"Error creating agent {agent_name}: {e}")
+                    return None
+                if self.tracking_manager:
+                    self.track_agent_client(agent)
+                self.agents[agent_name] = agent
+            return self.agents[agent_name]
+
+    def get_agent_health(self, agent_name):
+        return self.health_checker.status(agent_name)
 
     def track_agents(self, agents):
         for agent in agents:
             self.track_agent_client(agent)
 
     def track_agent_client(self, agent):
-        client = agent.client
+        self._track_client(
+            agent.client,
+            agent.name,
+            self.tracking_manager.track_chat_create,
+            self.tracking_manager.track_messages_create,
+        )
+        # engines with an async client track it the same way
+        if getattr(agent, "async_client", None) is not None:
+            self._track_client(
+                agent.async_client,
+                agent.name,
+                self.tracking_manager.track_chat_create_async,
+                self.tracking_manager.track_messages_create_async,
+            )
+
+    def _track_client(self, client, agent_name, track_chat, track_messages):
         create_path = "chat.completions.create"  # Default path for OpenAI style client
         messages_path = "messages.create"  # Default path for Anthropic style client
 
@@ -157,9 +402,7 @@ class AgentManager:
                 client.chat.completions,
                 "create",
                 functools.partial(
-                    self.tracking_manager.track_chat_create(
-                        chat_create_method, agent.name
-                    ),
+                    track_chat(chat_create_method, agent_name),
                     client.chat.completions,
                 ),
             )
@@ -172,18 +415,27 @@ class AgentManager:
                 client.messages,
                 "create",
                 functools.partial(
-                    self.tracking_manager.track_messages_create(
-                        messages_create_method, agent.name
-                    ),
+                    track_messages(messages_create_method, agent_name),
                     client.messages,
                 ),
             )
 
+    def is_agent_available(self, agent_name):
+        # until checked, agents count as available if they are configured
+        health = self.get_agent_health(agent_name)
+        if health is None:
+            return self.health_checker.is_configured(agent_name)
+        return health[0]
+
     def get_agent_names(self):
-        return [agent.name for agent in self.agents]
+        return [
+            agent_name
+            for agent_name in self.agent_classes
+            if self.is_agent_available(agent_name)
+        ]
 
     def _load_agents(self, agent_directory):
-        agents = []
+        agent_classes = {}
         for filename in os.listdir(agent_directory):
             if filename.endswith(".py") and not filename.startswith("_"):
                 try:
@@ -201,7 +453,7 @@ class AgentManager:
                             and issubclass(attribute, BaseAgent)
                             and attribute is not BaseAgent
                         ):
-                            agents.append(attribute())
+                            agent_classes[attribute.__name__] = attribute
                 except Exception as e:
                     print(f"Error loading agent from {filename}: {e}")
-        return agents
+        return agent_classes
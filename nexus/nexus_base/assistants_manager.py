@@ -1,12 +1,13 @@
 from dotenv import load_dotenv
-from openai import OpenAI
+
+from nexus.nexus_base.http_clients import create_client
 
 load_dotenv()
 
 
 class AssistantsManager:
     def __init__(self):
-        self.client = OpenAI()
+        self.client = create_client("openai")
 
     def create_assistant(self, name, instructions, model, tools):
         assistant = self.client.beta.assistants.create(
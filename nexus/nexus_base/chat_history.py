@@ -0,0 +1,179 @@
+import os
+
+from peewee import Tuple
+
+from nexus.nexus_base.context_assembler import (
+    RAG_CONTEXT_SHARE,
+    get_context_budget,
+    get_token_counter,
+)
+from nexus.nexus_base.nexus_models import (
+    ChatParticipants,
+    Message,
+    ThreadSummary,
+    db,
+)
+
+SUMMARY_PROMPT = "You maintain a running summary of a conversation between a user and an assistant. Given the current summary (which may be empty) and the messages that follow it, return an updated summary of at most 200 words. Keep names, facts, decisions, open questions and anything the user asked to be remembered. Return only the summary."
+
+
+def read_messages(thread_id, before=None, limit=None):
+    """
+    Returns a page of a thread's messages, oldest first: the newest limit
+    messages, or all of them when limit is None. before is a message id;
+    only messages older than it are returned. Pages are keyed on
+    (timestamp, id), which the (thread, timestamp) index serves directly,
+    so reading a page costs the same however deep into the thread it is.
+    Authors are joined in, so rendering a page issues no further queries.
+    """
+    query = (
+        Message.select(Message, ChatParticipants)
+        .join(ChatParticipants)
+        .where(Message.thread == thread_id)
+    )
+    if before is not None:
+        cursor = Message.get_or_none(Message.id == before)
+        if cursor is None:
+            return []
+        query = query.where(
+            Tuple(Message.timestamp, Message.id) < Tuple(cursor.timestamp, cursor.id)
+        )
+    query = query.order_by(Message.timestamp.desc(), Message.id.desc())
+    if limit is not None:
+        query = query.limit(limit)
+    return list(query)[::-1]
+
+
+class HistoryStrategy:
+    """
+    Chooses which part of a thread an agent sees. select returns a summary of
+    anything left out (or None) and the messages to replay, oldest first.
+    """
+
+    def select(self, thread_id, agent):
+        raise NotImplementedError("This method should be implemented by subclasses.")
+
+
+class FullHistory(HistoryStrategy):
+    def select(self, thread_id, agent):
+        return None, read_messages(thread_id)
+
+
+class LastNHistory(HistoryStrategy):
+    def __init__(self, n=20):
+        self.n = n
+
+    def select(self, thread_id, agent):
+        return None, read_messages(thread_id, limit=self.n)
+
+
+class TokenWindowHistory(HistoryStrategy):
+    """
+    The most recent messages that fit in max_tokens, by default the part of
+    the agent's context budget not reserved for augmentation. Messages are
+    read newest first a page at a time, so long threads are never loaded.
+    """
+
+    def __init__(self, max_tokens=None, page_size=50):
+        self.max_tokens = max_tokens
+        self.page_size = page_size
+
+    def select(self, thread_id, agent):
+        budget = self.max_tokens or int(
+            get_context_budget(agent) * (1 - RAG_CONTEXT_SHARE)
+        )
+        counter = get_token_counter(getattr(agent, "model", None))
+        selected = []
+        before = None
+        while True:
+            page = read_messages(thread_id, before, self.page_size)
+            for message in reversed(page):
+                budget -= counter.count(message.content) + 4
+                if budget < 0:
+                    return None, selected
+                selected.insert(0, message)
+            if len(page) < self.page_size:
+                return None, selected
+            before = page[0].id
+
+
+class RollingSummaryHistory(HistoryStrategy):
+    """
+    The last keep_last messages verbatim plus a summary of everything before
+    them. The summary is stored per thread in ThreadSummary and is extended
+    by the agent once summarize_every messages have fallen out of the
+    window; until then those messages are replayed as they are.
+    """
+
+    def __init__(self, keep_last=10, summarize_every=10):
+        self.keep_last = keep_last
+        self.summarize_every = summarize_every
+
+    def select(self, thread_id, agent):
+        recent = read_messages(thread_id, limit=self.keep_last)
+        if not recent:
+            return None, []
+        cached = ThreadSummary.get_or_none(ThreadSummary.thread == thread_id)
+        summary = cached.summary if cached else None
+        pending = list(
+            Message.select()
+            .where(
+                (Message.thread == thread_id)
+                & (Message.id > (cached.last_message_id if cached else 0))
+                & (Message.id < recent[0].id)
+            )
+            .order_by(Message.id)
+        )
+        if len(pending) >= self.summarize_every:
+            try:
+                summary = self.summarize(agent, summary, pending)
+                with db.atomic():
+                    ThreadSummary.insert(
+                        thread=thread_id,
+                        summary=summary,
+                        last_message_id=pending[-1].id,
+                    ).on_conflict(
+                        conflict_target=[ThreadSummary.thread],
+                        update={
+                            ThreadSummary.summary: summary,
+                            ThreadSummary.last_message_id: pending[-1].id,
+                        },
+                    ).execute()
+                pending = []
+            except Exception as e:
+                print(f"Error summarizing thread {thread_id}: {e}")
+                # keep the prompt bounded until a later turn succeeds
+                pending = pending[-self.summarize_every :]
+        return summary, pending + recent
+
+    def summarize(self, agent, summary, messages):
+        transcript = "\n".join(
+            f"{message.role}: {message.content}" for message in messages
+        )
+        return agent.get_semantic_response(
+            SUMMARY_PROMPT,
+            f"Current summary:\n{summary or ''}\n\nNew messages:\n{transcript}",
+        )
+
+
+HISTORY_STRATEGIES = ["token_window", "last_n", "rolling_summary", "full"]
+
+
+def get_history_strategy(agent):
+    """
+    Builds the strategy named by agent.history_strategy (or the
+    NEXUS_HISTORY_STRATEGY default), sized by agent.history_messages.
+    """
+    name = getattr(agent, "history_strategy", None) or os.getenv(
+        "NEXUS_HISTORY_STRATEGY", "token_window"
+    )
+    messages = int(getattr(agent, "history_messages", None) or 20)
+    if name == "full":
+        return FullHistory()
+    if name == "last_n":
+        return LastNHistory(messages)
+    if name == "token_window":
+        return TokenWindowHistory()
+    if name == "rolling_summary":
+        return RollingSummaryHistory(keep_last=messages, summarize_every=messages)
+    raise ValueError(f"History strategy '{name}' not found.")
@@ -0,0 +1,137 @@
+import functools
+import threading
+
+import chromadb
+from chromadb import errors
+
+from nexus.nexus_base.vector_store import VectorStore, working_collection_name
+
+# raised for a handle whose collection was deleted, by name in older clients
+STALE_COLLECTION_ERRORS = tuple(
+    getattr(errors, name)
+    for name in ("NotFoundError", "InvalidCollectionException")
+    if hasattr(errors, name)
+)
+
+
+class PooledCollection:
+    """
+    A cached Chroma collection handle. A call that finds its collection gone,
+    because another process deleted it or swapped it out, resolves the name
+    again through the pool and is retried once.
+    """
+
+    def __init__(self, pool, name, collection):
+        self._pool = pool
+        self._name = name
+        self._collection = collection
+
+    def __getattr__(self, attribute):
+        value = getattr(self._collection, attribute)
+        if not callable(value):
+            return value
+
+        @functools.wraps(value)
+        def call(*args, **kwargs):
+            stale = self._collection
+            try:
+                return getattr(stale, attribute)(*args, **kwargs)
+            except STALE_COLLECTION_ERRORS:
+                self._collection = self._pool._resolve(self._name, stale)
+                return getattr(self._collection, attribute)(*args, **kwargs)
+
+        return call
+
+
+class ChromaPool(VectorStore):
+    """
+    A long-lived Chroma client for one store path plus a cache of its
+    collection handles (PooledCollection). Handles are dropped when a
+    collection is deleted, and re-resolved when another process deleted or
+    swapped the collection behind them. A collection replaced by
+    swap_collection is kept for retire_grace seconds so readers holding its
+    handle can finish.
+    """
+
+    def __init__(self, path, retire_grace=60.0):
+        self.path = path
+        self.client = chromadb.PersistentClient(path=path)
+        self.collections = {}
+        self.write_locks = {}
+        self.retire_grace = retire_grace
+        self.lock = threading.RLock()
+
+    def get_collection(self, name):
+        with self.lock:
+            collection = self.collections.get(name)
+            if collection is None:
+                collection = PooledCollection(
+                    self, name, self.client.get_or_create_collection(name=name)
+                )
+                self.collections[name] = collection
+            return collection
+
+    def _resolve(self, name, stale):
+        # the current collection for name, replacing a cached stale one
+        with self.lock:
+            cached = self.collections.get(name)
+            if cached is not None and cached._collection is not stale:
+                return cached._collection
+            collection = self.client.get_or_create_collection(name=name)
+            if cached is None:
+                self.collections[name] = PooledCollection(self, name, collection)
+            else:
+                cached._collection = collection
+            return collection
+
+    def list_all_collections(self):
+        # older clients return Collection objects, newer ones names
+        return [
+            getattr(collection, "name", collection)
+            for collection in self.client.list_collections()
+        ]
+
+    def delete_collection(self, name):
+        with self.lock:
+            self.collections.pop(name, None)
+            self.client.delete_collection(name)
+
+    def swap_collection(self, name, shadow):
+        with self.lock:
+            # renames keep collection ids, so handles already held by readers
+            # keep answering from the old data until it is dropped
+            retired = working_collection_name(name, "retired")
+            self.get_collection(name).modify(name=retired)
+            collection = self.client.get_collection(shadow)
+            collection.modify(name=name)
+            self.collections[name] = PooledCollection(self, name, collection)
+            self.collections.pop(shadow, None)
+        timer = threading.Timer(self.retire_grace, self._drop_retired, [retired])
+        timer.daemon = True
+        timer.start()
+
+    def _drop_retired(self, name):
+        try:
+            self.client.delete_collection(name)
+        except Exception as e:
+            # delete_working_collections(name, ("retired",)) can clear it later
+            print(f"Could not delete retired collection {name}: {e}")
+
+    def invalidate(self, name=None):
+        with self.lock:
+            if name is None:
+                self.collections.clear()
+            else:
+                self.collections.pop(name, None)
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_chroma_pool(path):
+    """Returns the shared pool for a Chroma store path."""
+    with _pools_lock:
+        if path not in _pools:
+            _pools[path] = ChromaPool(path)
+        return _pools[path]
@@ -0,0 +1,108 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.decomposition import PCA
+from sklearn.metrics import silhouette_score
+
+
+def store_version(ids):
+    """
+    Fingerprint of a collection's contents. Memory and knowledge ids are
+    hashes of their text, so the sorted id list changes whenever an item is
+    added, removed or rewritten.
+    """
+    return hashlib.sha1("\n".join(sorted(ids)).encode("utf-8")).hexdigest()
+
+
+class ClusteringManager:
+    """
+    Clusters the embeddings of a memory or knowledge store for the
+    embeddings view.
+
+    Embeddings are projected to 3 dimensions with PCA and clustered with
+    MiniBatchKMeans for k in 2..max_clusters, picking the k with the best
+    silhouette score computed on a sample of at most sample_size points.
+    Results are cached per store and reused until the store changes.
+    """
+
+    def __init__(self, max_clusters=20, sample_size=2000, cache_size=16):
+        self.max_clusters = max_clusters
+        self.sample_size = sample_size
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get_clusters(self, key, collection):
+        """
+        Returns the clustering of a collection, or None if it holds too few
+        items. key identifies the store in the cache.
+        """
+        version = store_version(collection.get(include=[])["ids"])
+        with self.lock:
+            cached = self.cache.get(key)
+            if cached is not None and cached["version"] == version:
+                self.cache.move_to_end(key)
+                return cached
+
+        items = collection.get(include=["documents", "embeddings"])
+        result = self.cluster(items["embeddings"], items["documents"])
+        if result is None:
+            return None
+        result["version"] = version
+        with self.lock:
+            self.cache[key] = result
+            self.cache.move_to_end(key)
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return result
+
+    def invalidate(self, key=None):
+        with self.lock:
+            if key is None:
+                self.cache.clear()
+            else:
+                self.cache.pop(key, None)
+
+    def cluster(self, embeddings, documents):
+        if embeddings is None or len(embeddings) <= 3:
+            return None
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        points = PCA(
+            n_components=3, svd_solver="randomized", random_state=42
+        ).fit_transform(embeddings)
+
+        scores = {}
+        best_labels = None
+        for n_clusters in range(2, self.max_clusters + 1):
+            if n_clusters >= len(points):
+                break
+            labels = MiniBatchKMeans(
+                n_clusters=n_clusters, random_state=42, batch_size=1024, n_init=3
+            ).fit_predict(points)
+            try:
+                scores[n_clusters] = float(
+                    silhouette_score(
+                        points,
+                        labels,
+                        sample_size=min(self.sample_size, len(points)),
+                        random_state=42,
+                    )
+                )
+            except ValueError:
+                # the sample (or the whole store) fell into a single cluster
+                continue
+            if max(scores, key=scores.get) == n_clusters:
+                best_labels = labels
+        if best_labels is None:
+            best_labels = np.zeros(len(points), dtype=int)
+
+        return {
+            "points": points,
+            "labels": best_labels,
+            "documents": documents,
+            "n_clusters": max(scores, key=scores.get) if scores else 1,
+            "scores": scores,
+        }
@@ -0,0 +1,130 @@
+import os
+import socket
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from nexus.nexus_base.nexus_models import CompactionJob
+
+ACTIVE = ["pending", "running"]
+
+
+def _atomic():
+    # on the table's database, which tests bind to their own
+    return CompactionJob._meta.database.atomic()
+
+
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class CompactionManager:
+    """
+    Runs memory and knowledge store compaction as background jobs.
+
+    Each job is recorded in the CompactionJob table with its progress
+    (clusters compressed so far) and the store's item count before and
+    after. Only one job per store runs at a time; starting another while
+    one is active returns the active job's id.
+
+    Jobs are recorded under this manager's owner id and a heartbeat thread
+    refreshes them every lease / 4, so several processes can share the
+    table. An active job whose heartbeat is older than lease belonged to a
+    process that stopped and is marked failed.
+    """
+
+    def __init__(self, nexus, max_workers=2, lease=timedelta(minutes=2)):
+        self.nexus = nexus
+        self.lease = lease
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="nexus-compaction"
+        )
+        self._fail_stale_jobs()
+        self.stopped = threading.Event()
+        self.heart = threading.Thread(
+            target=self._beat, name="nexus-compaction-heartbeat", daemon=True
+        )
+        self.heart.start()
+
+    def stop(self):
+        self.stopped.set()
+        self.heart.join()
+        self.executor.shutdown(wait=False)
+
+    def _fail_stale_jobs(self):
+        # jobs whose owner stopped beating never swapped in
+        with _atomic():
+            CompactionJob.update(status="failed", error="Interrupted.").where(
+                CompactionJob.status.in_(ACTIVE)
+                & (
+                    CompactionJob.heartbeat.is_null()
+                    | (CompactionJob.heartbeat < _utcnow() - self.lease)
+                )
+            ).execute()
+
+    def _beat(self):
+        while not self.stopped.wait(self.lease.total_seconds() / 4):
+            try:
+                with _atomic():
+                    CompactionJob.update(heartbeat=_utcnow()).where(
+                        (CompactionJob.owner == self.owner)
+                        & CompactionJob.status.in_(ACTIVE)
+                    ).execute()
+            except Exception as e:
+                print(f"Error refreshing compaction jobs: {e}")
+
+    def start(self, store_type, store_name, grouped_items, chat_agent):
+        self._fail_stale_jobs()
+        with _atomic():
+            active = (
+                CompactionJob.select()
+                .where(
+                    (CompactionJob.store_type == store_type)
+                    & (CompactionJob.store == store_name)
+                    & (CompactionJob.status.in_(ACTIVE))
+                )
+                .first()
+            )
+            if active is not None:
+                return active.id
+            job = CompactionJob.create(
+                store_type=store_type,
+                store=store_name,
+                clusters_total=len(grouped_items),
+                owner=self.owner,
+                heartbeat=_utcnow(),
+            )
+        self.executor.submit(self._run, job.id, grouped_items, chat_agent)
+        return job.id
+
+    def get_status(self, job_id=None):
+        """Returns one job, or the most recent jobs, as dicts."""
+        if job_id is not None:
+            job = CompactionJob.get_or_none(CompactionJob.id == job_id)
+            return job.to_dict() if job else None
+        query = CompactionJob.select().order_by(CompactionJob.id.desc()).limit(20)
+        return [job.to_dict() for job in query]
+
+    def _update(self, job_id, **fields):
+        with _atomic():
+            CompactionJob.update(**fields).where(CompactionJob.id == job_id).execute()
+
+    def _run(self, job_id, grouped_items, chat_agent):
+        job = CompactionJob.get_by_id(job_id)
+        self._update(job_id, status="running")
+        try:
+            result = self.nexus.run_compaction(
+                job.store_type,
+                job.store,
+                grouped_items,
+                chat_agent,
+                progress=lambda done, total: self._update(
+                    job_id, clusters_done=done, clusters_total=total
+                ),
+            )
+            self._update(job_id, status="done", **result)
+        except Exception as e:
+            print(f"Error compacting {job.store_type} store {job.store}: {e}")
+            self._update(job_id, status="failed", error=str(e))
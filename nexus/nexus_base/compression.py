@@ -0,0 +1,183 @@
+import contextvars
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from nexus.nexus_base.utils import convert_keys_to_lowercase, extract_code, id_hash
+from nexus.nexus_base.vector_store import add_new_documents, working_collection_name
+
+
+class RateLimiter:
+    """
+    Token bucket allowing requests_per_minute calls, with bursts of up to
+    burst calls. acquire blocks until a call is allowed.
+    """
+
+    def __init__(self, requests_per_minute, burst=None):
+        self.rate = requests_per_minute / 60.0
+        self.capacity = burst or max(1, requests_per_minute // 10)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.updated) * self.rate
+                )
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(provider):
+    """
+    Returns the shared limiter for a provider (an agent name). The limit is
+    read from NEXUS_RPM_<PROVIDER>, falling back to NEXUS_RPM (default 60).
+    """
+    with _limiters_lock:
+        if provider not in _limiters:
+            rpm = os.getenv(f"NEXUS_RPM_{provider.upper()}", os.getenv("NEXUS_RPM"))
+            _limiters[provider] = RateLimiter(int(rpm or 60))
+        return _limiters[provider]
+
+
+def compress_cluster(agent, items, summarization_prompt, function_prompt, keys):
+    """Summarizes one cluster and extracts its statements under keys."""
+    limiter = get_rate_limiter(agent.name)
+    # 1. get the semantic response asking to summarize the items
+    limiter.acquire()
+    summarized = agent.get_semantic_response(summarization_prompt, "\n".join(items))
+
+    # 2. get the semantic response asking to extract new statements
+    limiter.acquire()
+    statements = agent.get_semantic_response(function_prompt, summarized)
+    statements, code = extract_code(statements)
+    if code:
+        statements = code[0][1]
+    statements = convert_keys_to_lowercase(json.loads(statements))
+    return sum([statements[key.lower()] for key in keys.split(",")], [])
+
+
+def compress_clusters(
+    agent,
+    grouped_items,
+    summarization_prompt,
+    function_prompt,
+    keys,
+    max_workers=None,
+    progress=None,
+):
+    """
+    Compresses every cluster concurrently, at most max_workers at a time
+    (default NEXUS_COMPRESSION_WORKERS, or 4). Clusters that fail are
+    reported and skipped. progress, if given, is called with
+    (clusters_done, clusters_total) as clusters finish. Returns the
+    statements in cluster order.
+    """
+    max_workers = max_workers or int(os.getenv("NEXUS_COMPRESSION_WORKERS", "4"))
+    with ThreadPoolExecutor(
+        max_workers=max_workers, thread_name_prefix="nexus-compress"
+    ) as executor:
+        futures = [
+            executor.submit(
+                contextvars.copy_context().run,
+                compress_cluster,
+                agent,
+                items,
+                summarization_prompt,
+                function_prompt,
+                keys,
+            )
+            for items in grouped_items.values()
+        ]
+        if progress:
+            done = iter(range(1, len(futures) + 1))
+            lock = threading.Lock()
+
+            def report(_):
+                with lock:
+                    progress(next(done), len(futures))
+
+            for future in futures:
+                future.add_done_callback(report)
+        statements = []
+        for future in futures:
+            try:
+                statements.extend(future.result())
+            except Exception as e:
+                print("Error compressing cluster: ", e)
+    return statements
+
+
+def _copy_new_items(source, target, skip):
+    # copies items of source that are not in target, except the ids in skip
+    ids = set(source.get(include=[])["ids"]) - skip
+    if ids:
+        ids -= set(target.get(ids=list(ids), include=[])["ids"])
+    if not ids:
+        return 0
+    items = source.get(ids=list(ids), include=["documents", "embeddings", "metadatas"])
+    metadatas = items.get("metadatas") or [None] * len(items["ids"])
+    for with_metadata in (False, True):
+        batch = [
+            i for i, metadata in enumerate(metadatas) if bool(metadata) == with_metadata
+        ]
+        if batch:
+            target.add(
+                ids=[items["ids"][i] for i in batch],
+                embeddings=[items["embeddings"][i] for i in batch],
+                documents=[items["documents"][i] for i in batch],
+                metadatas=[metadatas[i] for i in batch] if with_metadata else None,
+            )
+    return len(ids)
+
+
+def compact_collection(vector_store, name, statements, embed, compressed=None):
+    """
+    Replaces the items of collection name that were compressed (the texts in
+    compressed, by default every item present when compaction starts) with
+    statements. The statements are written to a shadow
+    collection that is swapped in once complete, so readers keep using the
+    old data until then and a failure leaves it untouched. Items that were
+    not compressed, including ones written while compaction ran, are copied
+    to the shadow; the last of them under vector_store.writing(name) so no
+    write lands between the copy and the swap.
+    Returns the item counts before and after.
+    """
+    if not statements:
+        raise ValueError("Compression produced no statements.")
+    live = vector_store.get_collection(name)
+    before = live.count()
+    if compressed is None:
+        compressed = set(live.get(include=[])["ids"])
+    else:
+        compressed = {id_hash(text) for text in compressed}
+    vector_store.delete_working_collections(name)
+    shadow = working_collection_name(name)
+    try:
+        target = vector_store.get_collection(shadow)
+        add_new_documents(target, statements, embed)
+        _copy_new_items(vector_store.get_collection(name), target, compressed)
+        with vector_store.writing(name) as collection:
+            _copy_new_items(collection, target, compressed)
+            vector_store.swap_collection(name, shadow)
+    except Exception:
+        if shadow in vector_store.list_all_collections():
+            vector_store.delete_collection(shadow)
+        raise
+    return {
+        "items_before": before,
+        "items_after": vector_store.get_collection(name).count(),
+    }
@@ -0,0 +1,210 @@
+import os
+import re
+import threading
+
+from nexus.nexus_base.embedding_manager import estimate_tokens
+
+# tokens budgeted for a model's prompt (history, augmentation and input)
+DEFAULT_CONTEXT_TOKENS = 8000
+# share of the budget knowledge and memory augmentation may take
+RAG_CONTEXT_SHARE = 0.5
+
+
+class TokenCounter:
+    """
+    Counts tokens with the tiktoken encoding for a model, falling back to a
+    character based estimate when tiktoken or the encoding is unavailable.
+    """
+
+    def __init__(self, model=None):
+        self.model = model
+        self.encoding = None
+        try:
+            import tiktoken
+
+            try:
+                self.encoding = tiktoken.encoding_for_model(model or "")
+            except KeyError:
+                self.encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            # not installed, or the encoding could not be downloaded
+            self.encoding = None
+
+    def count(self, text):
+        if not text:
+            return 0
+        if self.encoding is None:
+            return estimate_tokens(text)
+        return len(self.encoding.encode(text, disallowed_special=()))
+
+    def truncate(self, text, max_tokens):
+        if max_tokens <= 0:
+            return ""
+        if self.encoding is None:
+            return text[: max_tokens * 3]
+        tokens = self.encoding.encode(text, disallowed_special=())
+        return self.encoding.decode(tokens[:max_tokens])
+
+    def count_message(self, message):
+        # every message carries a few tokens of role/formatting overhead
+        return self.count(str(message_field(message, "content") or "")) + 4
+
+
+_counters = {}
+_counters_lock = threading.Lock()
+
+
+def get_token_counter(model=None):
+    with _counters_lock:
+        if model not in _counters:
+            _counters[model] = TokenCounter(model)
+        return _counters[model]
+
+
+def get_context_budget(agent):
+    """The prompt token budget for an agent, its context_budget or NEXUS_CONTEXT_TOKENS."""
+    budget = getattr(agent, "context_budget", None)
+    if budget:
+        return int(budget)
+    return int(os.getenv("NEXUS_CONTEXT_TOKENS", DEFAULT_CONTEXT_TOKENS))
+
+
+def message_field(message, field):
+    # history holds plain dicts and SDK message objects
+    if isinstance(message, dict):
+        return message.get(field)
+    return getattr(message, field, None)
+
+
+def _shingles(text, size=3):
+    words = re.findall(r"\w+", text.lower())
+    if len(words) < size:
+        return {" ".join(words)}
+    return {" ".join(words[i : i + size]) for i in range(len(words) - size + 1)}
+
+
+def near_duplicate(a, b, threshold=0.85):
+    """True when two passages share at least threshold of their word 3-grams."""
+    a, b = _shingles(a), _shingles(b)
+    if not a or not b:
+        return a == b
+    return len(a & b) / len(a | b) >= threshold
+
+
+class ContextSection:
+    """
+    A block of the prompt: a header followed by labelled passages.
+
+    Args:
+        name: The section name used in the usage report.
+        header: Text introducing the passages.
+        passages: (text, score) pairs, higher scores are more relevant.
+        label: Prefix for each passage ("Document" gives "Document 1:").
+        numbered: Whether passage labels are numbered.
+    """
+
+    def __init__(self, name, header, passages, label="Passage", numbered=True):
+        self.name = name
+        self.header = header
+        self.passages = passages
+        self.label = label
+        self.numbered = numbered
+
+    def format_passage(self, index, text):
+        if self.numbered:
+            return f"{self.label} {index}:\n{text}\n"
+        return f"{self.label}:\n{text}\n"
+
+    def format(self, texts):
+        if not texts:
+            return ""
+        return self.header + "".join(
+            self.format_passage(i + 1, text) for i, text in enumerate(texts)
+        )
+
+
+class ContextAssembler:
+    """
+    Packs sections of scored passages into a token budget.
+
+    Passages from all sections are taken in order of score. A passage that
+    nearly duplicates one already taken is skipped, and the first passage
+    that does not fit is truncated to the space left if at least
+    min_passage_tokens remain. Sections keep their order in the output.
+    """
+
+    def __init__(self, counter=None, min_passage_tokens=32):
+        self.counter = counter or get_token_counter()
+        self.min_passage_tokens = min_passage_tokens
+
+    def pack(self, sections, budget):
+        """Returns the assembled text and the tokens used by each section."""
+        candidates = sorted(
+            (
+                (score, order, position, text)
+                for order, section in enumerate(sections)
+                for position, (text, score) in enumerate(section.passages)
+                if text
+            ),
+            key=lambda candidate: (-candidate[0], candidate[1], candidate[2]),
+        )
+        selected = [[] for _ in sections]
+        usage = {section.name: 0 for section in sections}
+        kept = []
+        used = 0
+        for _, order, _, text in candidates:
+            if any(near_duplicate(text, other) for other in kept):
+                continue
+            section = sections[order]
+            overhead = self.counter.count(
+                section.format_passage(len(selected[order]) + 1, "")
+            )
+            if not selected[order]:
+                overhead += self.counter.count(section.header)
+            cost = overhead + self.counter.count(text)
+            if used + cost > budget:
+                available = budget - used - overhead
+                if available < self.min_passage_tokens:
+                    continue
+                text = self.counter.truncate(text, available)
+                cost = overhead + self.counter.count(text)
+            selected[order].append(text)
+            kept.append(text)
+            usage[section.name] += cost
+            used += cost
+        text = "".join(
+            section.format(texts) for section, texts in zip(sections, selected)
+        )
+        return text, usage
+
+
+def fit_messages(messages, budget, counter=None):
+    """
+    Returns the most recent messages that fit in budget tokens. System
+    messages are always kept, the last message is always kept, and a tool
+    result is never separated from the assistant message that requested it.
+    """
+    counter = counter or get_token_counter()
+    system = [m for m in messages if message_field(m, "role") == "system"]
+    rest = [m for m in messages if message_field(m, "role") != "system"]
+    remaining = budget - sum(counter.count_message(m) for m in system)
+
+    kept = []
+    end = len(rest)
+    while end > 0:
+        # a run of tool results belongs with the message before it
+        start = end - 1
+        while start > 0 and message_field(rest[start], "role") == "tool":
+            start -= 1
+        unit = rest[start:end]
+        cost = sum(counter.count_message(m) for m in unit)
+        if kept and cost > remaining:
+            break
+        kept[:0] = unit
+        remaining -= cost
+        end = start
+
+    # the kept history must not open with a reply to a dropped message
+    while len(kept) > 1 and message_field(kept[0], "role") in ("assistant", "tool"):
+        kept.pop(0)
+    return system + kept
@@ -0,0 +1,124 @@
+import io
+import mimetypes
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from nexus.nexus_base.ingestion_pipeline import iter_document_segments
+
+
+class DocumentFile(io.FileIO):
+    """A file on disk that looks like a Streamlit upload (name and type)."""
+
+    def __init__(self, path):
+        super().__init__(path, "rb")
+        self.path = path
+        self.type = mimetypes.guess_type(path)[0] or "text/plain"
+
+    @property
+    def document_name(self):
+        return os.path.basename(self.path)
+
+
+def count_pdf_pages(path):
+    import pdfplumber
+
+    with pdfplumber.open(path) as pdf:
+        return len(pdf.pages)
+
+
+def extract_pdf_pages(path, start, end):
+    """Extracts the text of pages [start, end) of a PDF. Runs in a worker process."""
+    import pdfplumber
+
+    pages = []
+    with pdfplumber.open(path) as pdf:
+        for page in pdf.pages[start:end]:
+            pages.append(page.extract_text() or "")
+            page.flush_cache()
+    return pages
+
+
+class DocumentExtractionPool:
+    """
+    Spreads PDF text extraction across a process pool by page ranges and
+    yields the pages back in document order. Other file types are read on
+    the calling thread.
+    """
+
+    def __init__(self, max_workers=None, pages_per_task=8):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.pages_per_task = pages_per_task
+        self.executor = None
+        self.lock = threading.Lock()
+
+    def get_executor(self):
+        with self.lock:
+            if self.executor is None:
+                # forking a process with running threads can leave the
+                # children stuck on locks held at the fork, so start afresh
+                self.executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self.executor
+
+    def iter_pdf_pages(self, path):
+        try:
+            import pdfplumber  # noqa: F401
+        except ImportError:
+            raise Exception("Please install pdfplumber to read PDF files.")
+
+        executor = self.get_executor()
+        page_count = count_pdf_pages(path)
+        ranges = [
+            (start, min(start + self.pages_per_task, page_count))
+            for start in range(0, page_count, self.pages_per_task)
+        ]
+        # keep a bounded window of ranges in flight so pages stream in order
+        window = self.max_workers * 2
+        futures = [
+            executor.submit(extract_pdf_pages, path, start, end)
+            for start, end in ranges[:window]
+        ]
+        next_range = len(futures)
+        for i in range(len(ranges)):
+            pages = futures[i].result()
+            futures[i] = None
+            if next_range < len(ranges):
+                start, end = ranges[next_range]
+                futures.append(executor.submit(extract_pdf_pages, path, start, end))
+                next_range += 1
+            for text in pages:
+                if text:
+                    yield text
+
+    def iter_segments(self, uploaded_file):
+        if uploaded_file.type != "application/pdf":
+            yield from iter_document_segments(uploaded_file)
+            return
+
+        path = getattr(uploaded_file, "path", None)
+        if path is not None:
+            yield from self.iter_pdf_pages(path)
+            return
+
+        # uploads only live in memory, workers need a file they can open
+        position = uploaded_file.tell()
+        with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as temp:
+            uploaded_file.seek(0)
+            shutil.copyfileobj(uploaded_file, temp)
+        uploaded_file.seek(position)
+        try:
+            yield from self.iter_pdf_pages(temp.name)
+        finally:
+            os.remove(temp.name)
+
+    def shutdown(self):
+        with self.lock:
+            if self.executor is not None:
+                self.executor.shutdown()
+                self.executor = None
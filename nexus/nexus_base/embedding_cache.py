@@ -0,0 +1,181 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+
+
+def text_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Content-addressed embedding cache keyed on (model, sha256(text)), where
+    model names the embedding space, e.g. EmbeddingManager.cache_key.
+
+    Embeddings are stored on disk in SQLite as float32 blobs, with an
+    in-process LRU in front. The disk table is bounded to max_items; when it
+    grows past that the least recently used rows are evicted. Reads don't
+    write: the last use of rows read from disk is kept in memory and written
+    with the next put, eviction, or once touch_batch rows are waiting.
+    """
+
+    def __init__(
+        self,
+        path="nexus_embedding_cache.db",
+        memory_items=10000,
+        max_items=500000,
+        touch_batch=1000,
+    ):
+        self.path = path
+        self.memory_items = memory_items
+        self.max_items = max_items
+        self.touch_batch = touch_batch
+        self.touched = {}  # (model, hash): last use not yet written
+        self.lru = OrderedDict()
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                hash TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (model, hash)
+            )
+            """)
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS embeddings_last_access ON embeddings (last_access)"
+        )
+        self.conn.commit()
+        self.count = self.conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def _remember(self, key, embedding):
+        self.lru[key] = embedding
+        self.lru.move_to_end(key)
+        while len(self.lru) > self.memory_items:
+            self.lru.popitem(last=False)
+
+    def get(self, model, text):
+        return self.get_many(model, [text])[0]
+
+    def get_many(self, model, texts):
+        """Returns cached embeddings for texts, None for every miss."""
+        keys = [(model, text_hash(text)) for text in texts]
+        results = [None] * len(texts)
+        missing = {}
+        with self.lock:
+            for i, key in enumerate(keys):
+                if key in self.lru:
+                    self.lru.move_to_end(key)
+                    results[i] = self.lru[key]
+                else:
+                    missing.setdefault(key[1], []).append(i)
+            if not missing:
+                return results
+
+            hashes = list(missing)
+            found = []
+            for start in range(0, len(hashes), 500):
+                chunk = hashes[start : start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                found.extend(
+                    self.conn.execute(
+                        f"SELECT hash, vector FROM embeddings WHERE model = ? AND hash IN ({placeholders})",
+                        [model] + chunk,
+                    ).fetchall()
+                )
+            now = time.time()
+            for hash, vector in found:
+                embedding = array("f", vector).tolist()
+                self._remember((model, hash), embedding)
+                self.touched[(model, hash)] = now
+                for i in missing[hash]:
+                    results[i] = embedding
+            if len(self.touched) >= self.touch_batch:
+                self._write_touched()
+                self.conn.commit()
+        return results
+
+    def _write_touched(self):
+        if self.touched:
+            self.conn.executemany(
+                "UPDATE embeddings SET last_access = ? WHERE model = ? AND hash = ?",
+                [(now, model, hash) for (model, hash), now in self.touched.items()],
+            )
+            self.touched.clear()
+
+    def put(self, model, text, embedding):
+        self.put_many(model, [text], [embedding])
+
+    def put_many(self, model, texts, embeddings):
+        now = time.time()
+        rows = []
+        with self.lock:
+            for text, embedding in zip(texts, embeddings):
+                if embedding is None:
+                    continue
+                key = (model, text_hash(text))
+                self._remember(key, list(embedding))
+                rows.append((model, key[1], array("f", embedding).tobytes(), now))
+            if not rows:
+                return
+            self._write_touched()
+            before = self.conn.total_changes
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (model, hash, vector, last_access) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            self.count += self.conn.total_changes - before
+            if self.count > self.max_items:
+                self._evict()
+            self.conn.commit()
+
+    def _evict(self):
+        # drop down to 90% of the bound so eviction doesn't run on every insert
+        excess = self.count - int(self.max_items * 0.9)
+        self.conn.execute(
+            """
+            DELETE FROM embeddings WHERE rowid IN (
+                SELECT rowid FROM embeddings ORDER BY last_access ASC LIMIT ?
+            )
+            """,
+            (excess,),
+        )
+        self.count = self.conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def clear(self):
+        with self.lock:
+            self.lru.clear()
+            self.touched.clear()
+            self.conn.execute("DELETE FROM embeddings")
+            self.conn.commit()
+            self.count = 0
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_embedding_cache():
+    """Returns the process wide cache, or None if disabled by NEXUS_EMBEDDING_CACHE=off."""
+    global _cache
+    if os.getenv("NEXUS_EMBEDDING_CACHE", "on").lower() in ("off", "false", "0"):
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = EmbeddingCache(
+                path=os.getenv(
+                    "NEXUS_EMBEDDING_CACHE_PATH", "nexus_embedding_cache.db"
+                ),
+                memory_items=int(
+                    os.getenv("NEXUS_EMBEDDING_CACHE_MEMORY_ITEMS", "10000")
+                ),
+                max_items=int(os.getenv("NEXUS_EMBEDDING_CACHE_MAX_ITEMS", "500000")),
+            )
+        return _cache
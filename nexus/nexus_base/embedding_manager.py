@@ -1,24 +1,265 @@
+import hashlib
+import math
+import os
+import re
+import threading
+import time
+from concurrent.futures import Future
+
 from dotenv import load_dotenv
-from openai import OpenAI
 
-load_dotenv
+from nexus.nexus_base.embedding_cache import get_embedding_cache
+from nexus.nexus_base.http_clients import create_client
+
+load_dotenv()
+
+
+def prepare_text(text):
+    text = str(text)
+    return text.replace("\n", " ")
+
+
+def estimate_tokens(text):
+    # conservative estimate (~3 characters per token) used only for packing batches
+    return len(text) // 3 + 1
+
+
+def pack_batches(texts, max_items, max_tokens):
+    """
+    Packs texts into batches that respect the provider's per-request limits.
+
+    Args:
+        texts: A list of strings.
+        max_items: The maximum number of inputs per request.
+        max_tokens: The maximum number of (estimated) tokens per request.
+
+    Returns:
+        A list of batches, each a list of indexes into texts.
+    """
+    batches = []
+    batch = []
+    batch_tokens = 0
+    for i, text in enumerate(texts):
+        tokens = estimate_tokens(text)
+        if batch and (len(batch) >= max_items or batch_tokens + tokens > max_tokens):
+            batches.append(batch)
+            batch = []
+            batch_tokens = 0
+        batch.append(i)
+        batch_tokens += tokens
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+class OpenAIEmbeddingBackend:
+    # limits of the OpenAI embeddings endpoint
+    max_batch_items = 2048
+    max_batch_tokens = 300000
+
+    def __init__(self, model="text-embedding-3-small", dimensions=None):
+        self.client = create_client("openai")
+        self.model = model
+        self.dimensions = dimensions  # None for the model's own size
+
+    def embed(self, texts):
+        options = {"dimensions": self.dimensions} if self.dimensions else {}
+        response = self.client.embeddings.create(
+            input=texts, model=self.model, **options
+        )
+        data = sorted(response.data, key=lambda d: d.index)
+        return [d.embedding for d in data]
+
+
+class LocalEmbeddingBackend:
+    """
+    Offline stand-in for a provider embedding model.
+
+    Hashes word tokens into a fixed size, normalized vector so similar texts
+    land close together. An optional simulated request latency makes it
+    useful for benchmarking batching without network access.
+    """
+
+    max_batch_items = 2048
+    max_batch_tokens = 300000
+
+    def __init__(
+        self, model="local-hash", dimensions=256, latency=0.0, item_latency=0.0
+    ):
+        self.model = model
+        self.dimensions = dimensions
+        self.latency = latency
+        self.item_latency = item_latency
+        self.calls = 0
+
+    def embed_text(self, text):
+        vector = [0.0] * self.dimensions
+        for token in re.findall(r"\w+", text.lower()):
+            digest = hashlib.md5(token.encode("utf-8")).digest()
+            index = int.from_bytes(digest[:4], "little") % self.dimensions
+            sign = 1.0 if digest[4] & 1 else -1.0
+            vector[index] += sign
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    def embed(self, texts):
+        self.calls += 1
+        if self.latency or self.item_latency:
+            time.sleep(self.latency + self.item_latency * len(texts))
+        return [self.embed_text(text) for text in texts]
+
+
+EMBEDDING_BACKENDS = {
+    "openai": OpenAIEmbeddingBackend,
+    "local": LocalEmbeddingBackend,
+}
+
+
+def register_embedding_backend(name, backend_class):
+    EMBEDDING_BACKENDS[name] = backend_class
+
+
+_backends = {}
+_coalescers = {}
+_shared_lock = threading.Lock()
+
+
+def get_embedding_backend(name=None):
+    """Returns the shared backend instance registered under name."""
+    name = name or os.getenv("NEXUS_EMBEDDING_BACKEND", "openai")
+    with _shared_lock:
+        if name not in _backends:
+            if name not in EMBEDDING_BACKENDS:
+                raise ValueError(f"Embedding backend '{name}' not found.")
+            _backends[name] = EMBEDDING_BACKENDS[name]()
+        return _backends[name]
+
+
+def get_embedding_coalescer(backend):
+    """Returns the coalescer shared by every caller of backend."""
+    with _shared_lock:
+        if id(backend) not in _coalescers:
+            max_wait = float(os.getenv("NEXUS_EMBEDDING_COALESCE_MS", "5")) / 1000
+            _coalescers[id(backend)] = EmbeddingCoalescer(backend, max_wait=max_wait)
+        return _coalescers[id(backend)]
+
+
+class EmbeddingCoalescer:
+    """
+    Merges concurrent single-text embedding requests into shared batches.
+
+    Callers from different sessions/threads submit texts and block on a
+    future; a worker thread waits up to max_wait for more requests to arrive
+    and then sends everything pending as one (or more) provider requests.
+    """
+
+    def __init__(self, backend, max_wait=0.005):
+        self.backend = backend
+        self.max_wait = max_wait
+        self.pending = []
+        self.condition = threading.Condition()
+        self.worker = threading.Thread(target=self._run, daemon=True)
+        self.worker.start()
+
+    def submit(self, text):
+        future = Future()
+        with self.condition:
+            self.pending.append((text, future))
+            self.condition.notify()
+        return future
+
+    def _take_batch(self):
+        with self.condition:
+            while not self.pending:
+                self.condition.wait()
+            deadline = time.monotonic() + self.max_wait
+            while len(self.pending) < self.backend.max_batch_items:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self.condition.wait(remaining)
+            batch = self.pending[: self.backend.max_batch_items]
+            self.pending = self.pending[self.backend.max_batch_items :]
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            texts = [text for text, _ in batch]
+            for indexes in pack_batches(
+                texts, self.backend.max_batch_items, self.backend.max_batch_tokens
+            ):
+                try:
+                    embeddings = self.backend.embed([texts[i] for i in indexes])
+                    for i, embedding in zip(indexes, embeddings):
+                        batch[i][1].set_result(embedding)
+                except Exception as e:
+                    for i in indexes:
+                        batch[i][1].set_exception(e)
+
+
+def embedding_cache_key(backend):
+    """Names the vectors backend makes, so a cache never mixes two spaces."""
+    dimensions = getattr(backend, "dimensions", None) or "default"
+    return f"{type(backend).__name__}:{backend.model}:{dimensions}"
 
 
 class EmbeddingManager:
-    def __init__(self):
+    def __init__(self, backend=None, coalesce=True, cache=True):
         try:
-            self.client = OpenAI()
-            self.model = "text-embedding-3-small"
+            if backend is None or isinstance(backend, str):
+                backend = get_embedding_backend(backend)
+            self.backend = backend
+            self.model = backend.model
+            self.cache_key = embedding_cache_key(backend)
         except Exception as e:
-            raise Exception(f"Error loading OpenAI client for Embedding: {e}")
+            raise Exception(f"Error loading client for Embedding: {e}")
+        self.coalescer = get_embedding_coalescer(backend) if coalesce else None
+        # True uses the shared on-disk cache, False disables caching
+        self.cache = get_embedding_cache() if cache is True else (cache or None)
 
     def get_embedding(self, text):
         if text is None:
             return None
-        text = str(text)
-        text = text.replace("\n", " ")
-        return (
-            self.client.embeddings.create(input=[text], model=self.model)
-            .data[0]
-            .embedding
-        )
+        text = prepare_text(text)
+        if self.cache:
+            embedding = self.cache.get(self.cache_key, text)
+            if embedding is not None:
+                return embedding
+        if self.coalescer:
+            embedding = self.coalescer.submit(text).result()
+        else:
+            embedding = self.backend.embed([text])[0]
+        if self.cache:
+            self.cache.put(self.cache_key, text, embedding)
+        return embedding
+
+    def get_embeddings(self, texts):
+        """
+        Embeds a list of texts using as few provider requests as possible.
+
+        Cached texts are not sent to the provider. Returns a list of
+        embeddings in the same order as texts; None inputs produce None
+        embeddings.
+        """
+        embeddings = [None] * len(texts)
+        indexes = [i for i, text in enumerate(texts) if text is not None]
+        prepared = [prepare_text(texts[i]) for i in indexes]
+        if self.cache:
+            cached = self.cache.get_many(self.cache_key, prepared)
+            for i, embedding in zip(indexes, cached):
+                embeddings[i] = embedding
+            misses = [j for j, embedding in enumerate(cached) if embedding is None]
+            indexes = [indexes[j] for j in misses]
+            prepared = [prepared[j] for j in misses]
+
+        for batch in pack_batches(
+            prepared, self.backend.max_batch_items, self.backend.max_batch_tokens
+        ):
+            batch_texts = [prepared[i] for i in batch]
+            results = self.backend.embed(batch_texts)
+            if self.cache:
+                self.cache.put_many(self.cache_key, batch_texts, results)
+            for i, embedding in zip(batch, results):
+                embeddings[indexes[i]] = embedding
+        return embeddings
@@ -0,0 +1,90 @@
+import asyncio
+import contextvars
+import threading
+
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def get_event_loop():
+    """
+    The process wide loop the async engine clients run on, started in a
+    daemon thread on first use. Async clients pool their connections per
+    loop, so every async call goes through this one.
+    """
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=loop.run_forever, name="nexus-event-loop", daemon=True
+            ).start()
+            _loop = loop
+    return _loop
+
+
+async def _in_context(context, awaitable):
+    # tasks start from the loop thread's context; carry the caller's over
+    for var, value in context.items():
+        var.set(value)
+    return await awaitable
+
+
+def run_coroutine(coro, timeout=None):
+    """Runs coro on the shared loop and waits for its result from sync code."""
+    loop = get_event_loop()
+    if _running_loop() is loop:
+        coro.close()
+        raise RuntimeError("Blocking on the shared event loop from itself; await it.")
+    future = asyncio.run_coroutine_threadsafe(
+        _in_context(contextvars.copy_context(), coro), loop
+    )
+    return future.result(timeout)
+
+
+async def run_shared(coro):
+    """Awaits coro on the shared loop from a coroutine on any loop."""
+    loop = get_event_loop()
+    if _running_loop() is loop:
+        return await coro
+    future = asyncio.run_coroutine_threadsafe(
+        _in_context(contextvars.copy_context(), coro), loop
+    )
+    return await asyncio.wrap_future(future)
+
+
+async def _next(iterator):
+    return await iterator.__anext__()
+
+
+def iterate(async_iterable):
+    """Iterates an async iterable on the shared loop from sync code."""
+    iterator = async_iterable.__aiter__()
+    try:
+        while True:
+            try:
+                yield run_coroutine(_next(iterator))
+            except StopAsyncIteration:
+                return
+    finally:
+        # also when the consumer stops early, so the stream is released
+        if hasattr(iterator, "aclose"):
+            run_coroutine(iterator.aclose())
+
+
+async def aiterate(async_iterable):
+    """Iterates an async iterable on the shared loop from any loop."""
+    iterator = async_iterable.__aiter__()
+    while True:
+        try:
+            item = await run_shared(_next(iterator))
+        except StopAsyncIteration:
+            return
+        yield item
+
+
+def _running_loop():
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
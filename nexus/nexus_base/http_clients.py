@@ -0,0 +1,113 @@
+import importlib
+import importlib.util
+import os
+import ssl
+import sys
+import threading
+
+import httpx
+from dotenv import load_dotenv
+
+from nexus.nexus_base.event_loop import run_coroutine
+
+load_dotenv()
+
+# provider: (SDK package, sync client class, async client class)
+PROVIDERS = {
+    "openai": ("openai", "OpenAI", "AsyncOpenAI"),
+    "azure": ("openai", "AzureOpenAI", "AsyncAzureOpenAI"),
+    "anthropic": ("anthropic", "Anthropic", "AsyncAnthropic"),
+    "groq": ("groq", "Groq", "AsyncGroq"),
+}
+
+_http_clients = {}
+_http_clients_lock = threading.Lock()
+
+
+def http_settings():
+    """
+    Connection settings for the shared HTTP clients, from the environment:
+    NEXUS_HTTP_MAX_CONNECTIONS and NEXUS_HTTP_MAX_KEEPALIVE size each pool,
+    NEXUS_HTTP_KEEPALIVE_EXPIRY is how long idle connections are kept (s),
+    NEXUS_HTTP_TIMEOUT and NEXUS_HTTP_CONNECT_TIMEOUT bound requests (s),
+    NEXUS_HTTP2=on negotiates HTTP/2 (needs the h2 package) and
+    NEXUS_HTTP_CA_BUNDLE verifies servers against a custom CA file.
+    """
+    http2 = os.getenv("NEXUS_HTTP2", "off").lower() in ("1", "on", "true", "yes")
+    if http2 and importlib.util.find_spec("h2") is None:
+        print("HTTP/2 needs the h2 package; using HTTP/1.1.")
+        http2 = False
+    return {
+        "max_connections": int(os.getenv("NEXUS_HTTP_MAX_CONNECTIONS", 100)),
+        "max_keepalive_connections": int(os.getenv("NEXUS_HTTP_MAX_KEEPALIVE", 20)),
+        "keepalive_expiry": float(os.getenv("NEXUS_HTTP_KEEPALIVE_EXPIRY", 30)),
+        "timeout": float(os.getenv("NEXUS_HTTP_TIMEOUT", 600)),
+        "connect_timeout": float(os.getenv("NEXUS_HTTP_CONNECT_TIMEOUT", 5)),
+        "http2": http2,
+        "verify": _ca_bundle_context(os.getenv("NEXUS_HTTP_CA_BUNDLE")),
+    }
+
+
+def get_http_client(provider, asynchronous=False):
+    """
+    The keep-alive HTTP client shared by every client of a provider, one for
+    sync and one for async use. Async clients must only be used on the
+    shared event loop (see event_loop.py), since their connections belong
+    to the loop that opened them.
+    """
+    key = (provider, asynchronous)
+    with _http_clients_lock:
+        if key not in _http_clients:
+            _http_clients[key] = _build_http_client(provider, asynchronous)
+        return _http_clients[key]
+
+
+def create_client(provider, asynchronous=False, **kwargs):
+    """
+    Builds a provider SDK client (see PROVIDERS) on the provider's shared
+    HTTP client, so its connections and TLS sessions are reused across every
+    agent and manager talking to that provider.
+    """
+    package, sync_class, async_class = PROVIDERS[provider]
+    module = importlib.import_module(package)
+    client_class = getattr(module, async_class if asynchronous else sync_class)
+    return client_class(http_client=get_http_client(provider, asynchronous), **kwargs)
+
+
+def close_http_clients():
+    """Closes the shared clients; the next create_client opens new ones."""
+    with _http_clients_lock:
+        clients = list(_http_clients.items())
+        _http_clients.clear()
+    for (provider, asynchronous), client in clients:
+        if asynchronous:
+            run_coroutine(client.aclose())
+        else:
+            client.close()
+
+
+def _build_http_client(provider, asynchronous):
+    settings = http_settings()
+    package = PROVIDERS[provider][0]
+    importlib.import_module(package)
+    # newer SDK releases take clients from httpx2, which has the same API
+    base_client = sys.modules.get(f"{package}._base_client")
+    http = getattr(base_client, "httpx", None) or getattr(base_client, "httpx2", httpx)
+    client_class = http.AsyncClient if asynchronous else http.Client
+    return client_class(
+        limits=http.Limits(
+            max_connections=settings["max_connections"],
+            max_keepalive_connections=settings["max_keepalive_connections"],
+            keepalive_expiry=settings["keepalive_expiry"],
+        ),
+        timeout=http.Timeout(settings["timeout"], connect=settings["connect_timeout"]),
+        http2=settings["http2"],
+        verify=settings["verify"],
+        follow_redirects=True,
+    )
+
+
+def _ca_bundle_context(ca_bundle):
+    if not ca_bundle:
+        return True
+    return ssl.create_default_context(cafile=ca_bundle)
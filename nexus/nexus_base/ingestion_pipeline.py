@@ -0,0 +1,194 @@
+import queue
+import threading
+
+_DONE = object()
+
+
+def iter_document_segments(uploaded_file):
+    """
+    Yields the text of a document one page (PDF) or paragraph (text, DOCX)
+    at a time, so large files are never held in memory as a single string.
+    """
+    if uploaded_file is None:
+        return
+    if uploaded_file.type == "application/pdf":
+        try:
+            import pdfplumber
+        except ImportError:
+            raise Exception("Please install pdfplumber to read PDF files.")
+        with pdfplumber.open(uploaded_file) as pdf:
+            for page in pdf.pages:
+                text = page.extract_text()
+                page.flush_cache()
+                if text:
+                    yield text
+    elif (
+        uploaded_file.type
+        == "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+    ):
+        try:
+            import docx
+        except ImportError:
+            raise Exception("Please install python-docx to read DOCX files.")
+        for para in docx.Document(uploaded_file).paragraphs:
+            yield para.text
+    else:
+        paragraph = []
+        for line in uploaded_file:
+            line = line.decode("utf-8") if isinstance(line, bytes) else line
+            paragraph.append(line.rstrip("\r\n"))
+            if not line.strip():
+                yield "\n".join(paragraph)
+                paragraph = []
+        if paragraph:
+            yield "\n".join(paragraph)
+
+
+def iter_chunks(segments, splitter, window):
+    """
+    Splits a stream of text segments into chunks.
+
+    Segments are buffered until roughly window characters are available; the
+    buffer is split and every chunk but the last is emitted. The last chunk
+    is carried into the next window so chunks still span segment boundaries.
+    """
+    buffer = ""
+    for segment in segments:
+        buffer = f"{buffer}\n{segment}" if buffer else segment
+        if len(buffer) < window:
+            continue
+        chunks = splitter.split_text(buffer)
+        for chunk in chunks[:-1]:
+            yield chunk
+        buffer = chunks[-1] if chunks else ""
+    if buffer:
+        for chunk in splitter.split_text(buffer):
+            yield chunk
+
+
+class DocumentIngestionPipeline:
+    """
+    Chunks → batched embedder → batched writer, with bounded queues between
+    the stages so memory use stays flat regardless of document size.
+
+    Args:
+        embed: A function mapping a list of texts to a list of embeddings.
+        write: A function called with (texts, embeddings) for every batch.
+        batch_size: The number of chunks per embedding/write batch.
+        queue_size: The number of batches buffered between stages.
+        progress: Optional callback receiving a dict of counters after each
+            written batch.
+        checkpoint: Optional callback receiving the number of chunks written
+            so far, called after each written batch.
+    """
+
+    def __init__(
+        self,
+        embed,
+        write,
+        batch_size=64,
+        queue_size=4,
+        progress=None,
+        checkpoint=None,
+    ):
+        self.embed = embed
+        self.write = write
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.progress = progress
+        self.checkpoint = checkpoint
+
+    def _put(self, q, item, stop):
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q, stop):
+        while not stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def _batch_chunks(self, chunks, skip, out, stop, errors):
+        try:
+            batch = []
+            for i, chunk in enumerate(chunks):
+                if i < skip:
+                    continue
+                batch.append(chunk)
+                if len(batch) >= self.batch_size:
+                    if not self._put(out, batch, stop):
+                        return
+                    batch = []
+            if batch:
+                self._put(out, batch, stop)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            self._put(out, _DONE, stop)
+
+    def _embed_batches(self, source, out, stop, errors):
+        try:
+            while True:
+                batch = self._get(source, stop)
+                if batch is _DONE:
+                    break
+                if not self._put(out, (batch, self.embed(batch)), stop):
+                    return
+        except Exception as e:
+            errors.append(e)
+        finally:
+            self._put(out, _DONE, stop)
+
+    def run(self, chunks, skip=0):
+        """
+        Runs the pipeline over an iterator of chunks, skipping the first skip
+        chunks (already written by an earlier, interrupted run).
+
+        Returns the total number of chunks written, including skipped ones.
+        """
+        chunk_queue = queue.Queue(maxsize=self.queue_size)
+        embedded_queue = queue.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+        errors = []
+        stages = [
+            threading.Thread(
+                target=self._batch_chunks,
+                args=(chunks, skip, chunk_queue, stop, errors),
+                daemon=True,
+            ),
+            threading.Thread(
+                target=self._embed_batches,
+                args=(chunk_queue, embedded_queue, stop, errors),
+                daemon=True,
+            ),
+        ]
+        for stage in stages:
+            stage.start()
+
+        written = skip
+        try:
+            while True:
+                item = self._get(embedded_queue, stop)
+                if item is _DONE:
+                    break
+                texts, embeddings = item
+                self.write(texts, embeddings)
+                written += len(texts)
+                if self.checkpoint:
+                    self.checkpoint(written)
+                if self.progress:
+                    self.progress({"chunks_written": written, "chunks_skipped": skip})
+        finally:
+            stop.set()
+            for stage in stages:
+                stage.join()
+        if errors:
+            raise errors[0]
+        return written
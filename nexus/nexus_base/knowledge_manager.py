@@ -1,6 +1,6 @@
-import json
+import hashlib
+import os
 
-import chromadb
 import pandas as pd
 from dotenv import load_dotenv
 from langchain_text_splitters import (
@@ -8,13 +8,24 @@ from langchain_text_splitters import (
     RecursiveCharacterTextSplitter,
 )
 
+from nexus.nexus_base.compression import compact_collection, compress_clusters
+from nexus.nexus_base.context_assembler import ContextSection
+from nexus.nexus_base.document_extraction import DocumentExtractionPool, DocumentFile
 from nexus.nexus_base.embedding_manager import EmbeddingManager
-from nexus.nexus_base.nexus_models import KnowledgeStore, db
-from nexus.nexus_base.utils import (
-    convert_keys_to_lowercase,
-    extract_code,
-    id_hash,
+from nexus.nexus_base.ingestion_pipeline import (
+    DocumentIngestionPipeline,
+    iter_chunks,
+    iter_document_segments,
 )
+from nexus.nexus_base.nexus_models import (
+    Document,
+    DocumentChunk,
+    IngestionCheckpoint,
+    KnowledgeStore,
+    db,
+)
+from nexus.nexus_base.utils import id_hash
+from nexus.nexus_base.vector_store import distance_to_score, get_vector_store
 
 load_dotenv()
 
@@ -22,14 +33,14 @@ load_dotenv()
 class KnowledgeManager:
     def __init__(self):
         self.embedding_manager = EmbeddingManager()
-        self.CHROMA_DB = "nexus_knowledge_chroma_db"
+        self.vector_store = get_vector_store("knowledge")
+        self.extraction_pool = DocumentExtractionPool()
         self.initialize_stores()
 
     def initialize_stores(self):
-        chroma_client = chromadb.PersistentClient(path=self.CHROMA_DB)
-        collections = chroma_client.list_collections()
-        for collection in collections:
-            self.add_knowledge_store(collection.name)
+        collections = self.vector_store.list_collections()
+        for name in collections:
+            self.add_knowledge_store(name)
 
     def add_knowledge_store(self, store_name):
         if store_name is None or store_name == "None":
@@ -46,37 +57,59 @@ class KnowledgeManager:
     def get_document_embedding(self, text):
         return self.embedding_manager.get_embedding(text)
 
-    def query_documents(self, knowledge_store, input_text, n_results=5):
+    def get_document_embeddings(self, texts):
+        return self.embedding_manager.get_embeddings(texts)
+
+    def query_documents(self, knowledge_store, input_text, n_results=5, embedding=None):
         if knowledge_store is None or input_text is None:
             return None
 
-        chroma_client = chromadb.PersistentClient(path=self.CHROMA_DB)
-        collection = chroma_client.get_or_create_collection(name=knowledge_store)
-        embedding = self.get_document_embedding(input_text)
+        collection = self.vector_store.get_collection(knowledge_store)
+        if embedding is None:
+            embedding = self.get_document_embedding(input_text)
         docs = collection.query(
             query_embeddings=[embedding], n_results=n_results, include=["documents"]
         )
         return docs["documents"]
 
-    def apply_knowledge_RAG(self, knowledge_store, input_text, n_results=5):
+    def get_knowledge_section(
+        self, knowledge_store, input_text, n_results=5, embedding=None
+    ):
+        """Returns the documents matching input_text as a scored ContextSection."""
+        collection = self.vector_store.get_collection(knowledge_store)
+        if embedding is None:
+            embedding = self.get_document_embedding(input_text)
+        docs = collection.query(
+            query_embeddings=[embedding],
+            n_results=n_results,
+            include=["documents", "distances"],
+        )
+        return ContextSection(
+            "knowledge",
+            "\nUse the following documents to help answer the question:\n",
+            [
+                (doc, distance_to_score(distance))
+                for doc, distance in zip(docs["documents"][0], docs["distances"][0])
+            ],
+            label="Document",
+        )
+
+    def apply_knowledge_RAG(
+        self, knowledge_store, input_text, n_results=5, embedding=None
+    ):
         if knowledge_store is None or input_text is None:
             return None
 
-        docs = self.query_documents(knowledge_store, input_text, n_results)
-
-        prompt = ""
-        if docs and len(docs) > 0 and len(docs[0]) > 0:
-            prompt += "\nUse the following documents to help answer the question:\n"
-            for i, doc in enumerate(docs):
-                prompt += f"Document {i+1}:\n{doc}\n"
-        return prompt
+        section = self.get_knowledge_section(
+            knowledge_store, input_text, n_results, embedding
+        )
+        return section.format([doc for doc, _ in section.passages])
 
     def get_documents(self, knowledge_store, include=["documents", "embeddings"]):
         if knowledge_store is None:
             return None
 
-        chroma_client = chromadb.PersistentClient(path=self.CHROMA_DB)
-        collection = chroma_client.get_or_create_collection(name=knowledge_store)
+        collection = self.vector_store.get_collection(knowledge_store)
         documents = collection.get(include=include)
         return documents
 
@@ -128,43 +161,291 @@ class KnowledgeManager:
                     raise Exception("Please install python-docx to read DOCX files.")
         return document
 
+    def file_fingerprint(self, uploaded_file, knowledge_store, block_size=1 << 20):
+        # the whole file and the chunking settings; a load is only skipped or
+        # resumed when neither has changed
+        position = uploaded_file.tell()
+        uploaded_file.seek(0)
+        digest = hashlib.sha256()
+        while True:
+            block = uploaded_file.read(block_size)
+            if not block:
+                break
+            digest.update(block.encode("utf-8") if isinstance(block, str) else block)
+        uploaded_file.seek(position)
+        return (
+            f"{digest.hexdigest()}:{knowledge_store.chunking_option}:"
+            f"{knowledge_store.chunk_size}:{knowledge_store.overlap}"
+        )
+
+    def get_document_name(self, uploaded_file):
+        return (
+            getattr(uploaded_file, "document_name", None)
+            or getattr(uploaded_file, "name", None)
+            or "document"
+        )
+
     def load_document(
-        self,
-        knowledge_store,
-        uploaded_file,
+        self, knowledge_store, uploaded_file, progress=None, segments=None
     ):
         """
-        Loads a document from upload, splits it based on chunking option and saves embeddings.
+        Streams a document from upload through chunking, batched embedding and
+        batched writes to the store, checkpointing after every written batch.
+
+        Only chunks that are not already in the store are embedded, so
+        re-uploading a modified document embeds just the new or changed
+        chunks. An unchanged document that was fully loaded is skipped, and
+        an interrupted load of the same file resumes after the last
+        checkpointed chunk. Each batch is added to the document's chunk
+        manifest before it is stored, so every vector can be found again;
+        chunks of the previous version the document no longer contains are
+        deleted at the end.
 
         Args:
+            knowledge_store: The KnowledgeStore to load the document into.
             uploaded_file: A Streamlit file uploader object.
-            chunker: A Langchain TextSplitter object (CharacterTextSplitter or WordTextSplitter).
-            chunk_size: The size of each chunk.
-            overlap: The size of the overlap between chunks.
+            progress: Optional callback receiving a dict of counters as
+                batches are written.
+            segments: Optional iterator of the document's text segments,
+                read from uploaded_file when not given.
 
         Returns:
-            None
+            True if the document was loaded.
         """
-        if knowledge_store is not None and uploaded_file is not None:
-            document = self.read_file(uploaded_file)
+        if knowledge_store is None or uploaded_file is None:
+            return False
+
+        document_name = self.get_document_name(uploaded_file)
+        fingerprint = self.file_fingerprint(uploaded_file, knowledge_store)
+        with db.atomic():
+            document = (
+                Document.select()
+                .where(
+                    (Document.store == knowledge_store)
+                    & (Document.name == document_name)
+                )
+                .first()
+            ) or Document.create(store=knowledge_store, name=document_name)
+            checkpoint, _ = IngestionCheckpoint.get_or_create(
+                store=knowledge_store.name, document=document_name
+            )
 
-            splitter = self.get_splitter(knowledge_store)
-            docs = splitter.create_documents([document])
+        same_file = checkpoint.fingerprint == fingerprint
+        if same_file and checkpoint.completed:
+            if progress:
+                written = checkpoint.chunks_written
+                progress(
+                    {
+                        "chunks_written": written,
+                        "chunks_skipped": written,
+                        "chunks_embedded": 0,
+                    }
+                )
+            return True
 
-            embeddings = [self.get_document_embedding(doc) for doc in docs]
+        skip = checkpoint.chunks_written if same_file else 0
+        with db.atomic():
+            if skip:
+                # a batch listed just before the interruption is listed again
+                DocumentChunk.delete().where(
+                    (DocumentChunk.document == document)
+                    & (DocumentChunk.stale == False)  # noqa: E712
+                    & (DocumentChunk.position >= skip)
+                ).execute()
+            else:
+                DocumentChunk.update(stale=True).where(
+                    DocumentChunk.document == document
+                ).execute()
+            IngestionCheckpoint.update(
+                fingerprint=fingerprint, chunks_written=skip, completed=False
+            ).where(IngestionCheckpoint.id == checkpoint.id).execute()
+
+        position = [skip]
+        embedded = [0]
+
+        def embed(docs):
+            ids = [id_hash(doc) for doc in docs]
+            collection = self.vector_store.get_collection(knowledge_store.name)
+            stored = set(collection.get(ids=list(set(ids)), include=[])["ids"])
+            new = [i for i, id in enumerate(ids) if id not in stored]
+            embeddings = [None] * len(docs)
+            for i, embedding in zip(
+                new, self.get_document_embeddings([docs[i] for i in new])
+            ):
+                embeddings[i] = embedding
+            return embeddings
+
+        def write(docs, embeddings):
+            rows = []
+            # identical chunks share an id, keep one of each
+            items = {}
+            for doc, embedding in zip(docs, embeddings):
+                id = id_hash(doc)
+                rows.append(
+                    {"document": document, "chunk_id": id, "position": position[0]}
+                )
+                position[0] += 1
+                if embedding is not None:
+                    items[id] = (doc, embedding)
+            # listed before they are stored, so no vector is left untracked
+            with db.atomic():
+                DocumentChunk.insert_many(rows).execute()
+            if items:
+                embedded[0] += len(items)
+                with self.vector_store.writing(knowledge_store.name) as collection:
+                    collection.upsert(
+                        ids=list(items),
+                        documents=[doc for doc, _ in items.values()],
+                        embeddings=[emb for _, emb in items.values()],
+                        metadatas=[{"document": document_name}] * len(items),
+                    )
+
+        def save_checkpoint(written, completed=False):
+            with db.atomic():
+                IngestionCheckpoint.update(
+                    chunks_written=written,
+                    completed=completed,
+                ).where(IngestionCheckpoint.id == checkpoint.id).execute()
+
+        def report(counters):
+            if progress:
+                progress({**counters, "chunks_embedded": embedded[0]})
+
+        splitter = self.get_splitter(knowledge_store)
+        if segments is None:
+            segments = iter_document_segments(uploaded_file)
+        chunks = iter_chunks(
+            segments,
+            splitter,
+            window=knowledge_store.chunk_size * 16,
+        )
+        pipeline = DocumentIngestionPipeline(
+            embed,
+            write,
+            progress=report,
+            checkpoint=save_checkpoint,
+        )
+        try:
+            written = pipeline.run(chunks, skip=skip)
+        finally:
+            # runs the segments' cleanup, such as removing the temporary copy
+            # of an uploaded PDF, also when the pipeline fails mid-document
+            if hasattr(segments, "close"):
+                segments.close()
+
+        manifest = {}
+        for chunk in DocumentChunk.select().where(DocumentChunk.document == document):
+            manifest.setdefault(chunk.stale, set()).add(chunk.chunk_id)
+        self.remove_document_chunks(
+            knowledge_store,
+            document,
+            manifest.get(True, set()) - manifest.get(False, set()),
+        )
+        with db.atomic():
+            DocumentChunk.delete().where(
+                (DocumentChunk.document == document)
+                & (DocumentChunk.stale == True)  # noqa: E712
+            ).execute()
+        save_checkpoint(written, completed=True)
+        return True
 
-            # create chroma database client
-            chroma_client = chromadb.PersistentClient(path=self.CHROMA_DB)
-            # get or create a collection
-            collection = chroma_client.get_or_create_collection(
-                name=knowledge_store.name
+    def remove_document_chunks(self, knowledge_store, document, chunk_ids):
+        """
+        Deletes chunk vectors that belonged to document, keeping any chunk that
+        another document in the same store still references.
+        """
+        chunk_ids = set(chunk_ids)
+        if not chunk_ids:
+            return 0
+        shared = {
+            row.chunk_id
+            for row in DocumentChunk.select(DocumentChunk.chunk_id)
+            .join(Document)
+            .where(
+                (Document.store == knowledge_store)
+                & (Document.id != document.id)
+                & (DocumentChunk.chunk_id.in_(list(chunk_ids)))
+            )
+        }
+        removed = list(chunk_ids - shared)
+        if removed:
+            with self.vector_store.writing(knowledge_store.name) as collection:
+                collection.delete(ids=removed)
+        return len(removed)
+
+    def delete_document(self, knowledge_store, document_name):
+        """Deletes a document, its chunk manifest and exactly its vectors."""
+        document = (
+            Document.select()
+            .where(
+                (Document.store == knowledge_store) & (Document.name == document_name)
+            )
+            .first()
+        )
+        if document is None:
+            return 0
+        chunk_ids = [chunk.chunk_id for chunk in document.chunks]
+        if not chunk_ids:
+            # loaded without a manifest; chunks stored since carry the name
+            chunk_ids = (
+                self.vector_store.get_collection(knowledge_store.name)
+                .get(where={"document": document_name}, include=[])
+                .get("ids")
+            )
+        self.remove_document_chunks(knowledge_store, document, chunk_ids)
+        with db.atomic():
+            DocumentChunk.delete().where(DocumentChunk.document == document).execute()
+            IngestionCheckpoint.delete().where(
+                (IngestionCheckpoint.store == knowledge_store.name)
+                & (IngestionCheckpoint.document == document_name)
+            ).execute()
+            return (
+                Document.delete()
+                .where(
+                    (Document.store == knowledge_store)
+                    & (Document.name == document_name)
+                )
+                .execute()
             )
-            docs = [str(doc.page_content) for doc in docs]
-            ids = [id_hash(m) for m in docs]
 
-            collection.add(embeddings=embeddings, documents=docs, ids=ids)
-            return True
-        return False
+    def load_documents(self, knowledge_store, files, progress=None):
+        """
+        Loads several documents into a knowledge store, extracting PDF pages
+        in parallel across the extraction process pool.
+
+        Args:
+            knowledge_store: The KnowledgeStore to load the documents into.
+            files: Uploaded file objects or paths to files on disk.
+            progress: Optional callback receiving a dict of counters, including
+                the document name, as batches are written.
+
+        Returns:
+            A dict of document name to whether it was loaded.
+        """
+        results = {}
+        for file in files:
+            name = os.path.basename(file) if isinstance(file, str) else None
+            try:
+                if isinstance(file, str):
+                    file = DocumentFile(file)
+                name = self.get_document_name(file)
+                results[name] = self.load_document(
+                    knowledge_store,
+                    file,
+                    progress=(
+                        (lambda p, name=name: progress({**p, "document": name}))
+                        if progress
+                        else None
+                    ),
+                    segments=self.extraction_pool.iter_segments(file),
+                )
+            except Exception as e:
+                print(f"Error loading document {name}: {e}")
+                results[name] = False
+            finally:
+                if isinstance(file, DocumentFile):
+                    file.close()
+        return results
 
     def examine_documents(self, knowledge_store):
         """
@@ -173,8 +454,7 @@ class KnowledgeManager:
         if knowledge_store is None:
             return None
 
-        chroma_client = chromadb.PersistentClient(path=self.CHROMA_DB)
-        collection = chroma_client.get_or_create_collection(name=knowledge_store)
+        collection = self.vector_store.get_collection(knowledge_store)
         documents = collection.get(include=["documents"])
 
         df = pd.DataFrame(
@@ -188,50 +468,83 @@ class KnowledgeManager:
         if knowledge_store is None:
             return False
 
-        chroma_client = chromadb.PersistentClient(path=self.CHROMA_DB)
-        chroma_client.delete_collection(knowledge_store)
+        self.vector_store.delete_collection(knowledge_store)
+        store = KnowledgeStore.get_or_none(KnowledgeStore.name == knowledge_store)
+        if store is not None:
+            self.clear_chunk_manifests(store)
+            with db.atomic():
+                Document.delete().where(Document.store == store).execute()
         return True
 
-    def compress_knowledge(self, knowledge_store, grouped_items, chat_agent):
-        chroma_client = chromadb.PersistentClient(path=self.CHROMA_DB)
-        chroma_client.delete_collection(knowledge_store.name)
-        collection = chroma_client.get_or_create_collection(name=knowledge_store.name)
-
+    def clear_chunk_manifests(self, knowledge_store):
+        """Forgets which chunks each document of the store owns."""
+        documents = Document.select(Document.id).where(
+            Document.store == knowledge_store
+        )
+        with db.atomic():
+            DocumentChunk.delete().where(
+                DocumentChunk.document.in_(documents)
+            ).execute()
+            IngestionCheckpoint.delete().where(
+                IngestionCheckpoint.store == knowledge_store.name
+            ).execute()
+
+    def forget_chunks(self, knowledge_store, chunk_ids, batch_size=500):
+        """
+        Drops chunk_ids from the manifests of the store's documents, and the
+        checkpoints of those documents so reloading them embeds them again.
+        """
+        documents = Document.select(Document.id).where(
+            Document.store == knowledge_store
+        )
+        chunk_ids = list(set(chunk_ids))
+        names = set()
+        with db.atomic():
+            for start in range(0, len(chunk_ids), batch_size):
+                batch = chunk_ids[start : start + batch_size]
+                chunks = DocumentChunk.select(DocumentChunk.document).where(
+                    DocumentChunk.document.in_(documents)
+                    & DocumentChunk.chunk_id.in_(batch)
+                )
+                names.update(
+                    document.name
+                    for document in Document.select(Document.name).where(
+                        Document.id.in_(chunks)
+                    )
+                )
+                DocumentChunk.delete().where(
+                    DocumentChunk.document.in_(documents)
+                    & DocumentChunk.chunk_id.in_(batch)
+                ).execute()
+            if names:
+                IngestionCheckpoint.delete().where(
+                    (IngestionCheckpoint.store == knowledge_store.name)
+                    & IngestionCheckpoint.document.in_(list(names))
+                ).execute()
+
+    def compress_knowledge(
+        self, knowledge_store, grouped_items, chat_agent, progress=None
+    ):
         summarization_prompt = "Given a list of dodcuments described below, synthesize these into a concise narrative that captures their essence, significance, facts, important events, plot, and any common themes. Focus on the underlying statements, lessons learned, or how these documents collectively shape an understanding of a particular topic. Please merge similar documents and emphasize unique insights, facts and other information. The aim is to create a compact, meaningful representation of these documents that captures the pertinent information. "
         function_prompt = "Summarize the documents and create a set of statements that summarize the essence, significance, facts, important events, plot, names, places, and any common themes. Return a JSON object with the following keys: 'statements' and only that key. Return only the JSON object and nothing else."
         function_keys = "statements"
 
-        for key, items in grouped_items.items():
-            try:
-                # 1. create a list of memories
-                items = "\n".join(items)
-
-                # 2. get the semantic response asking to summarize the memories
-                summarized_memories = chat_agent.get_semantic_response(
-                    summarization_prompt, items
-                )
-
-                # 3. get the semantic response asking to extract new memories
-                documents = chat_agent.get_semantic_response(
-                    function_prompt, summarized_memories
-                )
-                documents, code = extract_code(documents)
-                if code:
-                    documents = code[0][1]
-                documents = json.loads(documents)
-                documents = convert_keys_to_lowercase(documents)
-                documents = sum(
-                    [documents[key.lower()] for key in function_keys.split(",")],
-                    [],
-                )
-                # 4. add the new memories to the collection
-                for document in documents:
-                    embedding = self.get_document_embedding(document)
-                    id = id_hash(document)
-                    docs = collection.get(ids=[id], include=["documents"])["documents"]
-                    if docs is None or len(docs) == 0:
-                        collection.add(
-                            embeddings=[embedding], documents=[document], ids=[id]
-                        )
-            except Exception as e:
-                print("Error compressing documents: ", e)
+        compressed = sum(grouped_items.values(), [])
+        documents = compress_clusters(
+            chat_agent,
+            grouped_items,
+            summarization_prompt,
+            function_prompt,
+            function_keys,
+            progress=progress,
+        )
+        result = compact_collection(
+            self.vector_store,
+            knowledge_store.name,
+            documents,
+            self.get_document_embeddings,
+            compressed=compressed,
+        )
+        # the compressed statements no longer belong to any one document
+        self.forget_chunks(knowledge_store, [id_hash(text) for text in compressed])
+        return result
@@ -1,6 +1,5 @@
 import json
 
-import chromadb
 import pandas as pd
 from dotenv import load_dotenv
 from langchain_text_splitters import (
@@ -8,12 +7,20 @@ from langchain_text_splitters import (
     RecursiveCharacterTextSplitter,
 )
 
+from nexus.nexus_base.compression import compact_collection, compress_clusters
+from nexus.nexus_base.context_assembler import ContextSection
 from nexus.nexus_base.embedding_manager import EmbeddingManager
+from nexus.nexus_base.event_loop import run_coroutine
 from nexus.nexus_base.nexus_models import MemoryStore, MemoryType, db
 from nexus.nexus_base.utils import (
     convert_keys_to_lowercase,
     extract_code,
-    id_hash,
+    reciprocal_rank_fusion,
+)
+from nexus.nexus_base.vector_store import (
+    add_new_documents,
+    distance_to_score,
+    get_vector_store,
 )
 
 load_dotenv()
@@ -22,14 +29,13 @@ load_dotenv()
 class MemoryManager:
     def __init__(self):
         self.embedding_manager = EmbeddingManager()
-        self.CHROMA_DB = "nexus_memory_chroma_db"
+        self.vector_store = get_vector_store("memory")
         self.initialize_stores()
 
     def initialize_stores(self):
-        chroma_client = chromadb.PersistentClient(path=self.CHROMA_DB)
-        collections = chroma_client.list_collections()
-        for collection in collections:
-            self.add_memory_store(collection.name)
+        collections = self.vector_store.list_collections()
+        for name in collections:
+            self.add_memory_store(name)
 
     def add_memory_store(self, store_name):
         if store_name is None or store_name == "None":
@@ -43,68 +49,139 @@ class MemoryManager:
     def get_memory_embedding(self, text):
         return self.embedding_manager.get_embedding(text)
 
-    def query_memories(self, memory_store_name, input_text, n_results=5):
+    def get_memory_embeddings(self, texts):
+        return self.embedding_manager.get_embeddings(texts)
+
+    def query_memories(
+        self, memory_store_name, input_text, n_results=5, embedding=None
+    ):
         if memory_store_name is None or input_text is None:
             return None
 
-        chroma_client = chromadb.PersistentClient(path=self.CHROMA_DB)
-        collection = chroma_client.get_or_create_collection(name=memory_store_name)
-        embedding = self.get_memory_embedding(input_text)
+        collection = self.vector_store.get_collection(memory_store_name)
+        if embedding is None:
+            embedding = self.get_memory_embedding(input_text)
         docs = collection.query(
             query_embeddings=[embedding], n_results=n_results, include=["documents"]
         )
         return docs["documents"]
 
-    def apply_memory_RAG(
-        self, memory_store, memory_function, input_text, agent, n_results=5
+    def query_memories_fused(
+        self, memory_store_name, input_texts, n_results=5, with_scores=False
     ):
-        if memory_store is None or input_text is None:
-            return None
-
+        """
+        Queries a memory store with several texts in one multi-vector query and
+        returns the matching memories deduplicated and ranked by fused score.
+        With with_scores, returns (memory, score) pairs whose score is the
+        memory's reciprocal rank fusion score divided by the highest possible
+        one, so it lies in (0, 1] like other section scores and sorting by it
+        keeps the fused ranking.
+        """
+        if memory_store_name is None or not input_texts:
+            return []
+
+        collection = self.vector_store.get_collection(memory_store_name)
+        embeddings = self.get_memory_embeddings(input_texts)
+        results = collection.query(
+            query_embeddings=embeddings,
+            n_results=n_results,
+            include=["documents"],
+        )
+        documents = {}
+        for ids, docs in zip(results["ids"], results["documents"]):
+            documents.update(zip(ids, docs))
+        k = 60
+        fused = reciprocal_rank_fusion(results["ids"], k=k)
+        if with_scores:
+            # first in every ranking scores len(rankings) / (k + 1)
+            best = len(results["ids"]) / (k + 1)
+            return [(documents[id], score / best) for id, score in fused]
+        return [documents[id] for id, _ in fused]
+
+    def get_memory_section(
+        self,
+        memory_store,
+        memory_function,
+        input_text,
+        agent,
+        n_results=5,
+        embedding=None,
+    ):
+        """Returns the memories matching input_text as a scored ContextSection."""
         # basic form of memory
         if memory_store.memory_type == MemoryType.CONVERSATIONAL.value:
-            docs = self.query_memories(memory_store.name, input_text, n_results)
-
-            prompt = ""
-            if docs:
-                prompt += "\nUse the following memories to help answer the question:\n"
-                for i, doc in enumerate(docs):
-                    prompt += f"Memory {i+1}:\n{doc}\n"
-            return prompt
-        else:
-            # semantic form of memory
-            semantics = agent.get_semantic_response(
-                memory_function.augmentation_prompt, input_text
+            collection = self.vector_store.get_collection(memory_store.name)
+            if embedding is None:
+                embedding = self.get_memory_embedding(input_text)
+            docs = collection.query(
+                query_embeddings=[embedding],
+                n_results=n_results,
+                include=["documents", "distances"],
             )
-            semantics, code = extract_code(semantics)
-            if code:
-                semantics = code[0][1]
-            semantics = json.loads(semantics)
-            semantics = convert_keys_to_lowercase(semantics)
-            semantics = sum(
+            return ContextSection(
+                "memory",
+                "\nUse the following memories to help answer the question:\n",
                 [
-                    semantics[key.lower()]
-                    for key in memory_function.augmentation_keys.split(",")
+                    (doc, distance_to_score(distance))
+                    for doc, distance in zip(docs["documents"][0], docs["distances"][0])
                 ],
-                [],
+                label="Memory",
             )
 
-            memories = []
-            for semantic in semantics:
-                docs = self.query_memories(memory_store.name, semantic, n_results)
-                memories.extend(docs)
+        # semantic form of memory
+        semantics = run_coroutine(
+            agent.aget_semantic_response(
+                memory_function.augmentation_prompt, input_text
+            )
+        )
+        semantics, code = extract_code(semantics)
+        if code:
+            semantics = code[0][1]
+        semantics = json.loads(semantics)
+        semantics = convert_keys_to_lowercase(semantics)
+        semantics = sum(
+            [
+                semantics[key.lower()]
+                for key in memory_function.augmentation_keys.split(",")
+            ],
+            [],
+        )
 
-            prompt = f"\nThe following memories are specific to {memory_function.augmentation_keys} and may help provide additional context:\n"
-            for memory in memories:
-                prompt += f"Memory:\n{memory}\n"
+        memories = self.query_memories_fused(
+            memory_store.name,
+            [str(semantic) for semantic in semantics],
+            n_results,
+            with_scores=True,
+        )
+        return ContextSection(
+            "memory",
+            f"\nThe following memories are specific to {memory_function.augmentation_keys} and may help provide additional context:\n",
+            memories,
+            label="Memory",
+            numbered=False,
+        )
 
-            return prompt
+    def apply_memory_RAG(
+        self,
+        memory_store,
+        memory_function,
+        input_text,
+        agent,
+        n_results=5,
+        embedding=None,
+    ):
+        if memory_store is None or input_text is None:
+            return None
+
+        section = self.get_memory_section(
+            memory_store, memory_function, input_text, agent, n_results, embedding
+        )
+        return section.format([memory for memory, _ in section.passages])
 
     def get_memories(self, memory_store, include=["documents", "embeddings"]):
         if memory_store is None:
             return None
-        chroma_client = chromadb.PersistentClient(path=self.CHROMA_DB)
-        collection = chroma_client.get_or_create_collection(name=memory_store)
+        collection = self.vector_store.get_collection(memory_store)
         memories = collection.get(include=include)
         return memories
 
@@ -131,8 +208,7 @@ class MemoryManager:
         """
         if memory_store is None:
             return None
-        chroma_client = chromadb.PersistentClient(path=self.CHROMA_DB)
-        collection = chroma_client.get_or_create_collection(name=memory_store)
+        collection = self.vector_store.get_collection(memory_store)
         memories = collection.get(include=["documents"])
 
         df = pd.DataFrame({"ID Hash": memories["ids"], "Memory": memories["documents"]})
@@ -143,8 +219,7 @@ class MemoryManager:
     def delete_memory_store(self, memory_store):
         if memory_store is None:
             return False
-        chroma_client = chromadb.PersistentClient(path=self.CHROMA_DB)
-        chroma_client.delete_collection(memory_store)
+        self.vector_store.delete_collection(memory_store)
         return True
 
     def append_memory(
@@ -158,9 +233,6 @@ class MemoryManager:
         ):
             return False
 
-        chroma_client = chromadb.PersistentClient(path=self.CHROMA_DB)
-        collection = chroma_client.get_or_create_collection(name=memory_store.name)
-
         if llm_response is None:
             memory = f"""            
             {user_input}
@@ -174,8 +246,8 @@ class MemoryManager:
             """
 
         try:
-            memories = agent.get_semantic_response(
-                memory_function.function_prompt, memory
+            memories = run_coroutine(
+                agent.aget_semantic_response(memory_function.function_prompt, memory)
             )
             memories, code = extract_code(memories)
             if code:
@@ -190,12 +262,9 @@ class MemoryManager:
                 [],
             )
 
-            for memory in memories:
-                embedding = self.get_memory_embedding(memory)
-                id = id_hash(memory)
-                docs = collection.get(ids=[id], include=["documents"])["documents"]
-                if docs is None or len(docs) == 0:
-                    collection.add(embeddings=[embedding], documents=[memory], ids=[id])
+            # only embed memories that are not already in the store
+            with self.vector_store.writing(memory_store.name) as collection:
+                add_new_documents(collection, memories, self.get_memory_embeddings)
 
             return True
         except Exception as e:
@@ -203,46 +272,25 @@ class MemoryManager:
             return False
 
     def compress_memories(
-        self, memory_store, grouped_memories, memory_function, chat_agent
+        self,
+        memory_store,
+        grouped_memories,
+        memory_function,
+        chat_agent,
+        progress=None,
     ):
-        chroma_client = chromadb.PersistentClient(path=self.CHROMA_DB)
-        chroma_client.delete_collection(memory_store.name)
-        collection = chroma_client.get_or_create_collection(name=memory_store.name)
-
-        for key, items in grouped_memories.items():
-            try:
-                # 1. create a list of memories
-                items = "\n".join(items)
-
-                # 2. get the semantic response asking to summarize the memories
-                summarized_memories = chat_agent.get_semantic_response(
-                    memory_function.summarization_prompt, items
-                )
-
-                # 3. get the semantic response asking to extract new memories
-                memories = chat_agent.get_semantic_response(
-                    memory_function.function_prompt, summarized_memories
-                )
-                memories, code = extract_code(memories)
-                if code:
-                    memories = code[0][1]
-                memories = json.loads(memories)
-                memories = convert_keys_to_lowercase(memories)
-                memories = sum(
-                    [
-                        memories[key.lower()]
-                        for key in memory_function.function_keys.split(",")
-                    ],
-                    [],
-                )
-                # 4. add the new memories to the collection
-                for memory in memories:
-                    embedding = self.get_memory_embedding(memory)
-                    id = id_hash(memory)
-                    docs = collection.get(ids=[id], include=["documents"])["documents"]
-                    if docs is None or len(docs) == 0:
-                        collection.add(
-                            embeddings=[embedding], documents=[memory], ids=[id]
-                        )
-            except Exception as e:
-                print("Error compressing memories: ", e)
+        memories = compress_clusters(
+            chat_agent,
+            grouped_memories,
+            memory_function.summarization_prompt,
+            memory_function.function_prompt,
+            memory_function.function_keys,
+            progress=progress,
+        )
+        return compact_collection(
+            self.vector_store,
+            memory_store.name,
+            memories,
+            self.get_memory_embeddings,
+            compressed=sum(grouped_memories.values(), []),
+        )
@@ -0,0 +1,243 @@
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from peewee import fn
+
+from nexus.nexus_base.context_variables import tracking_id_context
+from nexus.nexus_base.nexus_models import MemoryIngestionJob
+
+
+def _atomic():
+    # on the table's database, which tests bind to their own
+    return MemoryIngestionJob._meta.database.atomic()
+
+
+def _utcnow():
+    # CURRENT_TIMESTAMP is stored in UTC
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class MemoryIngestionQueue:
+    """
+    Durable background queue for appending chat turns to memory stores.
+
+    Jobs are persisted in the MemoryIngestionJob table, so anything queued
+    but not yet processed is picked up again after a restart. A worker thread
+    claims adjacent pending turns for the same store and agent and extracts
+    memories from them with a single append. When more than max_pending jobs
+    are waiting, enqueue blocks for up to enqueue_timeout seconds and then
+    applies the turn on the caller's thread instead.
+
+    Each queue claims jobs under its own owner id with a lease, so several
+    processes can share the table; a running job is only taken over once its
+    lease has expired, which is how jobs of a crashed process are picked up.
+    A failed job is retried up to max_attempts times, waiting retry_delay
+    seconds longer after each attempt.
+    """
+
+    def __init__(
+        self,
+        nexus,
+        max_pending=100,
+        batch_size=4,
+        enqueue_timeout=5.0,
+        poll_interval=1.0,
+        retention=timedelta(days=1),
+        lease=timedelta(minutes=5),
+        max_attempts=3,
+        retry_delay=30.0,
+    ):
+        self.nexus = nexus
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.enqueue_timeout = enqueue_timeout
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.last_purge = 0.0
+        self.wakeup = threading.Event()
+        self.drained = threading.Condition()
+        self.stopped = threading.Event()
+        self.worker = threading.Thread(
+            target=self._run, name="nexus-memory-ingestion", daemon=True
+        )
+        self.worker.start()
+
+    def pending_count(self):
+        return (
+            MemoryIngestionJob.select()
+            .where(MemoryIngestionJob.status.in_(["pending", "running"]))
+            .count()
+        )
+
+    def enqueue(self, memory_store, user_input, llm_response, agent):
+        deadline = time.monotonic() + self.enqueue_timeout
+        with self.drained:
+            while self.pending_count() >= self.max_pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    print("Memory ingestion queue is full, appending inline.")
+                    self.nexus.append_memory_sync(
+                        memory_store, user_input, llm_response, agent
+                    )
+                    return None
+                self.drained.wait(remaining)
+
+        with _atomic():
+            job = MemoryIngestionJob.create(
+                store=memory_store,
+                agent=agent.name,
+                user_input=user_input,
+                llm_response=llm_response,
+                tracking_id=tracking_id_context.get(None),
+            )
+        self.wakeup.set()
+        return job.id
+
+    def get_status(self, job_id=None):
+        """Returns the status of one job, or the number of jobs in each state."""
+        if job_id is not None:
+            job = MemoryIngestionJob.get_or_none(MemoryIngestionJob.id == job_id)
+            return job.to_dict() if job else None
+        counts = {"pending": 0, "running": 0, "done": 0, "failed": 0}
+        query = MemoryIngestionJob.select(
+            MemoryIngestionJob.status, fn.COUNT(MemoryIngestionJob.id).alias("count")
+        ).group_by(MemoryIngestionJob.status)
+        for row in query:
+            counts[row.status] = row.count
+        return counts
+
+    def _claimable(self, now):
+        # pending and not waiting for a retry, or running on an expired lease
+        expired = MemoryIngestionJob.lease_expires <= now
+        return (
+            (MemoryIngestionJob.status == "pending")
+            & (MemoryIngestionJob.lease_expires.is_null() | expired)
+        ) | ((MemoryIngestionJob.status == "running") & expired)
+
+    def _claim_batch(self):
+        now = _utcnow()
+        first = (
+            MemoryIngestionJob.select()
+            .where(self._claimable(now))
+            .order_by(MemoryIngestionJob.id)
+            .first()
+        )
+        if first is None:
+            return []
+        candidates = (
+            MemoryIngestionJob.select()
+            .where(
+                self._claimable(now)
+                & (MemoryIngestionJob.store == first.store)
+                & (MemoryIngestionJob.agent == first.agent)
+            )
+            .order_by(MemoryIngestionJob.id)
+            .limit(self.batch_size)
+        )
+        claimed = []
+        with _atomic():
+            for job in candidates:
+                # another process may have claimed the job in the meantime
+                updated = (
+                    MemoryIngestionJob.update(
+                        status="running",
+                        owner=self.owner,
+                        lease_expires=now + self.lease,
+                        attempts=MemoryIngestionJob.attempts + 1,
+                    )
+                    .where(
+                        (MemoryIngestionJob.id == job.id)
+                        & (MemoryIngestionJob.status == job.status)
+                        & (MemoryIngestionJob.owner == job.owner)
+                        & (MemoryIngestionJob.attempts == job.attempts)
+                    )
+                    .execute()
+                )
+                if updated:
+                    job.attempts += 1
+                    claimed.append(job)
+        return claimed
+
+    def _process(self, jobs):
+        turns = []
+        for job in jobs:
+            if job.llm_response is None:
+                turns.append(job.user_input)
+            else:
+                turns.append(f"user:\n{job.user_input}\nassistant:\n{job.llm_response}")
+        # usage is recorded against the chat turn that queued the job
+        token = tracking_id_context.set(jobs[0].tracking_id or "Not Set")
+        try:
+            agent = self.nexus.agent_manager.get_agent(jobs[0].agent)
+            if agent is None:
+                raise ValueError(f"Agent '{jobs[0].agent}' not found.")
+            if not self.nexus.append_memory_sync(
+                jobs[0].store, "\n\n".join(turns), None, agent
+            ):
+                raise ValueError("Memory extraction failed.")
+        except Exception as e:
+            print(f"Error ingesting memory for {jobs[0].store}: {e}")
+            self._fail(jobs, str(e))
+        else:
+            self._finish(jobs, status="done", error=None, lease_expires=None)
+        finally:
+            tracking_id_context.reset(token)
+
+    def _fail(self, jobs, error):
+        retry = [job for job in jobs if job.attempts < self.max_attempts]
+        failed = [job for job in jobs if job.attempts >= self.max_attempts]
+        for job in retry:
+            delay = timedelta(seconds=self.retry_delay * job.attempts)
+            self._finish(
+                [job], status="pending", error=error, lease_expires=_utcnow() + delay
+            )
+        if failed:
+            self._finish(failed, status="failed", error=error, lease_expires=None)
+
+    def _finish(self, jobs, **fields):
+        # only while the lease is still ours, another queue may have taken over
+        with _atomic():
+            MemoryIngestionJob.update(owner=None, **fields).where(
+                MemoryIngestionJob.id.in_([job.id for job in jobs])
+                & (MemoryIngestionJob.owner == self.owner)
+                & (MemoryIngestionJob.status == "running")
+            ).execute()
+
+    def _purge(self):
+        if time.monotonic() - self.last_purge < 600:
+            return
+        self.last_purge = time.monotonic()
+        cutoff = _utcnow() - self.retention
+        with _atomic():
+            MemoryIngestionJob.delete().where(
+                (MemoryIngestionJob.status == "done")
+                & (MemoryIngestionJob.timestamp < cutoff)
+            ).execute()
+
+    def stop(self):
+        self.stopped.set()
+        self.wakeup.set()
+        self.worker.join(timeout=5)
+
+    def _run(self):
+        while not self.stopped.is_set():
+            try:
+                jobs = self._claim_batch()
+                if jobs:
+                    self._process(jobs)
+                    with self.drained:
+                        self.drained.notify_all()
+                    continue
+                self._purge()
+            except Exception as e:
+                print(f"Error in memory ingestion worker: {e}")
+            self.wakeup.wait(self.poll_interval)
+            self.wakeup.clear()
@@ -1,3 +1,8 @@
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from datetime import datetime
 
 from peewee import *
@@ -5,12 +10,22 @@ from peewee import *
 from nexus.nexus_base.action_manager import ActionManager
 from nexus.nexus_base.agent_manager import AgentManager
 from nexus.nexus_base.assistants_manager import AssistantsManager
+from nexus.nexus_base.chat_history import read_messages
+from nexus.nexus_base.clustering_manager import ClusteringManager
+from nexus.nexus_base.compaction import CompactionManager
+from nexus.nexus_base.context_assembler import (
+    RAG_CONTEXT_SHARE,
+    ContextAssembler,
+    get_context_budget,
+    get_token_counter,
+)
 from nexus.nexus_base.context_variables import (
     tracking_function_context,
     tracking_id_context,
 )
 from nexus.nexus_base.knowledge_manager import KnowledgeManager
 from nexus.nexus_base.memory_manager import MemoryManager
+from nexus.nexus_base.memory_queue import MemoryIngestionQueue
 from nexus.nexus_base.nexus_models import (
     ChatParticipants,
     Document,
@@ -27,6 +42,13 @@ from nexus.nexus_base.profile_manager import ProfileManager
 from nexus.nexus_base.thought_template_manager import ThoughtTemplateManager
 from nexus.nexus_base.tracking_manager import TrackingManager
 
+# seconds each augmentation stage may take before it is left out of the prompt
+RAG_STAGE_TIMEOUTS = {"knowledge": 10, "memory": 30}
+# calls of one stage that may run at once; a stage whose earlier calls are
+# still running past their timeout is skipped, so a hung backend can't take
+# over rag_executor
+RAG_STAGE_CONCURRENCY = 2
+
 
 class Nexus:
     def __init__(self):
@@ -45,9 +67,20 @@ class Nexus:
 
         self.knowledge_manager = KnowledgeManager()
         self.memory_manager = MemoryManager()
+        self.memory_queue = MemoryIngestionQueue(self)
+        self.compaction_manager = CompactionManager(self)
+        self.clustering_manager = ClusteringManager()
 
         self.thought_template_manager = ThoughtTemplateManager(self)
 
+        self.rag_executor = ThreadPoolExecutor(
+            max_workers=8, thread_name_prefix="nexus-rag"
+        )
+        self.rag_stage_slots = {
+            name: threading.BoundedSemaphore(RAG_STAGE_CONCURRENCY)
+            for name in RAG_STAGE_TIMEOUTS
+        }
+
     def set_tracking_id(self, tracking_id):
         tracking_id_context.set(tracking_id)
 
@@ -249,21 +282,23 @@ class Nexus:
                 role=role,
                 timestamp=datetime.now(),
             )
-            subscribers = Subscriber.select().where(Subscriber.thread == thread_id)
-            for subscriber in subscribers:
-                if subscriber.participant.user_id != participant_id:
-                    Notification.create(
-                        participant=subscriber.participant,
-                        thread=thread_id,
-                        message=message,
-                    )
-
-    def read_messages(self, thread_id):
-        return (
-            Message.select()
-            .where(Message.thread == thread_id)
-            .order_by(Message.timestamp.asc())
-        )
+            subscribers = Subscriber.select(Subscriber.participant).where(
+                Subscriber.thread == thread_id,
+                Subscriber.participant != participant_id,
+            )
+            notifications = [
+                {
+                    "participant": participant,
+                    "thread": thread_id,
+                    "message": message,
+                }
+                for (participant,) in subscribers.tuples()
+            ]
+            if notifications:
+                Notification.insert_many(notifications).execute()
+
+    def read_messages(self, thread_id, before=None, limit=None):
+        return read_messages(thread_id, before=before, limit=limit)
 
     def get_user_notifications(self, participant_id):
         return Notification.select().where(Notification.participant == participant_id)
@@ -383,7 +418,7 @@ class Nexus:
         with db.atomic():
             try:
                 store = KnowledgeStore.get(KnowledgeStore.name == store_name)
-                Document.create(store=store, name=document_name)
+                Document.get_or_create(store=store, name=document_name)
                 return True
             except KnowledgeStore.DoesNotExist:
                 return False  # Store does not exist
@@ -391,16 +426,13 @@ class Nexus:
             #     return False  # Document with the same name already exists in the store
 
     def delete_document_from_store(self, store_name, document_name):
-        """Delete a document from a knowledge store."""
-        with db.atomic():
-            try:
-                store = KnowledgeStore.get(KnowledgeStore.name == store_name)
-                query = Document.delete().where(
-                    (Document.store == store) & (Document.name == document_name)
-                )
-                return query.execute()  # Returns the number of rows deleted
-            except KnowledgeStore.DoesNotExist:
-                return False  # Store does not exist
+        """Delete a document and its vectors from a knowledge store."""
+        try:
+            store = KnowledgeStore.get(KnowledgeStore.name == store_name)
+            # Returns the number of rows deleted
+            return self.knowledge_manager.delete_document(store, document_name)
+        except KnowledgeStore.DoesNotExist:
+            return False  # Store does not exist
 
     def get_knowledge_store_names(self):
         return [store.name for store in KnowledgeStore.select()]
@@ -421,18 +453,121 @@ class Nexus:
     def get_documents(self, knowledge_store, include=["documents", "embeddings"]):
         return self.knowledge_manager.get_documents(knowledge_store, include)
 
-    def load_document(self, knowledge_store, uploaded_file):
+    def load_document(self, knowledge_store, uploaded_file, progress=None):
         knowledge_store = KnowledgeStore.get(KnowledgeStore.name == knowledge_store)
-        return self.knowledge_manager.load_document(knowledge_store, uploaded_file)
+        return self.knowledge_manager.load_document(
+            knowledge_store, uploaded_file, progress
+        )
+
+    def load_documents(self, knowledge_store, files, progress=None):
+        """Bulk loads uploads or file paths into a knowledge store."""
+        store = KnowledgeStore.get(KnowledgeStore.name == knowledge_store)
+        return self.knowledge_manager.load_documents(store, files, progress)
 
     def examine_documents(self, knowledge_store):
         return self.knowledge_manager.examine_documents(knowledge_store)
 
-    def apply_knowledge_RAG(self, knowledge_store, input_text, n_results=5):
+    def get_embedding_clusters(self, store_name, store_type="memory"):
+        """Returns the cached clustering of a memory or knowledge store."""
+        if store_name is None:
+            return None
+        if store_type == "knowledge":
+            vector_store = self.knowledge_manager.vector_store
+        elif store_type == "memory":
+            vector_store = self.memory_manager.vector_store
+        else:
+            raise ValueError(f"Invalid store type '{store_type}'.")
+        return self.clustering_manager.get_clusters(
+            f"{store_type}:{store_name}", vector_store.get_collection(store_name)
+        )
+
+    def apply_knowledge_RAG(
+        self, knowledge_store, input_text, n_results=5, embedding=None
+    ):
         return self.knowledge_manager.apply_knowledge_RAG(
-            knowledge_store, input_text, n_results
+            knowledge_store, input_text, n_results, embedding
         )
 
+    def get_knowledge_section(
+        self, knowledge_store, input_text, n_results=5, embedding=None
+    ):
+        return self.knowledge_manager.get_knowledge_section(
+            knowledge_store, input_text, n_results, embedding
+        )
+
+    def build_augmented_context(self, user_input, agent, timeouts=None):
+        """
+        Builds the knowledge and memory augmentation for a chat turn.
+
+        The query is embedded once and the knowledge and memory lookups run
+        concurrently, so the turn waits for the slowest lookup rather than the
+        sum of them. A stage that exceeds its timeout is left out, and so is
+        a stage with RAG_STAGE_CONCURRENCY calls still running. The
+        passages found are packed by relevance into the agent's share of its
+        context budget, and the tokens each section used are recorded in
+        agent.context_usage.
+        """
+        timeouts = {**RAG_STAGE_TIMEOUTS, **(timeouts or {})}
+        knowledge_store = getattr(agent, "knowledge_store", None)
+        memory_store = getattr(agent, "memory_store", None)
+        stages = {}
+        if knowledge_store is not None and knowledge_store != "None":
+            stages["knowledge"] = lambda embedding: self.get_knowledge_section(
+                knowledge_store, user_input, embedding=embedding
+            )
+        if memory_store is not None and memory_store != "None":
+            stages["memory"] = lambda embedding: self.get_memory_section(
+                memory_store, user_input, agent, embedding=embedding
+            )
+        if not stages or user_input is None:
+            return ""
+
+        embedding = self.knowledge_manager.get_document_embedding(user_input)
+        start = time.monotonic()
+        futures = {}
+        for name, stage in stages.items():
+            slots = self.rag_stage_slots[name]
+            if not slots.acquire(blocking=False):
+                print(f"{name} augmentation skipped, earlier lookups still running")
+                continue
+            futures[name] = self.rag_executor.submit(
+                contextvars.copy_context().run,
+                self._run_rag_stage,
+                stage,
+                embedding,
+                slots,
+            )
+
+        sections = []
+        for name, future in futures.items():
+            remaining = max(0, start + timeouts[name] - time.monotonic())
+            try:
+                section = future.result(timeout=remaining)
+                if section is not None:
+                    sections.append(section)
+            except FutureTimeoutError:
+                print(f"{name} augmentation timed out after {timeouts[name]}s")
+            except Exception as e:
+                print(f"Error applying {name} augmentation: {e}")
+
+        counter = get_token_counter(getattr(agent, "model", None))
+        budget = int(get_context_budget(agent) * RAG_CONTEXT_SHARE)
+        budget = max(0, budget - counter.count(user_input))
+        context, usage = ContextAssembler(counter).pack(sections, budget)
+        agent.context_usage = {
+            **getattr(agent, "context_usage", {}),
+            "knowledge": 0,
+            "memory": 0,
+            **usage,
+        }
+        return context
+
+    def _run_rag_stage(self, stage, embedding, slots):
+        try:
+            return stage(embedding)
+        finally:
+            slots.release()
+
     def add_memory_store(self, store_name):
         """Add a new memory store."""
         return self.memory_manager.add_memory_store(store_name)
@@ -464,18 +599,33 @@ class Nexus:
     def examine_memories(self, memory_store):
         return self.memory_manager.examine_memories(memory_store)
 
-    def apply_memory_RAG(self, memory_store, input_text, agent, n_results=5):
+    def apply_memory_RAG(
+        self, memory_store, input_text, agent, n_results=5, embedding=None
+    ):
         if memory_store is None or memory_store == "None" or input_text is None:
             return ""
         memory_store = MemoryStore.get(MemoryStore.name == memory_store)
         memory_function = self.get_memory_function(memory_store.memory_type)
         self.set_tracking_function("memory:augment")
         result = self.memory_manager.apply_memory_RAG(
-            memory_store, memory_function, input_text, agent, n_results
+            memory_store, memory_function, input_text, agent, n_results, embedding
         )
         self.set_tracking_function("Not Set")
         return result
 
+    def get_memory_section(
+        self, memory_store, input_text, agent, n_results=5, embedding=None
+    ):
+        memory_store = MemoryStore.get(MemoryStore.name == memory_store)
+        memory_function = self.get_memory_function(memory_store.memory_type)
+        self.set_tracking_function("memory:augment")
+        try:
+            return self.memory_manager.get_memory_section(
+                memory_store, memory_function, input_text, agent, n_results, embedding
+            )
+        finally:
+            self.set_tracking_function("Not Set")
+
     def get_memory_store(self, memory_store):
         return MemoryStore.select().where(MemoryStore.name == memory_store).first()
 
@@ -496,6 +646,15 @@ class Nexus:
             return True
 
     def append_memory(self, memory_store, user_input, llm_response, agent):
+        """Queues a chat turn for memory extraction and returns the job id."""
+        if memory_store is None or user_input is None:
+            return None
+        return self.memory_queue.enqueue(memory_store, user_input, llm_response, agent)
+
+    def get_memory_ingestion_status(self, job_id=None):
+        return self.memory_queue.get_status(job_id)
+
+    def append_memory_sync(self, memory_store, user_input, llm_response, agent):
         if memory_store is None or user_input is None:
             return None
         memory_store = MemoryStore.get(MemoryStore.name == memory_store)
@@ -510,28 +669,66 @@ class Nexus:
     def get_memory_function(self, memory_type):
         return MemoryFunction.get(MemoryFunction.memory_type == memory_type)
 
+    def run_compaction(
+        self, store_type, store_name, grouped_items, chat_agent, progress=None
+    ):
+        """
+        Compresses a memory or knowledge store in place. Raises on failure,
+        leaving the store unchanged. Returns the item counts before and after.
+        """
+        self.set_tracking_function(f"{store_type}:compress")
+        try:
+            if store_type == "memory":
+                memory_store = MemoryStore.get(MemoryStore.name == store_name)
+                return self.memory_manager.compress_memories(
+                    memory_store,
+                    grouped_items,
+                    self.get_memory_function(memory_store.memory_type),
+                    chat_agent,
+                    progress,
+                )
+            if store_type == "knowledge":
+                return self.knowledge_manager.compress_knowledge(
+                    KnowledgeStore.get(KnowledgeStore.name == store_name),
+                    grouped_items,
+                    chat_agent,
+                    progress,
+                )
+            raise ValueError(f"Invalid store type '{store_type}'.")
+        finally:
+            self.set_tracking_function("Not Set")
+
+    def start_compaction(self, store_type, store_name, grouped_items, chat_agent):
+        if store_name is None or grouped_items is None:
+            return None
+        return self.compaction_manager.start(
+            store_type, store_name, grouped_items, chat_agent
+        )
+
+    def get_compaction_status(self, job_id=None):
+        return self.compaction_manager.get_status(job_id)
+
     def compress_memories(self, memory_store, grouped_memories, chat_agent):
         if memory_store is None or grouped_memories is None:
             return None
-        memory_store = MemoryStore.get(MemoryStore.name == memory_store)
-        memory_function = self.get_memory_function(memory_store.memory_type)
-        self.set_tracking_function("memory:compress")
-        result = self.memory_manager.compress_memories(
-            memory_store, grouped_memories, memory_function, chat_agent
-        )
-        self.set_tracking_function("Not Set")
-        return result
+        try:
+            return self.run_compaction(
+                "memory", memory_store, grouped_memories, chat_agent
+            )
+        except Exception as e:
+            print("Error compressing memories: ", e)
+            return None
 
     def compress_knowledge(self, knowledge_store, grouped_documents, chat_agent):
         if knowledge_store is None or grouped_documents is None:
             return None
-        knowledge_store = KnowledgeStore.get(KnowledgeStore.name == knowledge_store)
-        self.set_tracking_function("knowledge:compress")
-        result = self.knowledge_manager.compress_knowledge(
-            knowledge_store, grouped_documents, chat_agent
-        )
-        self.set_tracking_function("Not Set")
-        return result
+        try:
+            return self.run_compaction(
+                "knowledge", knowledge_store, grouped_documents, chat_agent
+            )
+        except Exception as e:
+            print("Error compressing documents: ", e)
+            return None
 
     def get_tracking_usage(self):
         return self.tracking_manager.get_tracking_usage()
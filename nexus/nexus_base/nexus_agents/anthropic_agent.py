@@ -1,9 +1,9 @@
 import os
 
-from anthropic import Anthropic
 from dotenv import load_dotenv
 
 from nexus.nexus_base.agent_manager import BaseAgent
+from nexus.nexus_base.http_clients import create_client
 from nexus.nexus_base.nexus_models import Message
 
 load_dotenv()  # loading and setting the api key can be done in one step
@@ -20,10 +20,9 @@ class AnthropicAgent(BaseAgent):
         super().__init__(chat_history)
         self.last_message = ""
         self._chat_history = chat_history
-        api_key = os.getenv("ANTHROPIC_API_KEY")
-        if not api_key:
-            raise ValueError("ANTHROPIC_API_KEY is not set.")
-        self.client = Anthropic()
+        self.check_config()
+        self.client = create_client("anthropic")
+        self.async_client = create_client("anthropic", asynchronous=True)
         self.model = "claude-3-opus-20240229"
         self.max_tokens = 1024
         self.temperature = 0.7
@@ -64,6 +63,11 @@ class AnthropicAgent(BaseAgent):
             },
         )
 
+    @classmethod
+    def check_config(cls):
+        if not os.getenv("ANTHROPIC_API_KEY"):
+            raise ValueError("ANTHROPIC_API_KEY is not set.")
+
     async def get_response(self, user_input, thread_id=None):
         return None
 
@@ -86,10 +90,11 @@ class AnthropicAgent(BaseAgent):
 
         stream = self.client.messages.create(
             max_tokens=self.max_tokens,
-            messages=self.messages,
+            # Anthropic takes the system prompt, and the history summary, apart
+            messages=self.get_context_messages(include_summary=False),
             model=self.model,
             temperature=self.temperature,
-            system=self.system,
+            system="\n\n".join(filter(None, [self.system, self.get_history_summary()])),
             stream=True,
         )
 
@@ -103,6 +108,41 @@ class AnthropicAgent(BaseAgent):
 
         return generate_responses
 
+    async def aget_semantic_response(self, system, user):
+        messages = [
+            {"role": "user", "content": user},
+        ]
+        response = await self.async_client.messages.create(
+            max_tokens=self.max_tokens,
+            messages=messages,
+            model=self.model,
+            temperature=self.temperature,
+            system=system,
+        )
+        return str(response.content[0].text)
+
+    def aget_response_stream(self, user_input, thread_id=None):
+        self.last_message = ""
+        self.messages += [{"role": "user", "content": user_input}]
+
+        async def generate_responses():
+            stream = await self.async_client.messages.create(
+                max_tokens=self.max_tokens,
+                messages=self.get_context_messages(include_summary=False),
+                model=self.model,
+                temperature=self.temperature,
+                system="\n\n".join(
+                    filter(None, [self.system, self.get_history_summary()])
+                ),
+                stream=True,
+            )
+            async for event in stream:
+                if event.type == "content_block_delta":
+                    self.last_message += event.delta.text
+                    yield event.delta.text
+
+        return generate_responses
+
     def append_message(self, message: Message):
         if message.role == "agent":
             message.role = "assistant"
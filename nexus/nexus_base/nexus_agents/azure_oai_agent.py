@@ -1,15 +1,28 @@
-import json
+import asyncio
 import os
 
 from dotenv import load_dotenv
-from openai import AzureOpenAI
 
+from nexus.nexus_base.action_manager import run_tool_calls
 from nexus.nexus_base.agent_manager import BaseAgent
+from nexus.nexus_base.http_clients import create_client
 from nexus.nexus_base.nexus_models import Message
+from nexus.nexus_base.openai_streaming import (
+    AsyncChatCompletionStream,
+    ChatCompletionStream,
+)
 
 load_dotenv()  # loading and setting the api key can be done in one step
 
 
+def azure_settings():
+    return dict(
+        api_key=os.getenv("AZURE_OPENAI_API_KEY"),
+        api_version=os.getenv("AZURE_OPENAI_API_VERSION"),
+        azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
+    )
+
+
 class AzureOpenAIAgent(BaseAgent):
     _supports_actions = True
     _supports_knowledge = True
@@ -19,18 +32,16 @@ class AzureOpenAIAgent(BaseAgent):
         super().__init__(chat_history)
         self.last_message = ""
         self._chat_history = chat_history
-        self.client = AzureOpenAI(
-            api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-            api_version=os.getenv("AZURE_OPENAI_API_VERSION"),
-            azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
-        )
-        self.client.models.list()
+        settings = azure_settings()
+        self.client = create_client("azure", **settings)
+        self.async_client = create_client("azure", asynchronous=True, **settings)
         self.model = "gpt-4-v0613"
 
         self.max_tokens = 1024
         self.temperature = 0.7
         self.messages = []  # history of messages
         self.tools = []
+        self.max_tool_rounds = int(os.getenv("NEXUS_TOOL_ROUNDS", 5))
 
         self.add_attribute_options(
             "model",
@@ -55,6 +66,16 @@ class AzureOpenAIAgent(BaseAgent):
                 "step": 0.1,
             },
         )
+        self.add_attribute_options(
+            "max_tool_rounds",
+            {
+                "type": "numeric",
+                "default": self.max_tool_rounds,
+                "min": 1,
+                "max": 10,
+                "step": 1,
+            },
+        )
         self.add_attribute_options(
             "max_tokens",
             {
@@ -70,12 +91,21 @@ class AzureOpenAIAgent(BaseAgent):
         self.messages += [{"role": "user", "content": user_input}]
         response = self.client.chat.completions.create(
             model=self.model,
-            messages=self.messages,
+            messages=self.get_context_messages(),
             temperature=self.temperature,
         )
         self.last_message = str(response)
         return str(response)
 
+    @classmethod
+    def check_config(cls):
+        create_client("azure", **azure_settings())
+
+    @classmethod
+    def check_health(cls):
+        # a throwaway client on the shared connections, not a tracked agent
+        create_client("azure", **azure_settings()).models.list()
+
     def get_semantic_response(self, system, user):
         messages = [
             {"role": "system", "content": system},
@@ -91,64 +121,78 @@ class AzureOpenAIAgent(BaseAgent):
     def get_response_stream(self, user_input, thread_id=None):
         self.last_message = ""
         self.messages += [{"role": "user", "content": user_input}]
-        if self.tools and len(self.tools) > 0:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=self.messages,
-                temperature=self.temperature,
-                tools=self.tools,
-                tool_choice="auto",  # auto is default, but we'll be explicit
-            )
-        else:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=self.messages,
-                temperature=self.temperature,
-                max_tokens=self.max_tokens,
-            )
-        response_message = response.choices[0].message
-        tool_calls = response_message.tool_calls
-        # Step 2: check if the model wanted to call a function
-        if tool_calls:
-            # Step 3: call the function
-            # Note: the JSON response may not always be valid; be sure to handle errors
-            available_functions = {
-                action["name"]: action["pointer"] for action in self.actions
-            }
-            self.messages.append(
-                response_message
-            )  # extend conversation with assistant's reply
-            # Step 4: send the info for each function call and function response to the model
-            for tool_call in tool_calls:
-                function_name = tool_call.function.name
-                function_to_call = available_functions[function_name]
-                function_args = json.loads(tool_call.function.arguments)
-                function_response = function_to_call(
-                    **function_args, _caller_agent=self
-                )
-
-                self.messages.append(
-                    {
-                        "tool_call_id": tool_call.id,
-                        "role": "tool",
-                        "name": function_name,
-                        "content": str(function_response),
-                    }
-                )  # extend conversation with function response
-            second_response = self.client.chat.completions.create(
-                model=self.model,
-                messages=self.messages,
-                temperature=self.temperature,
-                max_tokens=self.max_tokens,
-            )  # get a new response from the model where it can see the function response
-            response_message = second_response.choices[0].message
-
-        self.last_message = str(response_message.content)
 
         def generate_responses():
-            response = self.last_message
-            for character in response:
-                yield character
+            for depth in range(int(self.max_tool_rounds) + 1):
+                tools = {}
+                # the last round gets no tools, so the model has to answer
+                if self.tools and len(self.tools) > 0 and depth < self.max_tool_rounds:
+                    # auto is default, but we'll be explicit
+                    tools = {"tools": self.tools, "tool_choice": "auto"}
+                stream = self.stream_completion(**tools)
+                for text in stream:
+                    self.last_message += text
+                    yield text
+
+                # check if the model wanted to call a function
+                if not stream.tool_calls:
+                    break
+                # extend conversation with the assistant's reply and the results
+                self.messages.append(stream.message)
+                self.messages += run_tool_calls(stream.tool_calls, self.actions, self)
+
+        return generate_responses
+
+    def stream_completion(self, **kwargs):
+        return ChatCompletionStream(
+            self.client,
+            model=self.model,
+            messages=self.get_context_messages(),
+            temperature=self.temperature,
+            max_tokens=self.max_tokens,
+            **kwargs,
+        )
+
+    async def aget_semantic_response(self, system, user):
+        messages = [
+            {"role": "system", "content": system},
+            {"role": "user", "content": user},
+        ]
+        response = await self.async_client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=self.temperature,
+        )
+        return str(response.choices[0].message.content)
+
+    def aget_response_stream(self, user_input, thread_id=None):
+        self.last_message = ""
+        self.messages += [{"role": "user", "content": user_input}]
+
+        async def generate_responses():
+            for depth in range(int(self.max_tool_rounds) + 1):
+                tools = {}
+                if self.tools and len(self.tools) > 0 and depth < self.max_tool_rounds:
+                    tools = {"tools": self.tools, "tool_choice": "auto"}
+                stream = AsyncChatCompletionStream(
+                    self.async_client,
+                    model=self.model,
+                    messages=self.get_context_messages(),
+                    temperature=self.temperature,
+                    max_tokens=self.max_tokens,
+                    **tools,
+                )
+                async for text in stream:
+                    self.last_message += text
+                    yield text
+
+                if not stream.tool_calls:
+                    break
+                self.messages.append(stream.message)
+                # actions are synchronous, so they run off the event loop
+                self.messages += await asyncio.to_thread(
+                    run_tool_calls, stream.tool_calls, self.actions, self
+                )
 
         return generate_responses
 
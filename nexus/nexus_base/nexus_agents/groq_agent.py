@@ -1,10 +1,11 @@
 import os
 
 from dotenv import load_dotenv
-from groq import Groq
 
 from nexus.nexus_base.agent_manager import BaseAgent
+from nexus.nexus_base.http_clients import create_client
 from nexus.nexus_base.nexus_models import Message
+from nexus.nexus_base.openai_streaming import AsyncChatCompletionStream
 
 load_dotenv()  # loading and setting the api key can be done in one step
 
@@ -18,8 +19,10 @@ class GroqAgent(BaseAgent):
         super().__init__(chat_history)
         self.last_message = ""
         self._chat_history = chat_history
-        self.client = Groq(api_key=os.getenv("GROQ_API_KEY"))
-        self.client.models.list()
+        self.client = create_client("groq", api_key=os.getenv("GROQ_API_KEY"))
+        self.async_client = create_client(
+            "groq", asynchronous=True, api_key=os.getenv("GROQ_API_KEY")
+        )
         self.model = "mixtral-8x7b-32768"
 
         self.max_tokens = 1024
@@ -64,12 +67,21 @@ class GroqAgent(BaseAgent):
         self.messages += [{"role": "user", "content": user_input}]
         response = self.client.chat.completions.create(
             model=self.model,
-            messages=self.messages,
+            messages=self.get_context_messages(),
             temperature=self.temperature,
         )
         self.last_message = str(response)
         return str(response)
 
+    @classmethod
+    def check_config(cls):
+        create_client("groq", api_key=os.getenv("GROQ_API_KEY"))
+
+    @classmethod
+    def check_health(cls):
+        # a throwaway client on the shared connections, not a tracked agent
+        create_client("groq", api_key=os.getenv("GROQ_API_KEY")).models.list()
+
     def get_semantic_response(self, system, user):
         messages = [
             {"role": "system", "content": system},
@@ -88,7 +100,7 @@ class GroqAgent(BaseAgent):
         self.messages += [{"role": "user", "content": user_input}]
         response = self.client.chat.completions.create(
             model=self.model,
-            messages=self.messages,
+            messages=self.get_context_messages(),
             temperature=self.temperature,
         )
         response_message = response.choices[0].message
@@ -101,6 +113,35 @@ class GroqAgent(BaseAgent):
 
         return generate_responses
 
+    async def aget_semantic_response(self, system, user):
+        messages = [
+            {"role": "system", "content": system},
+            {"role": "user", "content": user},
+        ]
+        response = await self.async_client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=self.temperature,
+        )
+        return str(response.choices[0].message.content)
+
+    def aget_response_stream(self, user_input, thread_id=None):
+        self.last_message = ""
+        self.messages += [{"role": "user", "content": user_input}]
+
+        async def generate_responses():
+            stream = AsyncChatCompletionStream(
+                self.async_client,
+                model=self.model,
+                messages=self.get_context_messages(),
+                temperature=self.temperature,
+            )
+            async for text in stream:
+                self.last_message += text
+                yield text
+
+        return generate_responses
+
     def append_message(self, message: Message):
         if message.role == "agent":
             self.messages.append(dict(role="assistant", content=message.content))
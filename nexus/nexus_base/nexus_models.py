@@ -3,16 +3,21 @@ from enum import Enum
 
 from peewee import (
     SQL,
+    BigIntegerField,
+    BooleanField,
     CharField,
     DateTimeField,
+    FloatField,
     ForeignKeyField,
     IntegerField,
     Model,
-    SqliteDatabase,
     TextField,
 )
+from playhouse.migrate import SchemaMigrator, migrate
 
-db = SqliteDatabase("nexus.db")
+from nexus.nexus_base.database import create_database
+
+db = create_database()
 
 
 class BaseModel(Model):
@@ -28,7 +33,11 @@ class AgentEngineUsage(BaseModel):
     model = CharField()
     in_tokens = IntegerField()
     out_tokens = IntegerField()
-    elapsed_time = IntegerField()
+    elapsed_time = IntegerField()  # whole seconds, kept for older readers
+    elapsed_ns = BigIntegerField(default=0)
+    ttft_ns = BigIntegerField(null=True)  # time to first token, streams only
+    tokens_per_second = FloatField(null=True)
+    chunks = IntegerField(default=0)
     timestamp = DateTimeField(constraints=[SQL("DEFAULT CURRENT_TIMESTAMP")])
 
     def to_dict(self):
@@ -40,6 +49,10 @@ class AgentEngineUsage(BaseModel):
             "in_tokens": self.in_tokens,
             "out_tokens": self.out_tokens,
             "elapsed_time": self.elapsed_time,
+            "elapsed_ns": self.elapsed_ns,
+            "ttft_ns": self.ttft_ns,
+            "tokens_per_second": self.tokens_per_second,
+            "chunks": self.chunks,
             "timestamp": self.timestamp.strftime("%Y-%m-%d %H:%M:%S"),
         }
 
@@ -94,13 +107,17 @@ class Message(BaseModel):
 
     def to_dict(self):
         return {
-            "thread_id": self.thread.thread_id,
+            "thread_id": self.thread_id,
             "author": self.author.username,
             "role": self.role,
             "content": self.content,
             "timestamp": self.timestamp.strftime("%Y-%m-%d %H:%M:%S"),
         }
 
+    class Meta:
+        # serves the keyset pages of read_messages
+        indexes = ((("thread", "timestamp"), False),)
+
 
 class Subscriber(BaseModel):
     participant = ForeignKeyField(ChatParticipants, backref="subscriptions")
@@ -114,6 +131,9 @@ class Notification(BaseModel):
     message = ForeignKeyField(Message)
     timestamp = DateTimeField(constraints=[SQL("DEFAULT CURRENT_TIMESTAMP")])
 
+    class Meta:
+        indexes = ((("participant", "timestamp"), False),)
+
 
 class KnowledgeStore(BaseModel):
     name = CharField(unique=True)
@@ -155,6 +175,24 @@ class Document(BaseModel):
     name = CharField()
 
 
+class DocumentChunk(BaseModel):
+    document = ForeignKeyField(Document, backref="chunks")
+    chunk_id = CharField(index=True)  # id_hash of the chunk text
+    position = IntegerField()
+    stale = BooleanField(default=False)  # from the previous load, being replaced
+
+
+class IngestionCheckpoint(BaseModel):
+    store = CharField()
+    document = CharField()
+    fingerprint = CharField(null=True)
+    chunks_written = IntegerField(default=0)
+    completed = BooleanField(default=False)
+
+    class Meta:
+        indexes = ((("store", "document"), True),)
+
+
 class ThoughtTemplate(BaseModel):
     name = CharField(unique=True)
     description = TextField(null=True)
@@ -162,6 +200,94 @@ class ThoughtTemplate(BaseModel):
     content = TextField()
 
 
+class MemoryIngestionJob(BaseModel):
+    store = CharField()
+    agent = CharField()
+    user_input = TextField()
+    llm_response = TextField(null=True)
+    tracking_id = CharField(null=True)  # of the chat turn that queued the job
+    status = CharField(default="pending")  # pending, running, done, failed
+    owner = CharField(null=True)  # the queue running the job
+    # a running job's lease; a pending job is held back until then for a retry
+    lease_expires = DateTimeField(null=True)
+    attempts = IntegerField(default=0)
+    error = TextField(null=True)
+    timestamp = DateTimeField(constraints=[SQL("DEFAULT CURRENT_TIMESTAMP")])
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "store": self.store,
+            "agent": self.agent,
+            "status": self.status,
+            "attempts": self.attempts,
+            "error": self.error,
+            "timestamp": self.timestamp.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+
+
+class ThreadSummary(BaseModel):
+    thread = ForeignKeyField(Thread, backref="summaries", unique=True)
+    summary = TextField()
+    last_message_id = IntegerField()  # the newest message folded into summary
+    timestamp = DateTimeField(constraints=[SQL("DEFAULT CURRENT_TIMESTAMP")])
+
+
+class CompactionJob(BaseModel):
+    store_type = CharField()  # memory or knowledge
+    store = CharField()
+    status = CharField(default="pending")  # pending, running, done, failed
+    clusters_done = IntegerField(default=0)
+    clusters_total = IntegerField(default=0)
+    items_before = IntegerField(null=True)
+    items_after = IntegerField(null=True)
+    error = TextField(null=True)
+    owner = CharField(null=True)  # the CompactionManager running the job
+    heartbeat = DateTimeField(null=True)  # UTC, refreshed while the owner lives
+    timestamp = DateTimeField(constraints=[SQL("DEFAULT CURRENT_TIMESTAMP")])
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "store_type": self.store_type,
+            "store": self.store,
+            "status": self.status,
+            "clusters_done": self.clusters_done,
+            "clusters_total": self.clusters_total,
+            "items_before": self.items_before,
+            "items_after": self.items_after,
+            "error": self.error,
+        }
+
+
+# columns added to tables that existing databases already have, applied by
+# migrate_db when missing; new tables get all their columns from create_tables
+MIGRATIONS = [
+    (AgentEngineUsage, "elapsed_ns", BigIntegerField(default=0)),
+    (AgentEngineUsage, "ttft_ns", BigIntegerField(null=True)),
+    (AgentEngineUsage, "tokens_per_second", FloatField(null=True)),
+    (AgentEngineUsage, "chunks", IntegerField(default=0)),
+]
+
+
+def migrate_db():
+    missing = []
+    for model, name, field in MIGRATIONS:
+        table = model._meta.table_name
+        if name not in {column.name for column in db.get_columns(table)}:
+            missing.append((table, name, field))
+    if not missing:
+        return
+
+    migrator = SchemaMigrator.from_database(db)
+    with db.atomic():
+        migrate(*[migrator.add_column(*column) for column in missing])
+        # usage recorded before had whole seconds only
+        AgentEngineUsage.update(
+            elapsed_ns=AgentEngineUsage.elapsed_time * 1_000_000_000
+        ).where(AgentEngineUsage.elapsed_ns == 0).execute()
+
+
 def initialize_db():
     db.connect()
     db.create_tables(
@@ -174,12 +300,18 @@ def initialize_db():
             Notification,
             KnowledgeStore,
             Document,
+            DocumentChunk,
             ThoughtTemplate,
             MemoryStore,
             MemoryFunction,
+            MemoryIngestionJob,
+            IngestionCheckpoint,
+            CompactionJob,
+            ThreadSummary,
         ],
         safe=True,
     )
+    migrate_db()
 
     # Add some initial data
     if (
@@ -0,0 +1,79 @@
+class ChatCompletionStream:
+    """
+    A streamed chat completion from an OpenAI style client. Iterating yields
+    the content as it arrives; afterwards message holds the whole assistant
+    message, with any tool calls assembled from their streamed fragments,
+    ready to append to the conversation.
+    """
+
+    def __init__(self, client, **kwargs):
+        self.stream = client.chat.completions.create(stream=True, **kwargs)
+        self.content = ""
+        self.tool_calls = []
+        self.message = None
+        self._tool_calls = {}
+
+    def __iter__(self):
+        for chunk in self.stream:
+            text = self._add(chunk)
+            if text:
+                yield text
+        self._finish()
+
+    def _add(self, chunk):
+        # the usage chunk at the end of the stream has no choices
+        if not chunk.choices:
+            return None
+        delta = chunk.choices[0].delta
+        for fragment in delta.tool_calls or []:
+            assemble_tool_call(self._tool_calls, fragment)
+        if delta.content:
+            self.content += delta.content
+        return delta.content
+
+    def _finish(self):
+        self.tool_calls = [
+            self._tool_calls[index] for index in sorted(self._tool_calls)
+        ]
+        self.message = {"role": "assistant", "content": self.content or None}
+        if self.tool_calls:
+            self.message["tool_calls"] = self.tool_calls
+
+
+class AsyncChatCompletionStream(ChatCompletionStream):
+    """ChatCompletionStream for async clients; the request is sent on first iteration."""
+
+    def __init__(self, client, **kwargs):
+        self.client = client
+        self.kwargs = kwargs
+        self.content = ""
+        self.tool_calls = []
+        self.message = None
+        self._tool_calls = {}
+
+    async def __aiter__(self):
+        stream = await self.client.chat.completions.create(stream=True, **self.kwargs)
+        async for chunk in stream:
+            text = self._add(chunk)
+            if text:
+                yield text
+        self._finish()
+
+
+def assemble_tool_call(tool_calls, fragment):
+    """
+    Merges one streamed tool call fragment into tool_calls, keyed by the
+    call's index. The id and name come in the first fragment of a call; the
+    JSON arguments arrive in pieces across the rest.
+    """
+    call = tool_calls.setdefault(
+        fragment.index,
+        {"id": None, "type": "function", "function": {"name": "", "arguments": ""}},
+    )
+    if fragment.id:
+        call["id"] = fragment.id
+    if fragment.function:
+        if fragment.function.name:
+            call["function"]["name"] += fragment.function.name
+        if fragment.function.arguments:
+            call["function"]["arguments"] += fragment.function.arguments
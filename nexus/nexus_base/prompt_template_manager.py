@@ -3,6 +3,7 @@ from typing import List
 import yaml
 from lark import Lark, Token, Transformer, Tree, v_args
 
+from nexus.nexus_base.event_loop import run_coroutine
 from nexus.nexus_base.nexus_models import PromptTemplate, db
 
 
@@ -282,7 +283,9 @@ class PromptTemplateManager:
             iprompt = transformer.transform(parsed_tree)
 
             if tinputs.get("type") == "prompt":
-                output = agent.get_semantic_response(agent.profile.persona, iprompt)
+                output = run_coroutine(
+                    agent.aget_semantic_response(agent.profile.persona, iprompt)
+                )
                 outputs["output"] = output
             elif tinputs.get("type") == "function":
                 outputs["output"] = iprompt
@@ -306,7 +309,9 @@ class PromptTemplateManager:
             oprompt = transformer.transform(parsed_tree)
 
             if toutputs.get("type") == "prompt":
-                oresult = agent.get_semantic_response(agent.profile.persona, oprompt)
+                oresult = run_coroutine(
+                    agent.aget_semantic_response(agent.profile.persona, oprompt)
+                )
             elif toutputs.get("type") == "function":
                 oresult = oprompt
             else:
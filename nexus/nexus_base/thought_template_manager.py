@@ -2,6 +2,7 @@ import yaml
 from lark import Lark, Token, Transformer, Tree, v_args
 
 from nexus.nexus_base.context_variables import tracking_function_context
+from nexus.nexus_base.event_loop import run_coroutine
 from nexus.nexus_base.nexus_models import ThoughtTemplate, db
 
 
@@ -322,7 +323,9 @@ class ThoughtTemplateManager:
 
             if tinputs.get("type") == "prompt":
                 append_tracking_context("input_prompt")
-                output = agent.get_semantic_response(agent.profile.persona, iprompt)
+                output = run_coroutine(
+                    agent.aget_semantic_response(agent.profile.persona, iprompt)
+                )
                 remove_tracking_context("input_prompt")
                 outputs["output"] = output
             elif tinputs.get("type") == "function":
@@ -350,7 +353,9 @@ class ThoughtTemplateManager:
 
             if toutputs.get("type") == "prompt":
                 append_tracking_context("output_prompt")
-                oresult = agent.get_semantic_response(agent.profile.persona, oprompt)
+                oresult = run_coroutine(
+                    agent.aget_semantic_response(agent.profile.persona, oprompt)
+                )
                 append_tracking_context("output_prompt")
             elif toutputs.get("type") == "function":
                 oresult = oprompt
@@ -1,13 +1,241 @@
+import atexit
+import os
+import threading
 import time
+from collections import deque
+from datetime import datetime, timezone
 
 from nexus.nexus_base.context_variables import (
     tracking_function_context,
     tracking_id_context,
 )
-from nexus.nexus_base.nexus_models import (
-    AgentEngineUsage,
-    db,
-)
+from nexus.nexus_base.nexus_models import AgentEngineUsage
+
+
+class UsageWriter:
+    """
+    Buffers AgentEngineUsage rows in memory and writes them from a background
+    thread with one insert_many per flush, so recording usage never waits on
+    the database. A flush happens once batch_size rows are waiting or
+    flush_ms after the last one. The buffer is a ring of capacity rows; if
+    the database falls that far behind, the oldest rows are dropped. Rows
+    whose id is already stored are ignored. Rows a flush fails to write go
+    back to the front of the buffer and the writer waits twice as long
+    before each retry, up to max_backoff_ms. close flushes what is left and
+    runs at interpreter exit.
+    """
+
+    def __init__(
+        self, batch_size=None, flush_ms=None, capacity=10000, max_backoff_ms=30000
+    ):
+        self.batch_size = batch_size or int(os.getenv("NEXUS_USAGE_BATCH", 100))
+        self.flush_ms = flush_ms or int(os.getenv("NEXUS_USAGE_FLUSH_MS", 500))
+        self.buffer = deque(maxlen=capacity)
+        self.dropped = 0
+        self.max_backoff_ms = max_backoff_ms
+        self.failures = 0
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.stopped = threading.Event()
+        self.worker = None
+        atexit.register(self.close)
+
+    def record(self, **row):
+        with self.lock:
+            if len(self.buffer) == self.buffer.maxlen:
+                self.dropped += 1
+            self.buffer.append(row)
+            pending = len(self.buffer)
+            if self.worker is None:
+                self.worker = threading.Thread(
+                    target=self._run, name="nexus-usage-writer", daemon=True
+                )
+                self.worker.start()
+        if pending >= self.batch_size:
+            self.wakeup.set()
+
+    def flush(self):
+        # one flush at a time, so rows are written in the order recorded
+        with self.flush_lock:
+            with self.lock:
+                rows = list(self.buffer)
+                self.buffer.clear()
+                dropped, self.dropped = self.dropped, 0
+            if dropped:
+                print(f"Usage buffer was full, dropped {dropped} rows.")
+            database = AgentEngineUsage._meta.database
+            for start in range(0, len(rows), 500):
+                try:
+                    with database.atomic():
+                        AgentEngineUsage.insert_many(
+                            rows[start : start + 500]
+                        ).on_conflict_ignore().execute()
+                except Exception as e:
+                    print(f"Error writing usage: {e}")
+                    self._requeue(rows[start:])
+                    self.failures += 1
+                    return start
+            self.failures = 0
+            return len(rows)
+
+    def _requeue(self, rows):
+        # ahead of rows recorded since, dropping the oldest if the ring is full
+        with self.lock:
+            room = self.buffer.maxlen - len(self.buffer)
+            if len(rows) > room:
+                self.dropped += len(rows) - room
+                rows = rows[len(rows) - room :]
+            self.buffer.extendleft(reversed(rows))
+
+    def close(self):
+        self.stopped.set()
+        self.wakeup.set()
+        if self.worker is not None and self.worker is not threading.current_thread():
+            self.worker.join(timeout=5)
+        self.flush()
+
+    def _run(self):
+        while not self.stopped.is_set():
+            if self.failures:
+                # a wakeup does not cut a backoff short
+                backoff = min(self.flush_ms * 2**self.failures, self.max_backoff_ms)
+                self.stopped.wait(backoff / 1000)
+            else:
+                self.wakeup.wait(self.flush_ms / 1000)
+            self.wakeup.clear()
+            self.flush()
+
+
+usage_writer = UsageWriter()
+
+
+class UsageTimer:
+    """
+    Monotonic nanosecond timings of one engine call: the whole call, the
+    time to the first chunk carrying a token, and the number of chunks.
+    """
+
+    def __init__(self):
+        self.start = time.monotonic_ns()
+        self.end = None
+        self.first_token = None
+        self.chunks = 0
+
+    def chunk(self, has_token=True):
+        self.chunks += 1
+        if has_token and self.first_token is None:
+            self.first_token = time.monotonic_ns()
+
+    def stop(self):
+        self.end = time.monotonic_ns()
+
+    def metrics(self):
+        return {
+            "elapsed_ns": (self.end or time.monotonic_ns()) - self.start,
+            "ttft_ns": (
+                self.first_token - self.start if self.first_token is not None else None
+            ),
+            "chunks": self.chunks,
+        }
+
+
+class ChatStreamUsage:
+    """Usage of a streamed OpenAI style chat completion, gathered chunk by chunk."""
+
+    def __init__(self, timer):
+        self.timer = timer
+        self.id = ""
+        self.model = ""
+        self.in_tokens = 0
+        self.out_tokens = None
+        self.content_chunks = 0
+
+    def add(self, chunk):
+        has_token = bool(chunk.choices) and bool(
+            chunk.choices[0].delta.content or chunk.choices[0].delta.tool_calls
+        )
+        self.timer.chunk(has_token)
+        self.content_chunks += has_token
+        self.id = chunk.id or self.id
+        self.model = chunk.model or self.model
+        # OpenAI sends usage on the last chunk when asked to with
+        # stream_options, Groq in x_groq
+        usage = getattr(chunk, "usage", None) or getattr(
+            getattr(chunk, "x_groq", None), "usage", None
+        )
+        if usage:
+            self.in_tokens = usage.prompt_tokens
+            self.out_tokens = usage.completion_tokens
+
+    def record(self, agent_name):
+        self.timer.stop()
+        TrackingManager.track_agent_engine_usage(
+            id=self.id,
+            name=agent_name,
+            model=self.model,
+            in_tokens=self.in_tokens,
+            # without usage, each content chunk is about a token
+            out_tokens=(
+                self.content_chunks if self.out_tokens is None else self.out_tokens
+            ),
+            **self.timer.metrics(),
+        )
+
+
+class MessageStreamUsage:
+    """Usage of a streamed Anthropic message, gathered event by event."""
+
+    def __init__(self, timer):
+        self.timer = timer
+        self.id = ""
+        self.model = ""
+        self.in_tokens = 0
+        self.out_tokens = 0
+
+    def add(self, item):
+        self.timer.chunk(item.__class__.__name__ == "ContentBlockDeltaEvent")
+        if item.__class__.__name__ == "MessageStartEvent":
+            self.model = item.message.model
+            self.id = item.message.id
+            self.in_tokens = item.message.usage.input_tokens
+        elif item.__class__.__name__ == "MessageDeltaEvent":
+            self.out_tokens = item.usage.output_tokens
+
+    def record(self, agent_name):
+        self.timer.stop()
+        TrackingManager.track_agent_engine_usage(
+            id=self.id,
+            name=agent_name,
+            model=self.model,
+            in_tokens=self.in_tokens,
+            out_tokens=self.out_tokens,
+            **self.timer.metrics(),
+        )
+
+
+def record_chat_completion(result, agent_name, timer):
+    timer.stop()
+    TrackingManager.track_agent_engine_usage(
+        id=result.id,
+        name=agent_name,
+        model=result.model,
+        in_tokens=result.usage.prompt_tokens,
+        out_tokens=result.usage.completion_tokens,
+        **timer.metrics(),
+    )
+
+
+def record_message(message, agent_name, timer):
+    timer.stop()
+    TrackingManager.track_agent_engine_usage(
+        id=message.id,
+        name=agent_name,
+        model=message.model,
+        in_tokens=message.usage.input_tokens,
+        out_tokens=message.usage.output_tokens,
+        **timer.metrics(),
+    )
 
 
 class TrackingManager:
@@ -25,59 +253,100 @@ class TrackingManager:
         in_tokens=0,
         out_tokens=0,
         elapsed_time=0,
+        elapsed_ns=None,
+        ttft_ns=None,
+        chunks=0,
     ):
-        with db.atomic():
-            tracking_id = tracking_id_context.get("Not Set")
-            tracking_function = tracking_function_context.get("Not Set")
-            if AgentEngineUsage.select().where(AgentEngineUsage.id == id).exists():
-                raise ValueError("Response ID already exists")
-            AgentEngineUsage.create(
-                id=id,
-                tracking_id=tracking_id,
-                function=tracking_function,
-                name=name,
-                model=model,
-                in_tokens=in_tokens,
-                out_tokens=out_tokens,
-                elapsed_time=elapsed_time,
-            )
+        if elapsed_ns is None:
+            elapsed_ns = int(elapsed_time * 1_000_000_000)
+        # for streams, the rate at which tokens arrived after the first one
+        generation_ns = elapsed_ns - (ttft_ns or 0)
+        tokens_per_second = (
+            out_tokens * 1_000_000_000 / generation_ns
+            if out_tokens and generation_ns > 0
+            else None
+        )
+        # the context is read here, on the caller's thread
+        usage_writer.record(
+            id=id,
+            tracking_id=tracking_id_context.get("Not Set"),
+            function=tracking_function_context.get("Not Set"),
+            name=name,
+            model=model,
+            in_tokens=in_tokens,
+            out_tokens=out_tokens,
+            elapsed_time=elapsed_ns // 1_000_000_000,
+            elapsed_ns=elapsed_ns,
+            ttft_ns=ttft_ns,
+            tokens_per_second=tokens_per_second,
+            chunks=chunks,
+            timestamp=datetime.now(timezone.utc).replace(tzinfo=None),
+        )
 
     def track_chat_create(self, original_create, agent_name):
         def wrapper(self, *args, **kwargs):
-            start = time.time()
+            timer = UsageTimer()
             result = original_create(*args, **kwargs)
-            end = time.time()
-
-            TrackingManager.track_agent_engine_usage(
-                id=result.id,
-                name=agent_name,
-                model=result.model,
-                in_tokens=result.usage.prompt_tokens,
-                out_tokens=result.usage.completion_tokens,
-                elapsed_time=int(end - start),
-            )
+
+            def wrap_stream(stream):
+                usage = ChatStreamUsage(timer)
+                try:
+                    for chunk in stream:
+                        usage.add(chunk)
+                        yield chunk
+                except GeneratorExit:
+                    print(f"{agent_name}: Stream was closed by the consumer.")
+                    raise
+                except Exception as e:
+                    print(f"{agent_name}: Error in stream: {e}")
+                    raise
+                finally:
+                    usage.record(agent_name)
+
+            if result.__class__.__name__ == "Stream":
+                return wrap_stream(result)
+            record_chat_completion(result, agent_name, timer)
+            return result
+
+        return wrapper
+
+    def track_chat_create_async(self, original_create, agent_name):
+        async def wrapper(self, *args, **kwargs):
+            timer = UsageTimer()
+            result = await original_create(*args, **kwargs)
+
+            async def wrap_stream(stream):
+                usage = ChatStreamUsage(timer)
+                try:
+                    async for chunk in stream:
+                        usage.add(chunk)
+                        yield chunk
+                except GeneratorExit:
+                    print(f"{agent_name}: Stream was closed by the consumer.")
+                    raise
+                except Exception as e:
+                    print(f"{agent_name}: Error in stream: {e}")
+                    raise
+                finally:
+                    usage.record(agent_name)
+
+            if result.__class__.__name__ == "AsyncStream":
+                return wrap_stream(result)
+            record_chat_completion(result, agent_name, timer)
             return result
 
         return wrapper
 
     def track_messages_create(self, original_create, agent_name):
         def wrapper(self, *args, **kwargs):
-            start = time.time()
-            model = ""
-            id = ""
-            in_tokens = 0
-            out_tokens = 0
+            timer = UsageTimer()
             stream = original_create(*args, **kwargs)
 
             def wrap_stream(stream):
+                usage = MessageStreamUsage(timer)
                 try:
                     for item in stream:
-                        if item.__class__.__name__ == "MessageStartEvent":
-                            model = item.message.model
-                            id = item.message.id
-                            in_tokens = item.message.usage.input_tokens
-                        elif item.__class__.__name__ == "MessageDeltaEvent":
-                            out_tokens = item.usage.output_tokens
+                        usage.add(item)
                         yield item  # Yield the items as they come from the original stream
 
                 except GeneratorExit:
@@ -87,31 +356,44 @@ class TrackingManager:
                     print(f"{agent_name}: Error in stream: {e}")
                     raise
                 finally:
-                    end = time.time()
-                    TrackingManager.track_agent_engine_usage(
-                        id=id,
-                        name=agent_name,
-                        model=model,
-                        in_tokens=in_tokens,
-                        out_tokens=out_tokens,
-                        elapsed_time=int(end - start),
-                    )
+                    usage.record(agent_name)
 
             if stream.__class__.__name__ == "Stream":
                 return wrap_stream(stream)
             elif stream.__class__.__name__ == "Message":
-                end = time.time()
-                TrackingManager.track_agent_engine_usage(
-                    id=stream.id,
-                    name=agent_name,
-                    model=stream.model,
-                    in_tokens=stream.usage.input_tokens,
-                    out_tokens=stream.usage.output_tokens,
-                    elapsed_time=int(end - start),
-                )
+                record_message(stream, agent_name, timer)
+                return stream
+
+        return wrapper
+
+    def track_messages_create_async(self, original_create, agent_name):
+        async def wrapper(self, *args, **kwargs):
+            timer = UsageTimer()
+            stream = await original_create(*args, **kwargs)
+
+            async def wrap_stream(stream):
+                usage = MessageStreamUsage(timer)
+                try:
+                    async for item in stream:
+                        usage.add(item)
+                        yield item
+                except GeneratorExit:
+                    print(f"{agent_name}: Stream was closed by the consumer.")
+                    raise
+                except Exception as e:
+                    print(f"{agent_name}: Error in stream: {e}")
+                    raise
+                finally:
+                    usage.record(agent_name)
+
+            if stream.__class__.__name__ == "AsyncStream":
+                return wrap_stream(stream)
+            elif stream.__class__.__name__ == "Message":
+                record_message(stream, agent_name, timer)
                 return stream
 
         return wrapper
 
     def get_tracking_usage(self):
+        usage_writer.flush()
         return AgentEngineUsage.select().dicts()
@@ -1,40 +1,16 @@
-import asyncio
 import base64
 import hashlib
 import re
-import threading
-from queue import Queue
+
+from nexus.nexus_base.event_loop import iterate
 
 
 def async_to_sync_generator(async_gen):
     """
-    Converts an async generator to a sync generator using a Queue.
+    Converts an async generator to a sync generator, driving it on the
+    shared event loop.
     """
-    # Create a Queue to communicate between async and sync
-    queue = Queue()
-
-    # Define the async task that fetches items and puts them in the queue
-    async def fetch_items():
-        async for item in async_gen:
-            queue.put(item)
-        queue.put(None)  # Signal the end of the stream
-
-    # Start the async fetching in a background thread
-    def start_background_fetching(loop):
-        asyncio.set_event_loop(loop)
-        loop.run_until_complete(fetch_items())
-
-    loop = asyncio.new_event_loop()
-    threading.Thread(
-        target=start_background_fetching, args=(loop,), daemon=True
-    ).start()
-
-    # Synchronously yield items from the queue
-    while True:
-        item = queue.get()
-        if item is None:  # End of stream signal
-            break
-        yield item
+    return iterate(async_gen)
 
 
 # # Usage example assuming an async generator `async_gen_function`
@@ -57,6 +33,24 @@ def id_hash(input_string, length=10):
     return short_hash
 
 
+def reciprocal_rank_fusion(ranked_lists, k=60):
+    """
+    Fuses several ranked lists into one ranking using reciprocal rank fusion.
+
+    Args:
+    ranked_lists (list): A list of rankings, each a list of item ids, best first.
+    k (int): The RRF damping constant.
+
+    Returns:
+    list: A list of (id, score) tuples, deduplicated and sorted by fused score.
+    """
+    scores = {}
+    for ranking in ranked_lists:
+        for rank, item in enumerate(ranking):
+            scores[item] = scores.get(item, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
 def convert_keys_to_lowercase(obj):
     if isinstance(obj, dict):
         return {k.lower(): convert_keys_to_lowercase(v) for k, v in obj.items()}
@@ -0,0 +1,636 @@
+import functools
+import json
+import os
+import re
+import shutil
+import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager
+
+import numpy as np
+
+from nexus.nexus_base.utils import id_hash
+
+
+class VectorStore:
+    """
+    The interface the knowledge and memory managers use to reach their
+    vectors. get_collection returns a collection supporting add, upsert,
+    get, query, delete and count with Chroma's argument and result shapes.
+    """
+
+    def get_collection(self, name):
+        raise NotImplementedError("This method should be implemented by subclasses.")
+
+    def list_all_collections(self):
+        # Returns the names of every collection, including working copies
+        raise NotImplementedError("This method should be implemented by subclasses.")
+
+    def list_collections(self):
+        return [
+            name
+            for name in self.list_all_collections()
+            if not is_working_collection(name)
+        ]
+
+    def delete_collection(self, name):
+        raise NotImplementedError("This method should be implemented by subclasses.")
+
+    def swap_collection(self, name, shadow):
+        """
+        Replaces collection name with the contents of collection shadow.
+        Readers see either the old or the new collection, never a mix, and
+        handles obtained before the swap keep working.
+        """
+        raise NotImplementedError("This method should be implemented by subclasses.")
+
+    @contextmanager
+    def writing(self, name):
+        """
+        Holds writes to collection name and yields its current handle. Writers
+        go through this so compaction can copy the last writes into its shadow
+        and swap it in without losing any.
+        """
+        with self.lock:
+            lock = self.write_locks.setdefault(name, threading.RLock())
+        with lock:
+            yield self.get_collection(name)
+
+    def delete_working_collections(self, name, kinds=("shadow",)):
+        # Removes working copies of name left behind by an interrupted run.
+        # Retired copies are dropped by swap_collection once readers are done.
+        pattern = rf"{re.escape(name)}-({'|'.join(kinds)})-[0-9a-f]{{8}}"
+        for collection in self.list_all_collections():
+            if re.fullmatch(pattern, collection):
+                self.delete_collection(collection)
+
+    def invalidate(self, name=None):
+        # Drops any cached collection handles
+        pass
+
+
+def working_collection_name(name, kind="shadow"):
+    return f"{name}-{kind}-{uuid.uuid4().hex[:8]}"
+
+
+def is_working_collection(name):
+    return re.search(r"-(shadow|retired)-[0-9a-f]{8}$", name) is not None
+
+
+def add_new_documents(collection, documents, embed):
+    """
+    Adds documents keyed by their id_hash, skipping ones already in the
+    collection. New documents are embedded with one embed(texts) call and
+    inserted with one add. Returns the number added.
+    """
+    documents = {id_hash(document): document for document in documents}
+    if documents:
+        for id in collection.get(ids=list(documents), include=[])["ids"]:
+            documents.pop(id, None)
+    if documents:
+        collection.add(
+            embeddings=embed(list(documents.values())),
+            documents=list(documents.values()),
+            ids=list(documents),
+        )
+    return len(documents)
+
+
+def distance_to_score(distance):
+    # maps an l2 distance to a relevance score in (0, 1], higher is closer
+    return 1.0 / (1.0 + max(float(distance), 0.0))
+
+
+def _squared_distances(queries, vectors, norms):
+    # ||q - v||^2 = ||q||^2 - 2 q.v + ||v||^2, matching Chroma's default l2 space
+    query_norms = np.einsum("ij,ij->i", queries, queries)
+    return query_norms[:, None] - 2 * queries @ vectors.T + norms[None, :]
+
+
+def _nearest_centroids(data, centroids, batch=65536):
+    norms = np.einsum("ij,ij->i", centroids, centroids)
+    labels = np.empty(len(data), dtype=np.int64)
+    for start in range(0, len(data), batch):
+        block = data[start : start + batch]
+        labels[start : start + batch] = np.argmin(
+            norms[None, :] - 2 * block @ centroids.T, axis=1
+        )
+    return labels
+
+
+def _kmeans(data, k, iterations=10, seed=0):
+    rng = np.random.default_rng(seed)
+    centroids = data[rng.choice(len(data), k, replace=False)].copy()
+    for _ in range(iterations):
+        labels = _nearest_centroids(data, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, data)
+        counts = np.bincount(labels, minlength=k)
+        filled = counts > 0
+        centroids[filled] = sums[filled] / counts[filled, None]
+    return centroids
+
+
+def _matches(metadata, where):
+    """
+    Evaluates the subset of Chroma's where filters LocalCollection supports:
+    {"key": value}, the operators $eq, $ne, $in and $nin, and $and/$or.
+    """
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(_matches(metadata, clause) for clause in condition):
+                return False
+        elif key == "$or":
+            if not any(_matches(metadata, clause) for clause in condition):
+                return False
+        elif key.startswith("$"):
+            raise NotImplementedError(f"Unsupported where operator '{key}'.")
+        elif isinstance(condition, dict):
+            for operator, operand in condition.items():
+                value = metadata.get(key)
+                if operator == "$eq":
+                    matched = key in metadata and value == operand
+                elif operator == "$ne":
+                    matched = value != operand
+                elif operator == "$in":
+                    matched = key in metadata and value in operand
+                elif operator == "$nin":
+                    matched = value not in operand
+                else:
+                    raise NotImplementedError(
+                        f"Unsupported where operator '{operator}'."
+                    )
+                if not matched:
+                    return False
+        elif key not in metadata or metadata[key] != condition:
+            return False
+    return True
+
+
+def _reopens(method):
+    # a handle closed by a swap hands over to the collection now under its name
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.lock:
+            if not self.closed:
+                return method(self, *args, **kwargs)
+        if self.reopen is None:
+            raise ValueError(f"Collection {self.directory} was deleted.")
+        return getattr(self.reopen(), method.__name__)(*args, **kwargs)
+
+    return wrapper
+
+
+class LocalCollection:
+    """
+    An in-process vector collection.
+
+    Vectors live in a memory-mapped float32 matrix (vectors.f32) and ids,
+    documents and metadata in a SQLite table, one directory per collection.
+    Below ivf_threshold items queries are exact; above it an IVF index
+    (k-means coarse quantizer, nprobe lists searched per query) is built and
+    re-built as the collection grows. Deleted rows are tombstoned. Queries
+    with a where filter (see _matches) search the matching rows exactly.
+    """
+
+    def __init__(self, directory, ivf_threshold=20000, nprobe=16, reopen=None):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.reopen = reopen  # returns the collection that replaced a closed one
+        self.closed = False
+        self.ivf_threshold = ivf_threshold
+        self.nprobe = nprobe
+        self.lock = threading.RLock()
+        self.vectors_path = os.path.join(directory, "vectors.f32")
+        self.conn = sqlite3.connect(
+            os.path.join(directory, "items.db"), check_same_thread=False
+        )
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS items ("
+            "row INTEGER PRIMARY KEY, id TEXT NOT NULL, document TEXT, "
+            "metadata TEXT, alive INTEGER NOT NULL DEFAULT 1)"
+        )
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(items)")]
+        if "metadata" not in columns:
+            self.conn.execute("ALTER TABLE items ADD COLUMN metadata TEXT")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS items_id ON items (id)")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)"
+        )
+        self.conn.commit()
+
+        row = self.conn.execute(
+            "SELECT value FROM meta WHERE key = 'dimensions'"
+        ).fetchone()
+        self.dimensions = int(row[0]) if row else None
+        self.ids = []
+        self.rows = {}
+        alive = []
+        for row, id, is_alive in self.conn.execute(
+            "SELECT row, id, alive FROM items ORDER BY row"
+        ):
+            self.ids.append(id)
+            alive.append(bool(is_alive))
+            if is_alive:
+                self.rows[id] = row
+        self.size = len(self.ids)
+        self.capacity = 0
+        self.vectors = None
+        self.norms = np.zeros(0, dtype=np.float32)
+        self.alive = np.zeros(0, dtype=bool)
+        if self.dimensions:
+            self._open_vectors()
+            self.alive[: self.size] = alive
+            self.norms[: self.size] = np.einsum(
+                "ij,ij->i", self.vectors[: self.size], self.vectors[: self.size]
+            )
+        self.index = None
+
+    def _open_vectors(self, capacity=0):
+        row_bytes = self.dimensions * 4
+        existing = (
+            os.path.getsize(self.vectors_path) // row_bytes
+            if os.path.exists(self.vectors_path)
+            else 0
+        )
+        capacity = max(capacity, existing, 1024)
+        if capacity > existing:
+            with open(self.vectors_path, "ab") as f:
+                f.truncate(capacity * row_bytes)
+        if self.vectors is not None:
+            self.vectors.flush()
+        self.vectors = np.memmap(
+            self.vectors_path,
+            dtype=np.float32,
+            mode="r+",
+            shape=(capacity, self.dimensions),
+        )
+        self.norms = np.concatenate(
+            [self.norms, np.zeros(capacity - len(self.norms), dtype=np.float32)]
+        )
+        self.alive = np.concatenate(
+            [self.alive, np.zeros(capacity - len(self.alive), dtype=bool)]
+        )
+        self.capacity = capacity
+
+    def _write(self, ids, embeddings, documents, metadatas, overwrite):
+        if not ids:
+            return
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        if self.dimensions is None:
+            self.dimensions = embeddings.shape[1]
+            self.conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('dimensions', ?)",
+                (str(self.dimensions),),
+            )
+            self._open_vectors()
+        if embeddings.shape[1] != self.dimensions:
+            raise ValueError(
+                f"Embedding dimension {embeddings.shape[1]} does not match "
+                f"collection dimensionality {self.dimensions}"
+            )
+        documents = documents or [None] * len(ids)
+        metadata = [
+            json.dumps(m) if m else None for m in metadatas or [None] * len(ids)
+        ]
+
+        positions = []
+        inserts = []
+        updates = []
+        for i, id in enumerate(ids):
+            row = self.rows.get(id)
+            if row is None:
+                row = self.size
+                self.size += 1
+                self.rows[id] = row
+                self.ids.append(id)
+                inserts.append((row, id, documents[i], metadata[i]))
+            elif overwrite:
+                updates.append((documents[i], metadata[i], row))
+            else:
+                continue
+            positions.append((i, row))
+        if not positions:
+            return
+
+        if self.size > self.capacity:
+            self._open_vectors(max(self.size, self.capacity * 2))
+        source = [i for i, _ in positions]
+        rows = [row for _, row in positions]
+        self.vectors[rows] = embeddings[source]
+        self.norms[rows] = np.einsum("ij,ij->i", embeddings[source], embeddings[source])
+        self.alive[rows] = True
+        self.vectors.flush()
+
+        self.conn.executemany(
+            "INSERT INTO items (row, id, document, metadata) VALUES (?, ?, ?, ?)",
+            inserts,
+        )
+        # without new metadatas, an upsert keeps the stored ones
+        self.conn.executemany(
+            "UPDATE items SET document = ?, metadata = COALESCE(?, metadata) "
+            "WHERE row = ?",
+            updates,
+        )
+        self.conn.commit()
+        if self.index is not None:
+            self.index["pending"].extend(row for row, _, _, _ in inserts)
+            self._reassign([row for _, _, row in updates])
+
+    @_reopens
+    def add(self, ids, embeddings, documents=None, metadatas=None):
+        # like Chroma, adding an id that already exists leaves it unchanged
+        with self.lock:
+            self._write(list(ids), embeddings, documents, metadatas, overwrite=False)
+
+    @_reopens
+    def upsert(self, ids, embeddings, documents=None, metadatas=None):
+        with self.lock:
+            self._write(list(ids), embeddings, documents, metadatas, overwrite=True)
+
+    @_reopens
+    def delete(self, ids=None, where=None):
+        with self.lock:
+            rows = [self.rows[id] for id in ids or [] if id in self.rows]
+            if where is not None:
+                matching = set(self._where_rows(where))
+                rows = [row for row in rows if row in matching] if ids else matching
+            rows = sorted(set(rows))
+            for row in rows:
+                self.rows.pop(self.ids[row])
+            if not rows:
+                return
+            self.alive[rows] = False
+            self.conn.executemany(
+                "UPDATE items SET alive = 0 WHERE row = ?", [(row,) for row in rows]
+            )
+            self.conn.commit()
+
+    @_reopens
+    def count(self):
+        return len(self.rows)
+
+    def _documents(self, rows, column="document"):
+        documents = {}
+        rows = [int(row) for row in rows]
+        for start in range(0, len(rows), 500):
+            chunk = rows[start : start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            documents.update(
+                self.conn.execute(
+                    f"SELECT row, {column} FROM items WHERE row IN ({placeholders})",
+                    chunk,
+                ).fetchall()
+            )
+        return [documents.get(row) for row in rows]
+
+    def _metadatas(self, rows):
+        return [
+            json.loads(metadata) if metadata else None
+            for metadata in self._documents(rows, "metadata")
+        ]
+
+    def _where_rows(self, where):
+        """The live rows whose metadata matches a Chroma style where filter."""
+        return sorted(
+            row
+            for row, metadata in self.conn.execute(
+                "SELECT row, metadata FROM items WHERE alive = 1"
+            )
+            if _matches(json.loads(metadata) if metadata else {}, where)
+        )
+
+    @_reopens
+    def get(self, ids=None, include=["documents"], where=None):
+        with self.lock:
+            if ids is None:
+                rows = sorted(self.rows.values())
+            else:
+                rows = [self.rows[id] for id in ids if id in self.rows]
+            if where is not None:
+                matching = set(self._where_rows(where))
+                rows = [row for row in rows if row in matching]
+            result = {"ids": [self.ids[row] for row in rows]}
+            result["documents"] = (
+                self._documents(rows) if "documents" in include else None
+            )
+            result["metadatas"] = (
+                self._metadatas(rows) if "metadatas" in include else None
+            )
+            result["embeddings"] = (
+                self.vectors[rows].tolist()
+                if "embeddings" in include and rows
+                else ([] if "embeddings" in include else None)
+            )
+            return result
+
+    def _build_index(self):
+        live = np.flatnonzero(self.alive[: self.size])
+        nlist = max(1, int(np.sqrt(len(live))))
+        rng = np.random.default_rng(0)
+        sample = rng.choice(live, min(len(live), nlist * 64), replace=False)
+        centroids = _kmeans(np.asarray(self.vectors[np.sort(sample)]), nlist)
+        labels = _nearest_centroids(self.vectors[: self.size][live], centroids)
+        order = np.argsort(labels, kind="stable")
+        bounds = np.searchsorted(labels[order], np.arange(nlist + 1))
+        row_labels = np.full(self.size, -1, dtype=np.int64)
+        row_labels[live] = labels
+        self.index = {
+            "centroids": centroids,
+            "lists": [live[order[bounds[j] : bounds[j + 1]]] for j in range(nlist)],
+            "labels": row_labels,  # each indexed row's list, -1 if pending
+            "size": len(live),
+            "pending": [],
+        }
+
+    def _reassign(self, rows):
+        # an overwritten vector moves to the list of its new nearest centroid
+        index = self.index
+        labels = index["labels"]
+        rows = [row for row in rows if row < len(labels) and labels[row] >= 0]
+        if not rows:
+            return
+        nearest = _nearest_centroids(np.asarray(self.vectors[rows]), index["centroids"])
+        for row, label in zip(rows, nearest):
+            old = labels[row]
+            if old == label:
+                continue
+            index["lists"][old] = index["lists"][old][index["lists"][old] != row]
+            index["lists"][label] = np.append(index["lists"][label], row)
+            labels[row] = label
+
+    def _candidates(self, query):
+        index = self.index
+        centroid_distances = _squared_distances(
+            query[None, :],
+            index["centroids"],
+            np.einsum("ij,ij->i", index["centroids"], index["centroids"]),
+        )[0]
+        nprobe = min(self.nprobe, len(index["lists"]))
+        probe = np.argpartition(centroid_distances, nprobe - 1)[:nprobe]
+        rows = np.concatenate(
+            [index["lists"][j] for j in probe]
+            + [np.asarray(index["pending"], dtype=np.int64)]
+        )
+        return rows[self.alive[rows]]
+
+    @_reopens
+    def query(
+        self,
+        query_embeddings,
+        n_results=10,
+        include=["documents", "distances"],
+        where=None,
+    ):
+        with self.lock:
+            queries = np.asarray(query_embeddings, dtype=np.float32)
+            live = len(self.rows)
+            if live >= self.ivf_threshold and (
+                self.index is None
+                or len(self.index["pending"]) > 0.1 * self.index["size"]
+            ):
+                self._build_index()
+
+            # filtered queries search the matching rows exactly
+            matching = (
+                np.asarray(self._where_rows(where), dtype=np.int64)
+                if where is not None
+                else None
+            )
+
+            all_ids, all_documents, all_metadatas, all_distances = [], [], [], []
+            for query in queries:
+                if live == 0 or (matching is not None and len(matching) == 0):
+                    rows, distances = np.zeros(0, dtype=np.int64), np.zeros(0)
+                else:
+                    if matching is not None:
+                        rows = matching
+                    elif self.index is not None and live >= self.ivf_threshold:
+                        rows = self._candidates(query)
+                    else:
+                        rows = np.flatnonzero(self.alive[: self.size])
+                    distances = _squared_distances(
+                        query[None, :], self.vectors[rows], self.norms[rows]
+                    )[0]
+                    k = min(n_results, len(rows))
+                    top = np.argpartition(distances, k - 1)[:k] if k else []
+                    top = top[np.argsort(distances[top])] if k else top
+                    rows, distances = rows[top], distances[top]
+                all_ids.append([self.ids[row] for row in rows])
+                all_distances.append([float(d) for d in distances])
+                if "documents" in include:
+                    all_documents.append(self._documents(rows))
+                if "metadatas" in include:
+                    all_metadatas.append(self._metadatas(rows))
+            return {
+                "ids": all_ids,
+                "documents": all_documents if "documents" in include else None,
+                "metadatas": all_metadatas if "metadatas" in include else None,
+                "distances": all_distances if "distances" in include else None,
+            }
+
+    def close(self):
+        with self.lock:
+            if self.closed:
+                return
+            if self.vectors is not None:
+                self.vectors.flush()
+                self.vectors = None
+            self.conn.close()
+            self.closed = True
+
+
+class LocalVectorStore(VectorStore):
+    """A directory of LocalCollections, one subdirectory per collection."""
+
+    def __init__(self, path, ivf_threshold=20000, nprobe=16):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.ivf_threshold = ivf_threshold
+        self.nprobe = nprobe
+        self.collections = {}
+        self.write_locks = {}
+        self.lock = threading.RLock()
+
+    def _directory(self, name):
+        if not re.fullmatch(r"[\w.-]+", name):
+            raise ValueError(f"Invalid collection name '{name}'.")
+        return os.path.join(self.path, name)
+
+    def get_collection(self, name):
+        with self.lock:
+            collection = self.collections.get(name)
+            if collection is None:
+                collection = LocalCollection(
+                    self._directory(name),
+                    self.ivf_threshold,
+                    self.nprobe,
+                    reopen=lambda: self.get_collection(name),
+                )
+                self.collections[name] = collection
+            return collection
+
+    def list_all_collections(self):
+        return sorted(
+            name
+            for name in os.listdir(self.path)
+            if os.path.isdir(os.path.join(self.path, name))
+        )
+
+    def delete_collection(self, name):
+        with self.lock:
+            directory = self._directory(name)
+            if not os.path.isdir(directory):
+                raise ValueError(f"Collection {name} does not exist.")
+            collection = self.collections.pop(name, None)
+            if collection is not None:
+                collection.reopen = None
+                collection.close()
+            shutil.rmtree(directory)
+
+    def swap_collection(self, name, shadow):
+        with self.lock:
+            # closing waits for in-flight reads on either collection; handles
+            # held elsewhere re-resolve to the swapped-in collection on next use
+            self.invalidate(name)
+            self.invalidate(shadow)
+            retired = self._directory(working_collection_name(name, "retired"))
+            directory = self._directory(name)
+            if os.path.isdir(directory):
+                os.rename(directory, retired)
+            os.rename(self._directory(shadow), directory)
+        shutil.rmtree(retired, ignore_errors=True)
+
+    def invalidate(self, name=None):
+        with self.lock:
+            names = list(self.collections) if name is None else [name]
+            for name in names:
+                collection = self.collections.pop(name, None)
+                if collection is not None:
+                    collection.close()
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_vector_store(kind):
+    """
+    Returns the shared vector store for "knowledge" or "memory", using the
+    backend selected by NEXUS_VECTOR_STORE ("chroma" or "local").
+    """
+    backend = os.getenv("NEXUS_VECTOR_STORE", "chroma")
+    with _stores_lock:
+        key = (backend, kind)
+        if key not in _stores:
+            if backend == "chroma":
+                from nexus.nexus_base.chroma_pool import get_chroma_pool
+
+                _stores[key] = get_chroma_pool(f"nexus_{kind}_chroma_db")
+            elif backend == "local":
+                _stores[key] = LocalVectorStore(f"nexus_{kind}_vector_db")
+            else:
+                raise ValueError(f"Vector store backend '{backend}' not found.")
+        return _stores[key]
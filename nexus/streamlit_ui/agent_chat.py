@@ -2,6 +2,7 @@ import streamlit as st
 
 from nexus.streamlit_ui.agent_panel import agent_panel
 from nexus.streamlit_ui.cache import get_nexus
+from nexus.streamlit_ui.message_pages import thread_messages
 
 
 def chat_page(username, win_height):
@@ -20,7 +21,6 @@ def chat_page(username, win_height):
 
     def select_thread(thread_id):
         st.session_state["current_thread_id"] = thread_id
-        thread_history = chat.read_messages(thread_id)
         # Here, we find the thread by ID and set its 'agent' attribute
         for thread in st.session_state["threads"]:
             if thread.thread_id == thread_id:
@@ -57,12 +57,7 @@ def chat_page(username, win_height):
                 with col_chat:
                     st.title(current_thread.title)
                     with st.container(height=win_height - 300):
-                        messages = chat.read_messages(current_thread.thread_id)
-                        for message in messages:
-                            with st.chat_message(
-                                message.author.username, avatar=message.author.avatar
-                            ):
-                                st.markdown(message.content)
+                        thread_messages(chat, current_thread.thread_id, "chat")
 
                         placeholder = st.empty()
 
@@ -72,7 +67,7 @@ def chat_page(username, win_height):
 
                 with col_agent:
                     chat_agent = agent_panel(chat)
-                chat_agent.chat_history = messages
+                chat_agent.load_history(current_thread.thread_id)
                 chat_avatar = chat_agent.profile.avatar
 
                 if user_input:
@@ -88,13 +83,9 @@ def chat_page(username, win_height):
                                 chat.set_tracking_id(
                                     f"chat:thread{current_thread.thread_id}:{username}"
                                 )
-                                knowledge_rag = chat.apply_knowledge_RAG(
-                                    chat_agent.knowledge_store, user_input
+                                content = user_input + chat.build_augmented_context(
+                                    user_input, chat_agent
                                 )
-                                memory_rag = chat.apply_memory_RAG(
-                                    chat_agent.memory_store, user_input, chat_agent
-                                )
-                                content = user_input + knowledge_rag + memory_rag
                                 st.write_stream(
                                     chat_agent.get_response_stream(
                                         content, current_thread.id
@@ -2,6 +2,7 @@ import streamlit as st
 
 from nexus.streamlit_ui.assistants_panel import assistants_panel
 from nexus.streamlit_ui.cache import get_nexus
+from nexus.streamlit_ui.message_pages import thread_messages
 
 
 def assistants_page(username, win_height):
@@ -20,7 +21,6 @@ def assistants_page(username, win_height):
 
     def select_thread(thread_id):
         st.session_state["ascurrent_thread_id"] = thread_id
-        thread_history = nexus.read_messages(thread_id)
         # Here, we find the thread by ID and set its 'agent' attribute
         for thread in st.session_state["asthreads"]:
             if thread.thread_id == thread_id:
@@ -61,12 +61,7 @@ def assistants_page(username, win_height):
                 with col_chat:
                     st.title(current_thread.title)
                     with st.container(height=win_height - 300):
-                        messages = nexus.read_messages(current_thread.thread_id)
-                        for message in messages:
-                            with st.chat_message(
-                                message.author.username, avatar=message.author.avatar
-                            ):
-                                st.markdown(message.content)
+                        thread_messages(nexus, current_thread.thread_id, "assistants")
 
                         placeholder = st.empty()
 
@@ -5,4 +5,6 @@ from nexus.nexus_base.nexus import Nexus
 
 @st.cache_resource
 def get_nexus():
-    return Nexus()
+    nexus = Nexus()
+    nexus.agent_manager.start_health_checks()
+    return nexus
@@ -1,11 +1,8 @@
+import time
 from collections import defaultdict
 
-import numpy as np
 import plotly.graph_objects as go
 import streamlit as st
-from sklearn.cluster import KMeans
-from sklearn.decomposition import PCA
-from sklearn.metrics import silhouette_score
 
 from nexus.streamlit_ui.options import create_options_ui
 
@@ -77,48 +74,21 @@ def get_agent(chat, agent_key, store_type="memory"):
 
 def view_embeddings(chat, item_store_name, store_type="memory"):
     """
-    Displays all memories/knowledge and their embeddings from ChromaDB, colored by KMeans clusters.
-    Finds the optimum number of clusters based on silhouette scores for 2 to 20 clusters,
-    with a preference for smaller, more numerous clusters.
+    Displays all memories/knowledge and their embeddings, colored by KMeans clusters.
+    The optimum number of clusters (2 to 20) is picked by silhouette score.
     """
     if item_store_name is None:
         st.error("Please create a memory store first.")
         st.stop()
 
-    if store_type == "knowledge":
-        items = chat.get_documents(item_store_name, include=["documents", "embeddings"])
-    elif store_type == "memory":
-        items = chat.get_memories(item_store_name, include=["documents", "embeddings"])
-
-    embeddings = items["embeddings"]
-    items = items["documents"]
-
-    if embeddings and items and len(embeddings) > 3:
-        # Applying PCA to reduce dimensions to 3
-        pca = PCA(n_components=3)
-        reduced_embeddings = pca.fit_transform(embeddings)
-
-        # Find the optimum number of clusters using silhouette scores
-        silhouette_scores = []
-        for n_clusters in range(2, 21):  # Test from 2 to 20 clusters
-            if n_clusters >= len(reduced_embeddings):
-                break
-            kmeans = KMeans(n_clusters=n_clusters, random_state=42)
-            labels = kmeans.fit_predict(reduced_embeddings)
-            score = silhouette_score(reduced_embeddings, labels)
-            silhouette_scores.append(score)
-
-        # You might prefer more clusters, so instead of directly choosing the highest score,
-        # consider a point where adding more clusters doesn't significantly improve the score
-        # This is a simplified approach to prioritize more, smaller clusters
-        n_clusters_optimal = (
-            np.argmax(silhouette_scores) + 2
-        )  # Adding 2 because range starts at 2
-
-        # Now that we have our optimal number of clusters, run KMeans with it
-        kmeans_optimal = KMeans(n_clusters=n_clusters_optimal, random_state=42)
-        kmeans_optimal.fit(reduced_embeddings)
-        labels_optimal = kmeans_optimal.labels_
+    # clustering runs in the backend and is cached until the store changes
+    clusters = chat.get_embedding_clusters(item_store_name, store_type)
+
+    if clusters is not None:
+        reduced_embeddings = clusters["points"]
+        labels_optimal = clusters["labels"]
+        n_clusters_optimal = clusters["n_clusters"]
+        items = clusters["documents"]
 
         # Creating a 3D plot using Plotly with data colored by optimal cluster assignment
         fig = go.Figure(
@@ -163,25 +133,34 @@ def view_embeddings(chat, item_store_name, store_type="memory"):
                 "Consider using the agent to compress if you have more than 10 items in a cluster."
             )
             if st.button("Compress"):
-                with st.spinner(
-                    text=f"The agent is compressing {store_type}_{item_store_name}..."
-                ):
-                    if store_type == "knowledge":
-                        chat.compress_knowledge(
-                            item_store_name, grouped_items, chat_agent
-                        )
-                        st.success(f"{store_type} compressed successfully!")
-                        st.rerun()
-                    elif store_type == "memory":
-                        chat.compress_memories(
-                            item_store_name, grouped_items, chat_agent
-                        )
-                        st.success(f"{store_type} compressed successfully!")
-                        st.rerun()
-                    else:
-                        st.error(
-                            "Invalid store type. Please choose 'knowledge' or 'memory'."
+                if store_type not in ("knowledge", "memory"):
+                    st.error(
+                        "Invalid store type. Please choose 'knowledge' or 'memory'."
+                    )
+                    return
+                # the store keeps serving chats until the compressed copy is swapped in
+                job_id = chat.start_compaction(
+                    store_type, item_store_name, grouped_items, chat_agent
+                )
+                text = f"The agent is compressing {store_type}_{item_store_name}..."
+                bar = st.progress(0.0, text=text)
+                while True:
+                    job = chat.get_compaction_status(job_id)
+                    if job["clusters_total"]:
+                        bar.progress(
+                            job["clusters_done"] / job["clusters_total"], text=text
                         )
+                    if job["status"] in ("done", "failed"):
+                        break
+                    time.sleep(0.5)
+                if job["status"] == "done":
+                    st.success(
+                        f"{store_type} compressed successfully! "
+                        f"{job['items_before']} items -> {job['items_after']} items"
+                    )
+                    st.rerun()
+                else:
+                    st.error(f"Compression failed: {job['error']}")
 
     else:
         st.error("Not enough memories to display.")
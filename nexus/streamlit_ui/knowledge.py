@@ -20,7 +20,14 @@ def add_document_to_store(chat, knowledge_store):
             # Assuming text files for simplicity, but you may need to handle different file types differently
             document_name = document_file.name
 
-            chat.load_document(knowledge_store, document_file)
+            status = st.empty()
+            chat.load_document(
+                knowledge_store,
+                document_file,
+                progress=lambda p: status.text(
+                    f"{p['chunks_written']} chunks embedded and stored..."
+                ),
+            )
             st.success("Document uploaded and processed successfully!")
             chat.add_document_to_store(knowledge_store, document_name)
             st.success(
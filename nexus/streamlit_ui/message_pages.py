@@ -0,0 +1,30 @@
+import streamlit as st
+
+PAGE_SIZE = 50
+
+
+def thread_messages(nexus, thread_id, key):
+    """
+    Renders the latest pages of a thread, with a button that loads the page
+    before them. The number of pages shown is kept per thread in the session,
+    so a rerun reads only what is on screen.
+    """
+    pages = st.session_state.setdefault(f"{key}_message_pages", {})
+    count = pages.get(thread_id, 1) * PAGE_SIZE
+    # one extra row tells us whether there is anything earlier to load
+    messages = nexus.read_messages(thread_id, limit=count + 1)
+    if len(messages) > count:
+        messages = messages[1:]
+
+        def load_earlier():
+            pages[thread_id] = pages.get(thread_id, 1) + 1
+
+        st.button(
+            "Load earlier messages",
+            key=f"{key}_load_earlier_{thread_id}",
+            on_click=load_earlier,
+        )
+
+    for message in messages:
+        with st.chat_message(message.author.username, avatar=message.author.avatar):
+            st.markdown(message.content)
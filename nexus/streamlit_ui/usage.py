@@ -19,6 +19,8 @@ def usage_page(username, win_height):
     df["timestamp"] = pd.to_datetime(df["timestamp"])
     # Calculate total tokens
     df["total_tokens"] = df["in_tokens"] + df["out_tokens"]
+    df["elapsed_ms"] = df["elapsed_ns"] / 1e6
+    df["ttft_ms"] = df["ttft_ns"] / 1e6
 
     # # Group by model, function, tracking_id, and name and sum the total tokens
     # grouped_data = (
@@ -47,7 +49,7 @@ def usage_page(username, win_height):
     token_efficiency_fig = px.scatter(
         df,
         x="total_tokens",
-        y="elapsed_time",
+        y="elapsed_ms",
         color="model",
         labels={"in_tokens": "Input Tokens", "out_tokens": "Output Tokens"},
         title="Token Efficiency Plot",
@@ -75,15 +77,32 @@ def usage_page(username, win_height):
     )
 
     # 4. Elapsed Time Analysis
-    # Note: All elapsed_time values are zero, making this plot less informative but still creating for demonstration
     elapsed_time_fig = px.box(
         df,
-        y="elapsed_time",
+        y="elapsed_ms",
         color="function",
         title="Elapsed Time Analysis",
         width=1024,
     )
 
+    # Streaming latency: time to first token and generation rate
+    ttft_fig = px.box(
+        df.dropna(subset=["ttft_ms"]),
+        x="model",
+        y="ttft_ms",
+        color="model",
+        title="Time to First Token (ms)",
+        width=1024,
+    )
+    tokens_per_second_fig = px.box(
+        df.dropna(subset=["tokens_per_second"]),
+        x="model",
+        y="tokens_per_second",
+        color="model",
+        title="Output Tokens per Second",
+        width=1024,
+    )
+
     # 5. Heatmap of Token Usage by Hour of Day
     df["hour"] = df["timestamp"].dt.hour
     heatmap_data = (
@@ -92,7 +111,7 @@ def usage_page(username, win_height):
     heatmap_fig = px.density_contour(
         df,
         x="in_tokens",
-        y="elapsed_time",
+        y="elapsed_ms",
         z="total_tokens",
         color="model",
         labels={"value": "Token Count"},
@@ -103,7 +122,7 @@ def usage_page(username, win_height):
     # 6. Cross-Model Comparison
     cross_model_fig = px.area(
         df,
-        x="elapsed_time",
+        x="elapsed_ms",
         y="total_tokens",
         color="model",
         title="Total Token Comparison",
@@ -115,5 +134,7 @@ def usage_page(username, win_height):
     st.plotly_chart(function_usage_fig)
     st.plotly_chart(time_series_tokens_fig)
     st.plotly_chart(elapsed_time_fig)
+    st.plotly_chart(ttft_fig)
+    st.plotly_chart(tokens_per_second_fig)
     st.plotly_chart(heatmap_fig)
     st.plotly_chart(cross_model_fig)
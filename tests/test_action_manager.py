@@ -0,0 +1,115 @@
+import json
+import threading
+import time
+
+from nexus.nexus_base import action_manager
+from nexus.nexus_base.action_manager import ActionManager, run_tool_calls
+
+
+def tool_call(id, name, **arguments):
+    return {
+        "id": id,
+        "type": "function",
+        "function": {"name": name, "arguments": json.dumps(arguments)},
+    }
+
+
+def action(name, pointer, timeout=None):
+    return {"name": name, "pointer": pointer, "timeout": timeout}
+
+
+def test_tool_calls_run_concurrently_in_order():
+    def slow(seconds, _caller_agent=None):
+        time.sleep(float(seconds))
+        return f"slept {seconds}"
+
+    def broken(_caller_agent=None):
+        raise RuntimeError("no service")
+
+    actions = [action("slow", slow), action("broken", broken)]
+    calls = [
+        tool_call("a", "slow", seconds="0.3"),
+        tool_call("b", "slow", seconds="0.1"),
+        tool_call("c", "broken"),
+        tool_call("d", "slow", seconds="0.2"),
+    ]
+
+    start = time.monotonic()
+    messages = run_tool_calls(calls, actions, agent=None)
+
+    assert time.monotonic() - start < 0.5
+    assert [m["tool_call_id"] for m in messages] == ["a", "b", "c", "d"]
+    assert messages[0]["content"] == "slept 0.3"
+    assert messages[2]["content"] == "Error: broken failed: no service"
+
+
+def test_tool_calls_time_out_per_action():
+    def hang(_caller_agent=None):
+        time.sleep(1)
+
+    messages = run_tool_calls(
+        [tool_call("a", "hang")], [action("hang", hang, timeout=0.1)], agent=None
+    )
+
+    assert messages[0]["content"] == "Error: hang timed out after 0.1 seconds."
+
+
+def test_timeout_counts_from_when_a_call_starts(monkeypatch):
+    monkeypatch.setattr(action_manager, "action_slots", threading.Semaphore(1))
+
+    def slow(_caller_agent=None):
+        time.sleep(0.2)
+        return "done"
+
+    messages = run_tool_calls(
+        [tool_call("a", "slow"), tool_call("b", "slow")],
+        [action("slow", slow, timeout=0.3)],
+        agent=None,
+    )
+
+    # b waits 0.2s for a's slot, which does not count against its timeout
+    assert [m["content"] for m in messages] == ["done", "done"]
+
+
+def test_timed_out_call_gives_up_its_slot(monkeypatch):
+    monkeypatch.setattr(action_manager, "action_slots", threading.Semaphore(1))
+    monkeypatch.setattr(action_manager, "abandoned_slots", threading.Semaphore(1))
+    release = threading.Event()
+
+    def hang(_caller_agent=None):
+        release.wait(5)
+
+    def quick(_caller_agent=None):
+        return "quick"
+
+    actions = [action("hang", hang, timeout=0.1), action("quick", quick)]
+    try:
+        run_tool_calls([tool_call("a", "hang")], actions, agent=None)
+        start = time.monotonic()
+        messages = run_tool_calls([tool_call("b", "quick")], actions, agent=None)
+        assert messages[0]["content"] == "quick"
+        assert time.monotonic() - start < 1
+        # the abandoned cap is reached, so the next hung call keeps its slot
+        run_tool_calls([tool_call("c", "hang")], actions, agent=None)
+        assert not action_manager.action_slots.acquire(blocking=False)
+    finally:
+        release.set()
+
+
+def test_action_timeout_is_collected(tmp_path):
+    path = tmp_path / "actions.py"
+    path.write_text(
+        "from nexus.nexus_base.action_manager import agent_action\n\n\n"
+        "@agent_action(timeout=60)\n"
+        "def slow_search(query):\n"
+        '    """Searches slowly."""\n'
+        "    return query\n"
+    )
+
+    (collected,) = ActionManager().inspect_file_for_decorated_actions(
+        path.read_text(), str(path)
+    )
+
+    assert collected["name"] == "slow_search"
+    assert collected["timeout"] == 60
+    assert collected["pointer"]("x") == "x"
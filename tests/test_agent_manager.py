@@ -0,0 +1,120 @@
+import time
+
+import pytest
+
+from nexus.nexus_base.agent_manager import AgentManager, BaseAgent
+
+
+class FakeAgent(BaseAgent):
+    created = 0
+    healthy = True
+    checks = 0
+
+    def __init__(self, chat_history=None):
+        super().__init__(chat_history)
+        type(self).created += 1
+
+    @classmethod
+    def check_config(cls):
+        pass
+
+    @classmethod
+    def check_health(cls):
+        cls.checks += 1
+        if not cls.healthy:
+            raise ConnectionError("provider unreachable")
+
+
+class BrokenAgent(BaseAgent):
+    def __init__(self, chat_history=None):
+        raise ValueError("API key is not set.")
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    FakeAgent.created, FakeAgent.healthy, FakeAgent.checks = 0, True, 0
+    monkeypatch.setenv("NEXUS_AGENT_HEALTH_TTL", "0.2")
+    monkeypatch.setattr(
+        AgentManager,
+        "_load_agents",
+        lambda self, directory: {"FakeAgent": FakeAgent, "BrokenAgent": BrokenAgent},
+    )
+    manager = AgentManager(health_checks=True)
+    yield manager
+    manager.stop()
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_agents_are_created_on_first_use(manager):
+    assert manager.get_agent("Missing") is None
+    agent = manager.get_agent("FakeAgent")
+    assert manager.get_agent("FakeAgent") is agent
+    assert FakeAgent.created == 1
+    assert manager.get_agent("BrokenAgent") is None
+
+
+def test_unhealthy_agents_are_rechecked_after_the_ttl(manager):
+    assert wait_for(lambda: manager.get_agent_names() == ["FakeAgent"])
+    assert manager.get_agent_health("BrokenAgent")[0] is False
+
+    FakeAgent.healthy = False
+    assert wait_for(lambda: manager.get_agent_names() == [])
+    assert "unreachable" in manager.get_agent_health("FakeAgent")[1]
+
+    FakeAgent.healthy = True
+    assert wait_for(lambda: manager.get_agent_names() == ["FakeAgent"])
+
+
+def test_health_checks_do_not_build_agents(manager):
+    # engines that fail to construct are left out before their first check
+    assert manager.get_agent_names() == ["FakeAgent"]
+    assert wait_for(lambda: FakeAgent.checks >= 2)
+    assert FakeAgent.created == 0
+    assert manager.agents == {}
+
+
+def test_health_changes_are_printed_once(manager, capsys):
+    FakeAgent.healthy = False
+    checks = FakeAgent.checks
+    assert wait_for(lambda: FakeAgent.checks >= checks + 3)
+    FakeAgent.healthy = True
+    assert wait_for(lambda: manager.get_agent_names() == ["FakeAgent"])
+
+    output = capsys.readouterr().out
+    assert output.count("Agent FakeAgent is unavailable") == 1
+    assert output.count("Agent FakeAgent is available again") == 1
+    assert output.count("Agent BrokenAgent is unavailable") == 1
+
+
+def test_health_checks_are_off_unless_started(monkeypatch):
+    FakeAgent.checks = 0
+    monkeypatch.delenv("NEXUS_AGENT_HEALTH_CHECKS", raising=False)
+    monkeypatch.setattr(
+        AgentManager,
+        "_load_agents",
+        lambda self, directory: {"FakeAgent": FakeAgent, "BrokenAgent": BrokenAgent},
+    )
+    manager = AgentManager()
+
+    assert manager.health_checker.worker is None
+    assert manager.get_agent_names() == ["FakeAgent"]
+    assert manager.get_agent_health("FakeAgent") is None
+    time.sleep(0.1)
+    assert FakeAgent.checks == 0
+    manager.stop()
+
+
+def test_stop_ends_the_checker(manager):
+    checker = manager.health_checker
+    manager.stop()
+    assert not checker.worker.is_alive()
+    checks = FakeAgent.checks
+    checker.schedule("FakeAgent")
+    time.sleep(0.1)
+    assert FakeAgent.checks == checks
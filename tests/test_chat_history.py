@@ -0,0 +1,125 @@
+import pytest
+from peewee import SqliteDatabase
+
+from nexus.nexus_base.chat_history import (
+    LastNHistory,
+    RollingSummaryHistory,
+    TokenWindowHistory,
+    read_messages,
+)
+from nexus.nexus_base.nexus_models import (
+    ChatParticipants,
+    Message,
+    Thread,
+    ThreadSummary,
+)
+
+MODELS = [ChatParticipants, Thread, Message, ThreadSummary]
+
+
+class SummarizingAgent:
+    model = None
+
+    def __init__(self):
+        self.calls = 0
+
+    def get_semantic_response(self, system, user):
+        self.calls += 1
+        return f"summary {self.calls}"
+
+
+@pytest.fixture
+def thread():
+    test_db = SqliteDatabase(":memory:")
+    with test_db.bind_ctx(MODELS):
+        test_db.create_tables(MODELS)
+        author = ChatParticipants.create(
+            user_id="u1",
+            username="user",
+            display_name="user",
+            participant_type="user",
+            status="Active",
+        )
+        thread = Thread.create(thread_id="t1", title="Chat", type="agent")
+
+        def post(count):
+            start = Message.select().count()
+            for i in range(start, start + count):
+                Message.create(
+                    thread=thread, author=author, role="user", content=f"message {i}"
+                )
+
+        yield thread, post
+
+
+def test_read_messages_pages_back_through_a_thread(thread):
+    thread, post = thread
+    post(12)
+
+    pages = []
+    before = None
+    while True:
+        page = read_messages(thread.thread_id, before, 5)
+        if not page:
+            break
+        pages.insert(0, [m.content for m in page])
+        before = page[0].id
+
+    assert [len(page) for page in pages] == [2, 5, 5]
+    assert sum(pages, []) == [f"message {i}" for i in range(12)]
+    assert len(read_messages(thread.thread_id)) == 12
+
+
+def test_rendering_a_page_takes_constant_queries(thread, monkeypatch):
+    thread, post = thread
+    post(20)
+    database = Message._meta.database
+    queries = []
+    execute_sql = database.execute_sql
+
+    def counting(sql, params=None, *args, **kwargs):
+        queries.append(sql)
+        return execute_sql(sql, params, *args, **kwargs)
+
+    monkeypatch.setattr(database, "execute_sql", counting)
+    for before, limit in [(None, None), (None, 5), (15, 5)]:
+        queries.clear()
+        for message in read_messages(thread.thread_id, before, limit):
+            message.to_dict()
+            message.author.avatar
+        assert len(queries) == (1 if before is None else 2)
+
+
+def test_last_n_and_token_window(thread):
+    thread, post = thread
+    post(30)
+
+    _, messages = LastNHistory(5).select(thread.thread_id, None)
+    assert [m.content for m in messages] == [f"message {i}" for i in range(25, 30)]
+
+    # each message costs its tokens plus 4 of overhead
+    _, messages = TokenWindowHistory(max_tokens=60, page_size=4).select(
+        thread.thread_id, None
+    )
+    assert 0 < len(messages) < 30
+    assert messages[-1].content == "message 29"
+
+
+def test_rolling_summary_is_cached_per_thread(thread):
+    thread, post = thread
+    agent = SummarizingAgent()
+    strategy = RollingSummaryHistory(keep_last=4, summarize_every=5)
+
+    post(8)
+    summary, messages = strategy.select(thread.thread_id, agent)
+    assert summary is None and len(messages) == 8
+
+    post(2)
+    summary, messages = strategy.select(thread.thread_id, agent)
+    assert summary == "summary 1"
+    assert [m.content for m in messages] == [f"message {i}" for i in range(6, 10)]
+
+    # the stored summary is reused until enough new messages fall out of the window
+    summary, messages = strategy.select(thread.thread_id, agent)
+    assert summary == "summary 1" and agent.calls == 1
+    assert ThreadSummary.get().last_message_id == Message.select().count() - 4
@@ -0,0 +1,40 @@
+import numpy as np
+
+from nexus.nexus_base.clustering_manager import ClusteringManager
+from nexus.nexus_base.vector_store import LocalVectorStore
+
+
+def make_collection(tmp_path, centers=4, per_center=50):
+    rng = np.random.default_rng(0)
+    means = rng.normal(scale=10, size=(centers, 8))
+    vectors = np.repeat(means, per_center, axis=0) + rng.normal(
+        size=(centers * per_center, 8)
+    )
+    collection = LocalVectorStore(str(tmp_path / "vectors")).get_collection("notes")
+    collection.add(
+        ids=[str(i) for i in range(len(vectors))],
+        embeddings=vectors,
+        documents=[f"note {i}" for i in range(len(vectors))],
+    )
+    return collection
+
+
+def test_finds_clusters_and_caches_by_version(tmp_path):
+    collection = make_collection(tmp_path)
+    manager = ClusteringManager(max_clusters=8, sample_size=100)
+
+    result = manager.get_clusters("memory:notes", collection)
+    assert result["n_clusters"] == 4
+    assert len(result["labels"]) == len(result["documents"]) == 200
+    assert result["points"].shape == (200, 3)
+    assert manager.get_clusters("memory:notes", collection) is result
+
+    collection.delete(ids=["0"])
+    changed = manager.get_clusters("memory:notes", collection)
+    assert changed is not result
+    assert len(changed["documents"]) == 199
+
+
+def test_too_few_items(tmp_path):
+    collection = make_collection(tmp_path, centers=1, per_center=3)
+    assert ClusteringManager().get_clusters("memory:notes", collection) is None
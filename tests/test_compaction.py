@@ -0,0 +1,50 @@
+from datetime import timedelta
+
+import pytest
+
+from nexus.nexus_base.compaction import CompactionManager, _utcnow
+from nexus.nexus_base.database import create_database
+from nexus.nexus_base.nexus_models import CompactionJob
+
+
+@pytest.fixture
+def manager():
+    test_db = create_database("sqlite:///:memory:")
+    managers = []
+
+    def manager(nexus=None):
+        managers.append(CompactionManager(nexus, lease=timedelta(seconds=60)))
+        return managers[-1]
+
+    with test_db.bind_ctx([CompactionJob]):
+        test_db.create_tables([CompactionJob])
+        yield manager
+        for m in managers:
+            m.stop()
+
+
+def test_only_jobs_with_expired_heartbeats_are_failed(manager):
+    now = _utcnow()
+    live = CompactionJob.create(
+        store_type="memory",
+        store="notes",
+        status="running",
+        owner="other-process",
+        heartbeat=now,
+    )
+    stale = CompactionJob.create(
+        store_type="memory",
+        store="facts",
+        status="running",
+        owner="crashed-process",
+        heartbeat=now - timedelta(minutes=5),
+    )
+    legacy = CompactionJob.create(store_type="knowledge", store="docs")
+
+    m = manager()
+
+    assert m.get_status(live.id)["status"] == "running"
+    assert m.get_status(stale.id)["status"] == "failed"
+    assert m.get_status(legacy.id)["status"] == "failed"
+    # the live job still blocks a second compaction of its store
+    assert m.start("memory", "notes", {0: ["a"]}, None) == live.id
@@ -0,0 +1,103 @@
+import json
+import threading
+import time
+
+import pytest
+
+from nexus.nexus_base.compression import (
+    RateLimiter,
+    compact_collection,
+    compress_clusters,
+)
+from nexus.nexus_base.utils import id_hash
+from nexus.nexus_base.vector_store import LocalVectorStore
+
+
+class FakeAgent:
+    name = "FakeAgent"
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def get_semantic_response(self, system, user):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.delay)
+        with self.lock:
+            self.active -= 1
+        if system == "summarize":
+            return user
+        if "bad" in user:
+            return "not json"
+        return json.dumps({"Statements": user.split("\n")})
+
+
+def test_clusters_compress_concurrently_in_order(monkeypatch):
+    monkeypatch.setenv("NEXUS_RPM_FAKEAGENT", "100000")
+    agent = FakeAgent()
+    grouped = {i: [f"cluster {i} item {j}" for j in range(2)] for i in range(8)}
+    grouped[3] = ["bad"]
+
+    start = time.monotonic()
+    statements = compress_clusters(
+        agent, grouped, "summarize", "extract", "statements", max_workers=4
+    )
+    elapsed = time.monotonic() - start
+
+    assert agent.peak == 4
+    assert elapsed < 8 * 2 * agent.delay
+    assert statements == [
+        f"cluster {i} item {j}" for i in range(8) if i != 3 for j in range(2)
+    ]
+
+
+def test_rate_limiter_spaces_calls():
+    limiter = RateLimiter(requests_per_minute=600, burst=1)
+    start = time.monotonic()
+    for _ in range(4):
+        limiter.acquire()
+    assert time.monotonic() - start >= 0.25
+
+
+def test_failed_compaction_leaves_store_intact(tmp_path):
+    store = LocalVectorStore(str(tmp_path / "vectors"))
+    store.get_collection("notes").add(ids=["a"], embeddings=[[1.0]], documents=["a"])
+
+    def embed(texts):
+        raise RuntimeError("provider down")
+
+    with pytest.raises(RuntimeError):
+        compact_collection(store, "notes", ["b", "c"], embed)
+    assert store.get_collection("notes").get()["documents"] == ["a"]
+    assert store.list_all_collections() == ["notes"]
+
+    result = compact_collection(
+        store, "notes", ["b", "c", "b"], lambda texts: [[1.0]] * len(texts)
+    )
+    assert result == {"items_before": 1, "items_after": 2}
+    assert sorted(store.get_collection("notes").get()["documents"]) == ["b", "c"]
+
+
+def test_writes_during_compaction_are_kept(tmp_path):
+    store = LocalVectorStore(str(tmp_path / "vectors"))
+    notes = store.get_collection("notes")
+    notes.add(
+        ids=[id_hash(text) for text in ["a", "b", "kept"]],
+        embeddings=[[1.0], [2.0], [3.0]],
+        documents=["a", "b", "kept"],
+    )
+
+    def embed(texts):
+        # a write lands while the statements are being embedded
+        with store.writing("notes") as collection:
+            collection.add(ids=["late"], embeddings=[[4.0]], documents=["late"])
+        return [[0.5]] * len(texts)
+
+    result = compact_collection(store, "notes", ["ab"], embed, compressed=["a", "b"])
+
+    assert result == {"items_before": 3, "items_after": 3}
+    assert sorted(notes.get()["documents"]) == ["ab", "kept", "late"]
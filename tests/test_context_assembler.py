@@ -0,0 +1,82 @@
+from nexus.nexus_base.context_assembler import (
+    ContextAssembler,
+    ContextSection,
+    fit_messages,
+    near_duplicate,
+)
+
+
+class WordCounter:
+    """One token per word, so budgets in the tests are easy to reason about."""
+
+    def count(self, text):
+        return len(text.split())
+
+    def truncate(self, text, max_tokens):
+        return " ".join(text.split()[:max_tokens])
+
+    def count_message(self, message):
+        return self.count(message["content"]) + 4
+
+
+def words(prefix, n):
+    return " ".join(f"{prefix}{i}" for i in range(n))
+
+
+def test_pack_by_score_with_dedupe_and_truncation():
+    knowledge = ContextSection(
+        "knowledge",
+        "Docs:\n",
+        [(words("a", 10), 0.9), (words("b", 40), 0.5)],
+        label="Document",
+    )
+    memory = ContextSection(
+        "memory",
+        "Memories:\n",
+        [(words("a", 10) + " extra", 0.8), (words("c", 10), 0.7)],
+        label="Memory",
+    )
+    assembler = ContextAssembler(WordCounter(), min_passage_tokens=5)
+
+    text, usage = assembler.pack([knowledge, memory], budget=40)
+
+    # the near copy of a0..a9 is skipped, b is truncated into the space left
+    assert "extra" not in text
+    assert "c9" in text
+    assert "b0" in text and "b39" not in text
+    assert text.index("Docs:") < text.index("Memories:")
+    assert sum(usage.values()) <= 40
+    assert usage["memory"] == WordCounter().count(
+        "Memories:\nMemory 1:\n" + words("c", 10)
+    )
+
+
+def test_near_duplicate():
+    assert near_duplicate("the cat sat on the mat", "The cat sat on the mat!")
+    assert not near_duplicate("the cat sat on the mat", "a dog ran in the park")
+
+
+def test_fit_messages_keeps_system_recent_and_tool_groups():
+    messages = [
+        {"role": "system", "content": "persona"},
+        {"role": "user", "content": words("old", 50)},
+        {"role": "assistant", "content": words("reply", 50)},
+        {"role": "user", "content": "call the tool"},
+        {"role": "assistant", "content": "calling"},
+        {"role": "tool", "content": words("result", 10)},
+        {"role": "user", "content": "thanks"},
+    ]
+
+    fitted = fit_messages(messages, budget=40, counter=WordCounter())
+
+    assert [m["role"] for m in fitted] == [
+        "system",
+        "user",
+        "assistant",
+        "tool",
+        "user",
+    ]
+    assert fitted[1]["content"] == "call the tool"
+
+    # the latest message is kept even when it alone exceeds the budget
+    assert fit_messages(messages, budget=1, counter=WordCounter())[-1] == messages[-1]
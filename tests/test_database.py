@@ -0,0 +1,33 @@
+import threading
+
+from nexus.nexus_base.database import create_database
+
+
+def test_sqlite_file_is_tuned(tmp_path):
+    db = create_database(f"sqlite:///{tmp_path / 'nexus.db'}?timeout=10")
+    db.connect()
+    assert db.execute_sql("PRAGMA journal_mode").fetchone()[0] == "wal"
+    # NORMAL
+    assert db.execute_sql("PRAGMA synchronous").fetchone()[0] == 1
+    assert db.execute_sql("PRAGMA busy_timeout").fetchone()[0] == 5000
+    db.close()
+
+
+def test_memory_database_is_shared_between_thread_connections():
+    db = create_database("sqlite:///:memory:")
+    db.connect()
+    db.execute_sql("CREATE TABLE item (name TEXT)")
+    connections = []
+
+    def write():
+        db.execute_sql("INSERT INTO item VALUES ('from a thread')")
+        connections.append(db.connection())
+        db.close()
+
+    worker = threading.Thread(target=write)
+    worker.start()
+    worker.join()
+
+    assert connections[0] is not db.connection()
+    assert db.execute_sql("SELECT name FROM item").fetchall() == [("from a thread",)]
+    db.close()
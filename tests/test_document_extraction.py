@@ -0,0 +1,25 @@
+import pytest
+
+from benchmarks.bench_pdf_extraction import write_sample_pdf
+from nexus.nexus_base.document_extraction import DocumentExtractionPool, DocumentFile
+
+
+@pytest.fixture
+def pool():
+    pool = DocumentExtractionPool(max_workers=2, pages_per_task=3)
+    yield pool
+    pool.shutdown()
+
+
+def test_pool_extracts_pdf_pages_in_document_order(pool, tmp_path):
+    path = str(tmp_path / "sample.pdf")
+    write_sample_pdf(path, 10, lines_per_page=2)
+
+    with DocumentFile(path) as document:
+        pages = list(pool.iter_segments(document))
+
+    assert len(pages) == 10
+    assert [page.split("\n")[0] for page in pages] == [
+        f"Page {p} line 0 of the sample document for extraction." for p in range(10)
+    ]
+    assert pool.executor._mp_context.get_start_method() == "spawn"
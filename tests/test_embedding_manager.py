@@ -0,0 +1,120 @@
+import threading
+
+import pytest
+
+from nexus.nexus_base.embedding_cache import EmbeddingCache
+from nexus.nexus_base.embedding_manager import (
+    EmbeddingManager,
+    LocalEmbeddingBackend,
+    pack_batches,
+)
+
+
+@pytest.fixture
+def backend():
+    # Create an offline embedding backend for testing
+    return LocalEmbeddingBackend()
+
+
+def test_local_backend_is_deterministic(backend):
+    first = backend.embed(["the quick brown fox"])[0]
+    second = backend.embed(["the quick brown fox"])[0]
+    assert first == second
+    assert len(first) == backend.dimensions
+
+
+def test_pack_batches_respects_limits():
+    texts = ["a" * 30] * 10
+    batches = pack_batches(texts, max_items=4, max_tokens=1000)
+    assert [len(b) for b in batches] == [4, 4, 2]
+
+    batches = pack_batches(texts, max_items=100, max_tokens=25)
+    assert [len(b) for b in batches] == [2, 2, 2, 2, 2]
+    assert sum(batches, []) == list(range(10))
+
+
+def test_get_embeddings_batches_and_keeps_order(backend):
+    backend.max_batch_items = 3
+    em = EmbeddingManager(backend=backend, coalesce=False, cache=False)
+    texts = [f"document number {i}" for i in range(7)] + [None]
+    embeddings = em.get_embeddings(texts)
+
+    assert backend.calls == 3
+    assert embeddings[-1] is None
+    for text, embedding in zip(texts[:-1], embeddings):
+        assert embedding == em.get_embedding(text)
+
+
+def test_coalescer_merges_concurrent_requests():
+    backend = LocalEmbeddingBackend(latency=0.05)
+    em = EmbeddingManager(backend=backend, cache=False)
+    results = {}
+
+    def embed(i):
+        results[i] = em.get_embedding(f"concurrent text {i}")
+
+    threads = [threading.Thread(target=embed, args=(i,)) for i in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(results) == 20
+    assert backend.calls < 20
+    assert results[3] == backend.embed_text("concurrent text 3")
+
+
+def test_cache_skips_provider_for_known_texts(backend, tmp_path):
+    cache = EmbeddingCache(path=str(tmp_path / "cache.db"), memory_items=2)
+    em = EmbeddingManager(backend=backend, coalesce=False, cache=cache)
+    texts = ["alpha memory", "beta memory", "gamma memory"]
+
+    first = em.get_embeddings(texts)
+    assert backend.calls == 1
+    second = em.get_embeddings(texts + ["delta memory"])
+    assert backend.calls == 2
+    assert em.get_embedding("alpha memory") == second[0]
+    assert backend.calls == 2
+    for a, b in zip(first, second):
+        assert a == pytest.approx(b, abs=1e-6)
+
+    # a fresh cache over the same file is served from disk
+    cache = EmbeddingCache(path=str(tmp_path / "cache.db"))
+    assert cache.get(em.cache_key, "beta memory") == pytest.approx(first[1], abs=1e-6)
+    assert cache.get("another-model", "beta memory") is None
+
+
+def test_cache_is_keyed_on_backend_and_dimensions(tmp_path):
+    cache = EmbeddingCache(path=str(tmp_path / "cache.db"))
+    small = EmbeddingManager(LocalEmbeddingBackend(dimensions=8), False, cache)
+    large = EmbeddingManager(LocalEmbeddingBackend(dimensions=16), False, cache)
+
+    assert len(small.get_embedding("same text")) == 8
+    assert len(large.get_embedding("same text")) == 16
+
+
+def test_disk_hits_record_their_use_with_the_next_put(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = EmbeddingCache(path=path, max_items=10)
+    for i in range(10):
+        cache.put("model", f"text {i}", [float(i)])
+
+    cache = EmbeddingCache(path=path, memory_items=1, max_items=10)
+    changes = cache.conn.total_changes
+    assert cache.get("model", "text 0") == [0.0]
+    assert cache.conn.total_changes == changes  # a read does not write
+
+    # text 0 was used last, so the next eviction spares it
+    cache.put("model", "text 10", [10.0])
+    assert cache.get("model", "text 0") == [0.0]
+    assert cache.get("model", "text 1") is None
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = EmbeddingCache(
+        path=str(tmp_path / "cache.db"), memory_items=1, max_items=10
+    )
+    for i in range(12):
+        cache.put("model", f"text {i}", [float(i)])
+    assert cache.count <= 10
+    assert cache.get("model", "text 11") == [11.0]
@@ -0,0 +1,51 @@
+import asyncio
+import contextvars
+
+import pytest
+
+from nexus.nexus_base.event_loop import (
+    aiterate,
+    get_event_loop,
+    iterate,
+    run_coroutine,
+    run_shared,
+)
+
+request_id = contextvars.ContextVar("request_id", default="none")
+
+
+async def numbers(count):
+    for i in range(count):
+        await asyncio.sleep(0.01)
+        yield f"{request_id.get()}:{i}"
+
+
+def test_sync_callers_share_one_loop_and_keep_their_context():
+    async def current_loop():
+        return asyncio.get_running_loop()
+
+    request_id.set("sync")
+    assert run_coroutine(current_loop()) is get_event_loop()
+    assert list(iterate(numbers(3))) == ["sync:0", "sync:1", "sync:2"]
+
+
+def test_other_loops_await_on_the_shared_loop():
+    async def main():
+        request_id.set("api")
+        loops = await asyncio.gather(
+            *[run_shared(asyncio.sleep(0.05, "done")) for _ in range(20)]
+        )
+        items = [item async for item in aiterate(numbers(2))]
+        return loops, items
+
+    results, items = asyncio.run(main())
+    assert results == ["done"] * 20
+    assert items == ["api:0", "api:1"]
+
+
+def test_blocking_from_the_shared_loop_is_refused():
+    async def nested():
+        run_coroutine(asyncio.sleep(0))
+
+    with pytest.raises(RuntimeError):
+        run_coroutine(nested())
@@ -0,0 +1,29 @@
+from nexus.nexus_base.http_clients import (
+    close_http_clients,
+    create_client,
+    get_http_client,
+)
+
+
+def test_clients_of_a_provider_share_one_http_client():
+    first = create_client("openai", api_key="test")
+    second = create_client("openai", api_key="test")
+    async_client = create_client("openai", asynchronous=True, api_key="test")
+
+    assert first is not second
+    assert first._client is second._client is get_http_client("openai")
+    assert async_client._client is get_http_client("openai", asynchronous=True)
+    assert async_client._client is not first._client
+    close_http_clients()
+
+
+def test_settings_come_from_the_environment(monkeypatch):
+    close_http_clients()
+    monkeypatch.setenv("NEXUS_HTTP_TIMEOUT", "12")
+    monkeypatch.setenv("NEXUS_HTTP_CONNECT_TIMEOUT", "2")
+
+    http_client = create_client("groq", api_key="test")._client
+
+    assert http_client.timeout.read == 12
+    assert http_client.timeout.connect == 2
+    close_http_clients()
@@ -0,0 +1,42 @@
+import pytest
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from nexus.nexus_base.ingestion_pipeline import DocumentIngestionPipeline, iter_chunks
+
+
+@pytest.fixture
+def splitter():
+    return RecursiveCharacterTextSplitter(chunk_size=100, chunk_overlap=0)
+
+
+def test_iter_chunks_matches_whole_document_split(splitter):
+    segments = [f"Paragraph {i}. " + "word " * 30 for i in range(50)]
+    chunks = list(iter_chunks(iter(segments), splitter, window=400))
+    assert "".join(chunks).replace(" ", "") == "".join(segments).replace(" ", "")
+    assert all(len(chunk) <= 100 for chunk in chunks)
+
+
+def test_pipeline_batches_and_resumes():
+    written = []
+    checkpoints = []
+    pipeline = DocumentIngestionPipeline(
+        embed=lambda texts: [[float(len(t))] for t in texts],
+        write=lambda texts, embeddings: written.append(list(texts)),
+        batch_size=4,
+        queue_size=1,
+        checkpoint=checkpoints.append,
+    )
+    chunks = [f"chunk {i}" for i in range(10)]
+
+    assert pipeline.run(iter(chunks), skip=3) == 10
+    assert sum(written, []) == chunks[3:]
+    assert checkpoints == [7, 10]
+
+
+def test_pipeline_raises_stage_errors():
+    def embed(texts):
+        raise RuntimeError("provider down")
+
+    pipeline = DocumentIngestionPipeline(embed=embed, write=lambda t, e: None)
+    with pytest.raises(RuntimeError):
+        pipeline.run(iter(["a", "b"]))
@@ -0,0 +1,157 @@
+import hashlib
+import io
+import tempfile
+
+import pytest
+from peewee import SqliteDatabase
+
+from nexus.nexus_base.document_extraction import DocumentFile
+from nexus.nexus_base.knowledge_manager import KnowledgeManager
+from nexus.nexus_base.nexus_models import (
+    Document,
+    DocumentChunk,
+    IngestionCheckpoint,
+    KnowledgeStore,
+)
+from nexus.nexus_base.utils import id_hash
+from nexus.nexus_base.vector_store import LocalVectorStore
+
+MODELS = [KnowledgeStore, Document, DocumentChunk, IngestionCheckpoint]
+
+
+class FakeEmbeddings:
+    """Embeds texts from their hash; fails once fail_after texts are embedded."""
+
+    def __init__(self):
+        self.texts = []
+        self.fail_after = None
+
+    def get_embeddings(self, texts):
+        if self.fail_after is not None and len(self.texts) >= self.fail_after:
+            raise RuntimeError("provider down")
+        self.texts.extend(texts)
+        return [list(hashlib.sha256(t.encode()).digest()[:8]) for t in texts]
+
+
+@pytest.fixture
+def km(tmp_path):
+    test_db = SqliteDatabase(":memory:")
+    with test_db.bind_ctx(MODELS):
+        test_db.create_tables(MODELS)
+        km = KnowledgeManager.__new__(KnowledgeManager)
+        km.embedding_manager = FakeEmbeddings()
+        km.vector_store = LocalVectorStore(str(tmp_path / "vectors"))
+        km.store = KnowledgeStore.create(
+            name="docs", chunking_option="Recursive", chunk_size=60, overlap=0
+        )
+        yield km
+
+
+def paragraphs(count, changed=None):
+    return [
+        f"Paragraph {i} {'was rewritten' if i == changed else 'about topic'} {i}."
+        for i in range(count)
+    ]
+
+
+def load(km, tmp_path, name, lines):
+    path = tmp_path / name
+    path.write_text("\n\n".join(lines) + "\n")
+    with DocumentFile(str(path)) as file:
+        return km.load_document(km.store, file)
+
+
+def manifest(km, name):
+    document = Document.get(Document.name == name)
+    return [
+        chunk.chunk_id
+        for chunk in DocumentChunk.select()
+        .where(DocumentChunk.document == document)
+        .order_by(DocumentChunk.position)
+    ]
+
+
+def stored_ids(km):
+    return set(km.vector_store.get_collection("docs").get(include=[])["ids"])
+
+
+def test_reload_embeds_only_changed_chunks(km, tmp_path):
+    assert load(km, tmp_path, "a.txt", paragraphs(200))
+    first = manifest(km, "a.txt")
+    assert stored_ids(km) == set(first)
+
+    km.embedding_manager.texts.clear()
+    assert load(km, tmp_path, "a.txt", paragraphs(200))
+    assert km.embedding_manager.texts == []  # unchanged, skipped
+
+    assert load(km, tmp_path, "a.txt", paragraphs(200, changed=150))
+    second = manifest(km, "a.txt")
+    changed = [id_hash(text) for text in km.embedding_manager.texts]
+    assert 0 < len(changed) <= 2
+    assert set(changed) == set(second) - set(first)
+    # the replaced chunks are gone from the store
+    assert stored_ids(km) == set(second)
+
+
+def test_interrupted_load_resumes_and_tracks_every_vector(km, tmp_path):
+    km.embedding_manager.fail_after = 64
+    with pytest.raises(RuntimeError):
+        load(km, tmp_path, "a.txt", paragraphs(200))
+    # vectors stored so far are all in the manifest
+    assert stored_ids(km) <= set(manifest(km, "a.txt"))
+    assert len(stored_ids(km)) == 64
+
+    km.embedding_manager.fail_after = None
+    km.embedding_manager.texts.clear()
+    assert load(km, tmp_path, "a.txt", paragraphs(200))
+
+    chunks = manifest(km, "a.txt")
+    assert len(km.embedding_manager.texts) == len(chunks) - 64
+    assert stored_ids(km) == set(chunks)
+    assert IngestionCheckpoint.get().completed
+
+
+def test_delete_document_removes_exactly_its_vectors(km, tmp_path):
+    shared = "A paragraph both documents contain."
+    load(km, tmp_path, "a.txt", ["Only in a, first.", shared, "Only in a, second."])
+    load(km, tmp_path, "b.txt", ["Only in b.", shared])
+    b_ids = set(manifest(km, "b.txt"))
+
+    assert km.delete_document(km.store, "a.txt") == 1
+    assert stored_ids(km) == b_ids
+    assert DocumentChunk.select().count() == len(b_ids)
+
+
+def test_delete_document_without_manifest_uses_metadata(km, tmp_path):
+    load(km, tmp_path, "a.txt", paragraphs(5))
+    load(km, tmp_path, "b.txt", ["Only in b."])
+    b_ids = set(manifest(km, "b.txt"))
+    document = Document.get(Document.name == "a.txt")
+    DocumentChunk.delete().where(DocumentChunk.document == document).execute()
+
+    km.delete_document(km.store, "a.txt")
+    assert stored_ids(km) == b_ids
+
+
+def test_failed_pdf_upload_leaves_no_temporary_file(km, tmp_path, monkeypatch):
+    from benchmarks.bench_pdf_extraction import write_sample_pdf
+    from nexus.nexus_base.document_extraction import DocumentExtractionPool
+
+    path = str(tmp_path / "sample.pdf")
+    # long enough that extraction is still going when the first batch fails
+    write_sample_pdf(path, 40)
+    upload = io.BytesIO(open(path, "rb").read())
+    upload.name, upload.type = "upload.pdf", "application/pdf"
+    temp_dir = tmp_path / "temp"
+    temp_dir.mkdir()
+    monkeypatch.setattr(tempfile, "tempdir", str(temp_dir))
+    km.embedding_manager.fail_after = 0
+    pool = DocumentExtractionPool(max_workers=1, pages_per_task=2)
+    # held here, the generator is not collected when the load fails
+    segments = pool.iter_segments(upload)
+    try:
+        with pytest.raises(RuntimeError):
+            km.load_document(km.store, upload, segments=segments)
+        assert list(temp_dir.iterdir()) == []
+    finally:
+        pool.shutdown()
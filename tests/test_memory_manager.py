@@ -0,0 +1,54 @@
+from nexus.nexus_base.context_assembler import ContextAssembler, ContextSection
+from nexus.nexus_base.memory_manager import MemoryManager
+from nexus.nexus_base.utils import reciprocal_rank_fusion
+from nexus.nexus_base.vector_store import LocalVectorStore
+
+
+def test_reciprocal_rank_fusion_orders_by_fused_score():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "c"], ["c"]], k=0)
+    # c: 1/3 + 1/2 + 1, b: 1/2 + 1, a: 1
+    assert [id for id, _ in fused] == ["c", "b", "a"]
+    assert fused[0][1] == 1 / 3 + 1 / 2 + 1
+
+
+def test_reciprocal_rank_fusion_breaks_ties_by_first_appearance():
+    fused = reciprocal_rank_fusion([["a", "b"], ["b", "a"], ["x"]])
+    assert [id for id, _ in fused] == ["a", "b", "x"]
+    assert fused[0][1] == fused[1][1]
+
+
+class WordCounter:
+    def count(self, text):
+        return len(text.split())
+
+
+class FakeEmbeddings:
+    vectors = {"north": [1.0, 0.0], "east": [0.0, 1.0]}
+
+    def get_embeddings(self, texts):
+        return [self.vectors[text] for text in texts]
+
+
+def test_fused_query_merges_and_deduplicates_variants(tmp_path):
+    manager = MemoryManager.__new__(MemoryManager)
+    manager.embedding_manager = FakeEmbeddings()
+    manager.vector_store = LocalVectorStore(str(tmp_path / "vectors"))
+    manager.vector_store.get_collection("memories").add(
+        ids=["n", "ne", "e", "s"],
+        embeddings=[[1.0, 0.0], [0.7, 0.7], [0.0, 1.0], [-1.0, 0.0]],
+        documents=["north", "north east", "east", "south"],
+    )
+
+    memories = manager.query_memories_fused(
+        "memories", ["north", "east"], n_results=2, with_scores=True
+    )
+
+    # north east is in both variants' results, and is only returned once
+    assert [memory for memory, _ in memories] == ["north east", "north", "east"]
+    scores = [score for _, score in memories]
+    assert 1 >= scores[0] > scores[1] == scores[2] > 0
+    # packing by score keeps the fused order
+    section = ContextSection("memory", "", memories, label="Memory", numbered=False)
+    text, _ = ContextAssembler(WordCounter()).pack([section], 100)
+    assert text == "Memory:\nnorth east\nMemory:\nnorth\nMemory:\neast\n"
+    assert manager.query_memories_fused("memories", []) == []
@@ -0,0 +1,146 @@
+import threading
+import time
+from datetime import timedelta
+
+import pytest
+
+from nexus.nexus_base.context_variables import tracking_id_context
+from nexus.nexus_base.database import create_database
+from nexus.nexus_base.memory_queue import MemoryIngestionQueue, _utcnow
+from nexus.nexus_base.nexus_models import MemoryIngestionJob
+
+
+class FakeAgent:
+    name = "FakeAgent"
+
+
+class FakeNexus:
+    """Records appends; each one waits for release and fails while failing is set."""
+
+    def __init__(self):
+        self.appends = []
+        self.inline = []
+        self.release = threading.Event()
+        self.release.set()
+        self.failing = False
+        self.agent_manager = self
+
+    def get_agent(self, name):
+        return FakeAgent()
+
+    def append_memory_sync(self, store, user_input, llm_response, agent):
+        if threading.current_thread().name != "nexus-memory-ingestion":
+            self.inline.append(user_input)
+            return True
+        self.release.wait(5)
+        self.appends.append((store, user_input, tracking_id_context.get(None)))
+        return not self.failing
+
+
+@pytest.fixture
+def make_queue(tmp_path):
+    # the database is shared between the test and the worker thread; a file
+    # one waits on locks, where a shared-cache in-memory one fails at once
+    test_db = create_database(f"sqlite:///{tmp_path / 'jobs.db'}")
+    queues = []
+
+    def make_queue(nexus, **kwargs):
+        queues.append(MemoryIngestionQueue(nexus, poll_interval=0.05, **kwargs))
+        return queues[-1]
+
+    with test_db.bind_ctx([MemoryIngestionJob]):
+        test_db.create_tables([MemoryIngestionJob])
+        yield make_queue
+        for queue in queues:
+            queue.stop()
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_jobs_are_batched_per_store_with_their_tracking_id(make_queue):
+    nexus = FakeNexus()
+    nexus.release.clear()
+    queue = make_queue(nexus, batch_size=2)
+
+    token = tracking_id_context.set("chat:1")
+    try:
+        # the first job is claimed alone while the worker is idle
+        queue.enqueue("notes", "first", None, FakeAgent())
+        assert wait_for(lambda: queue.get_status()["running"] == 1)
+        for text in ["second", "third", "fourth"]:
+            queue.enqueue("notes", text, "reply", FakeAgent())
+        queue.enqueue("other", "elsewhere", None, FakeAgent())
+    finally:
+        tracking_id_context.reset(token)
+    nexus.release.set()
+
+    assert wait_for(lambda: queue.get_status()["done"] == 5)
+    assert queue.get_status() == {"pending": 0, "running": 0, "done": 5, "failed": 0}
+    assert [(store, text.count("user:")) for store, text, _ in nexus.appends] == [
+        ("notes", 0),
+        ("notes", 2),
+        ("notes", 1),
+        ("other", 0),
+    ]
+    assert {tracking_id for _, _, tracking_id in nexus.appends} == {"chat:1"}
+
+
+def test_full_queue_appends_inline(make_queue):
+    nexus = FakeNexus()
+    nexus.release.clear()
+    queue = make_queue(nexus, max_pending=2, enqueue_timeout=0.1)
+
+    assert queue.enqueue("notes", "one", None, FakeAgent()) is not None
+    assert queue.enqueue("notes", "two", None, FakeAgent()) is not None
+    assert queue.enqueue("notes", "three", None, FakeAgent()) is None
+    assert nexus.inline == ["three"]
+
+    nexus.release.set()
+    assert wait_for(lambda: queue.get_status()["done"] == 2)
+
+
+def test_failed_jobs_are_retried_then_failed(make_queue):
+    nexus = FakeNexus()
+    nexus.failing = True
+    queue = make_queue(nexus, max_attempts=2, retry_delay=0.05)
+
+    job_id = queue.enqueue("notes", "turn", None, FakeAgent())
+
+    assert wait_for(lambda: queue.get_status(job_id)["status"] == "failed")
+    status = queue.get_status(job_id)
+    assert status["attempts"] == 2
+    assert status["error"] == "Memory extraction failed."
+    assert len(nexus.appends) == 2
+
+
+def test_only_expired_leases_are_taken_over(make_queue):
+    now = _utcnow()
+    live = MemoryIngestionJob.create(
+        store="notes",
+        agent="FakeAgent",
+        user_input="live",
+        status="running",
+        owner="other-process",
+        lease_expires=now + timedelta(minutes=5),
+        attempts=1,
+    )
+    stale = MemoryIngestionJob.create(
+        store="notes",
+        agent="FakeAgent",
+        user_input="stale",
+        status="running",
+        owner="crashed-process",
+        lease_expires=now - timedelta(seconds=1),
+        attempts=1,
+    )
+    nexus = FakeNexus()
+    queue = make_queue(nexus)
+
+    assert wait_for(lambda: queue.get_status(stale.id)["status"] == "done")
+    assert [text for _, text, _ in nexus.appends] == ["stale"]
+    assert queue.get_status(live.id)["status"] == "running"
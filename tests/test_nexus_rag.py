@@ -0,0 +1,91 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from nexus.nexus_base.context_assembler import ContextSection
+from nexus.nexus_base.nexus import RAG_STAGE_TIMEOUTS, Nexus
+
+
+class FakeKnowledgeManager:
+    def __init__(self):
+        self.embedded = []
+
+    def get_document_embedding(self, text):
+        self.embedded.append(text)
+        return [1.0, 0.0]
+
+
+class FakeAgent:
+    model = None
+    context_budget = 4000
+    knowledge_store = "docs"
+    memory_store = "notes"
+
+
+@pytest.fixture
+def nexus():
+    # only what build_augmented_context uses
+    nexus = Nexus.__new__(Nexus)
+    nexus.knowledge_manager = FakeKnowledgeManager()
+    nexus.rag_executor = ThreadPoolExecutor(max_workers=8)
+    nexus.rag_stage_slots = {
+        name: threading.BoundedSemaphore(2) for name in RAG_STAGE_TIMEOUTS
+    }
+    nexus.release = threading.Event()
+    nexus.embeddings = []
+    yield nexus
+    nexus.release.set()
+    nexus.rag_executor.shutdown(wait=True)
+
+
+def stage(nexus, name, text, delay=0.0, hang=False):
+    def get_section(store, user_input, *args, embedding=None):
+        nexus.embeddings.append(embedding)
+        if hang:
+            nexus.release.wait(5)
+        time.sleep(delay)
+        return ContextSection(name, f"{name}:\n", [(text, 1.0)])
+
+    return get_section
+
+
+def test_stages_run_concurrently_on_one_embedding(nexus):
+    nexus.get_knowledge_section = stage(nexus, "knowledge", "a fact", delay=0.3)
+    nexus.get_memory_section = stage(nexus, "memory", "a memory", delay=0.3)
+
+    start = time.monotonic()
+    context = nexus.build_augmented_context("question", FakeAgent())
+
+    assert time.monotonic() - start < 0.55
+    assert "a fact" in context and "a memory" in context
+    assert nexus.knowledge_manager.embedded == ["question"]
+    assert nexus.embeddings == [[1.0, 0.0], [1.0, 0.0]]
+
+
+def test_timed_out_stage_is_left_out(nexus, capsys):
+    nexus.get_knowledge_section = stage(nexus, "knowledge", "a fact")
+    nexus.get_memory_section = stage(nexus, "memory", "a memory", hang=True)
+    agent = FakeAgent()
+
+    context = nexus.build_augmented_context("question", agent, timeouts={"memory": 0.1})
+
+    assert "a fact" in context and "a memory" not in context
+    assert agent.context_usage["memory"] == 0
+    assert "memory augmentation timed out" in capsys.readouterr().out
+
+
+def test_hung_stage_is_skipped_instead_of_filling_the_pool(nexus, capsys):
+    nexus.get_knowledge_section = stage(nexus, "knowledge", "a fact")
+    nexus.get_memory_section = stage(nexus, "memory", "a memory", hang=True)
+
+    for _ in range(5):
+        context = nexus.build_augmented_context(
+            "question", FakeAgent(), timeouts={"memory": 0.05}
+        )
+        assert "a fact" in context
+
+    # two hung memory lookups hold their stage's slots, the rest were skipped
+    assert len(nexus.embeddings) == 5 + 2
+    assert capsys.readouterr().out.count("memory augmentation skipped") == 3
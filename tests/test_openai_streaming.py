@@ -0,0 +1,85 @@
+import json
+from types import SimpleNamespace
+
+from nexus.nexus_base.event_loop import iterate
+from nexus.nexus_base.openai_streaming import (
+    AsyncChatCompletionStream,
+    ChatCompletionStream,
+)
+
+
+def chunk(content=None, tool_calls=None):
+    delta = SimpleNamespace(content=content, tool_calls=tool_calls)
+    return SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+
+def fragment(index, id=None, name=None, arguments=None):
+    return SimpleNamespace(
+        index=index,
+        id=id,
+        function=SimpleNamespace(name=name, arguments=arguments),
+    )
+
+
+class Client:
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.kwargs = None
+        self.chat = SimpleNamespace(completions=self)
+
+    def create(self, **kwargs):
+        self.kwargs = kwargs
+        return iter(self.chunks)
+
+
+def test_stream_yields_content_as_it_arrives():
+    client = Client([chunk("Hel"), chunk("lo"), SimpleNamespace(choices=[])])
+    stream = ChatCompletionStream(client, model="model", messages=[])
+
+    assert list(stream) == ["Hel", "lo"]
+    assert client.kwargs["stream"] is True
+    assert stream.message == {"role": "assistant", "content": "Hello"}
+    assert stream.tool_calls == []
+
+
+def test_stream_assembles_tool_calls_from_fragments():
+    client = Client(
+        [
+            chunk(tool_calls=[fragment(0, id="call_a", name="weather", arguments="")]),
+            chunk(tool_calls=[fragment(0, arguments='{"city": ')]),
+            chunk(tool_calls=[fragment(1, id="call_b", name="time", arguments="{}")]),
+            chunk(tool_calls=[fragment(0, arguments='"Paris"}')]),
+        ]
+    )
+    stream = ChatCompletionStream(client, model="model", messages=[])
+
+    assert list(stream) == []
+    assert [call["id"] for call in stream.tool_calls] == ["call_a", "call_b"]
+    assert json.loads(stream.tool_calls[0]["function"]["arguments"]) == {
+        "city": "Paris"
+    }
+    assert stream.message["content"] is None
+    assert stream.message["tool_calls"][1]["function"]["name"] == "time"
+
+
+class AsyncClient(Client):
+    async def create(self, **kwargs):
+        self.kwargs = kwargs
+
+        async def stream():
+            for chunk in self.chunks:
+                yield chunk
+
+        return stream()
+
+
+def test_async_stream_sends_the_request_when_iterated():
+    client = AsyncClient(
+        [chunk("Hi"), chunk(tool_calls=[fragment(0, id="a", name="f", arguments="{}")])]
+    )
+    stream = AsyncChatCompletionStream(client, model="model", messages=[])
+    assert client.kwargs is None
+
+    assert list(iterate(stream)) == ["Hi"]
+    assert stream.message["content"] == "Hi"
+    assert stream.tool_calls[0]["function"]["name"] == "f"
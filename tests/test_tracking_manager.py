@@ -1,7 +1,13 @@
+import time
+from types import SimpleNamespace
+
 import pandas as pd
 import pytest
 
-from nexus.nexus_base.tracking_manager import TrackingManager
+from nexus.nexus_base import tracking_manager
+from nexus.nexus_base.database import create_database
+from nexus.nexus_base.nexus_models import AgentEngineUsage
+from nexus.nexus_base.tracking_manager import TrackingManager, UsageWriter
 
 
 @pytest.fixture
@@ -23,3 +29,109 @@ def test_get_tracking_usage(tm):
     df.to_csv("data.csv")
 
     assert df is not None
+
+
+def usage(id):
+    return dict(
+        id=id,
+        tracking_id="test",
+        function="chat",
+        name="Agent",
+        model="model",
+        in_tokens=1,
+        out_tokens=2,
+        elapsed_time=0,
+    )
+
+
+def test_usage_writer_batches_and_ignores_duplicates():
+    # shared between the test and the writer thread
+    test_db = create_database("sqlite:///:memory:")
+    with test_db.bind_ctx([AgentEngineUsage]):
+        test_db.create_tables([AgentEngineUsage])
+        writer = UsageWriter(batch_size=10, flush_ms=60000)
+
+        for i in range(9):
+            writer.record(**usage(f"r{i}"))
+        time.sleep(0.2)
+        assert AgentEngineUsage.select().count() == 0
+
+        # the tenth row fills a batch and wakes the writer
+        writer.record(**usage("r0"))
+        deadline = time.monotonic() + 5
+        while AgentEngineUsage.select().count() == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert AgentEngineUsage.select().count() == 9
+
+        # anything still buffered is written on close
+        writer.record(**usage("last"))
+        writer.close()
+        assert AgentEngineUsage.select().count() == 10
+
+
+def test_usage_writer_keeps_rows_a_flush_failed_to_write():
+    test_db = create_database("sqlite:///:memory:")
+    with test_db.bind_ctx([AgentEngineUsage]):
+        writer = UsageWriter(batch_size=100, flush_ms=60000, capacity=3)
+        for i in range(2):
+            writer.record(**usage(f"r{i}"))
+
+        # the table is missing, so the insert fails
+        assert writer.flush() == 0
+        writer.record(**usage("r2"))
+        writer.record(**usage("r3"))
+        assert [row["id"] for row in writer.buffer] == ["r1", "r2", "r3"]
+
+        test_db.create_tables([AgentEngineUsage])
+        assert writer.flush() == 3
+        assert writer.failures == 0
+        assert sorted(row.id for row in AgentEngineUsage.select()) == [
+            "r1",
+            "r2",
+            "r3",
+        ]
+        writer.close()
+
+
+class Stream:
+    """Stands in for an OpenAI stream, which the tracker recognises by name."""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    def __iter__(self):
+        for chunk in self.chunks:
+            time.sleep(0.01)
+            yield chunk
+
+
+def chunk(content=None, usage=None):
+    delta = SimpleNamespace(content=content, tool_calls=None)
+    return SimpleNamespace(
+        id="c1",
+        model="model",
+        choices=[SimpleNamespace(delta=delta)] if content is not None else [],
+        usage=usage,
+    )
+
+
+def test_stream_records_ttft_and_rate(tm, monkeypatch):
+    rows = []
+    monkeypatch.setattr(
+        tracking_manager.usage_writer, "record", lambda **row: rows.append(row)
+    )
+    usage = SimpleNamespace(prompt_tokens=7, completion_tokens=2)
+    stream = Stream([chunk(""), chunk("Hel"), chunk("lo"), chunk(usage=usage)])
+    create = tm.track_chat_create(lambda *args, **kwargs: stream, "Agent")
+
+    text = "".join(c.choices[0].delta.content for c in create(None) if c.choices)
+    assert text == "Hello"
+
+    row = rows[0]
+    assert row["chunks"] == 4
+    assert (row["in_tokens"], row["out_tokens"]) == (7, 2)
+    # the first chunk has no token, so the first token arrives with the second
+    assert 15_000_000 < row["ttft_ns"] < row["elapsed_ns"]
+    assert row["tokens_per_second"] == pytest.approx(
+        2e9 / (row["elapsed_ns"] - row["ttft_ns"])
+    )
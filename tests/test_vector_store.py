@@ -0,0 +1,243 @@
+import time
+
+import numpy as np
+import pytest
+
+from nexus.nexus_base.vector_store import LocalVectorStore, working_collection_name
+
+
+@pytest.fixture
+def store(tmp_path):
+    return LocalVectorStore(str(tmp_path / "vectors"), ivf_threshold=1000, nprobe=8)
+
+
+def test_add_get_query_delete(store):
+    collection = store.get_collection("docs")
+    collection.add(
+        ids=["a", "b", "c"],
+        embeddings=[[1.0, 0.0], [0.0, 1.0], [1.0, 1.0]],
+        documents=["alpha", "beta", "gamma"],
+    )
+    # adding an existing id leaves it unchanged
+    collection.add(ids=["a"], embeddings=[[5.0, 5.0]], documents=["changed"])
+
+    results = collection.query(query_embeddings=[[0.9, 0.1]], n_results=2)
+    assert results["ids"] == [["a", "c"]]
+    assert results["documents"] == [["alpha", "gamma"]]
+
+    collection.upsert(ids=["b"], embeddings=[[0.9, 0.1]], documents=["beta 2"])
+    assert collection.query(query_embeddings=[[0.9, 0.1]], n_results=1)[
+        "documents"
+    ] == [["beta 2"]]
+
+    collection.delete(ids=["b", "missing"])
+    assert collection.count() == 2
+    assert collection.get(ids=["a", "b"], include=[])["ids"] == ["a"]
+    assert store.list_collections() == ["docs"]
+
+
+def test_persists_across_instances(store):
+    collection = store.get_collection("docs")
+    collection.add(ids=["a", "b"], embeddings=[[1.0, 0.0], [0.0, 1.0]])
+    collection.delete(ids=["a"])
+    store.invalidate()
+
+    reopened = LocalVectorStore(store.path).get_collection("docs")
+    assert reopened.count() == 1
+    assert reopened.get(include=["embeddings"])["embeddings"] == [[0.0, 1.0]]
+
+    store.delete_collection("docs")
+    assert store.list_collections() == []
+
+
+def test_ivf_index_recall(store):
+    rng = np.random.default_rng(1)
+    centers = rng.normal(size=(20, 16))
+    vectors = centers[rng.integers(0, 20, 5000)] + rng.normal(
+        scale=0.1, size=(5000, 16)
+    )
+    collection = store.get_collection("docs")
+    collection.add(ids=[str(i) for i in range(5000)], embeddings=vectors)
+
+    queries = vectors[:50] + rng.normal(scale=0.01, size=(50, 16))
+    results = collection.query(query_embeddings=queries, n_results=10)
+    assert collection.index is not None
+
+    hits = 0
+    for query, ids in zip(queries, results["ids"]):
+        exact = np.argsort(((vectors - query) ** 2).sum(axis=1))[:10]
+        hits += len({str(i) for i in exact} & set(ids))
+    assert hits / 500 >= 0.9
+
+
+def test_upsert_moves_vector_to_its_nearest_list(store):
+    rng = np.random.default_rng(2)
+    vectors = np.concatenate(
+        [rng.normal(loc=-10, size=(1000, 8)), rng.normal(loc=10, size=(1000, 8))]
+    )
+    collection = store.get_collection("docs")
+    collection.add(ids=[str(i) for i in range(2000)], embeddings=vectors)
+    collection.query(query_embeddings=[vectors[0]], n_results=1)
+    assert collection.index is not None
+
+    # move an item from one side of the space to the other
+    moved = np.full(8, 10.0)
+    collection.upsert(ids=["0"], embeddings=[moved])
+
+    assert collection.query(query_embeddings=[moved], n_results=1)["ids"] == [["0"]]
+    lists = collection.index["lists"]
+    row = collection.rows["0"]
+    assert sum(row in rows for rows in lists) == 1
+
+
+@pytest.mark.parametrize("backend", ["local", "chroma"])
+def test_where_filters_get_query_and_delete(tmp_path, backend):
+    if backend == "local":
+        store = LocalVectorStore(str(tmp_path / "vectors"))
+    else:
+        from nexus.nexus_base.chroma_pool import ChromaPool
+
+        store = ChromaPool(str(tmp_path / "chroma"))
+    collection = store.get_collection("docs")
+    collection.add(
+        ids=["a", "b", "c"],
+        embeddings=[[1.0, 0.0], [0.9, 0.1], [0.0, 1.0]],
+        documents=["alpha", "beta", "gamma"],
+        metadatas=[{"document": "x"}, {"document": "y"}, {"document": "x"}],
+    )
+
+    results = collection.query(
+        query_embeddings=[[1.0, 0.0]], n_results=2, where={"document": "y"}
+    )
+    assert results["ids"] == [["b"]]
+    assert sorted(
+        collection.get(where={"document": {"$in": ["x"]}}, include=[])["ids"]
+    ) == ["a", "c"]
+
+    collection.delete(where={"document": "x"})
+    assert collection.get(include=["metadatas"])["metadatas"] == [{"document": "y"}]
+
+
+def test_unsupported_where_operator_raises(store):
+    collection = store.get_collection("docs")
+    collection.add(ids=["a"], embeddings=[[1.0]], metadatas=[{"n": 1}])
+    with pytest.raises(NotImplementedError):
+        collection.query(query_embeddings=[[1.0]], where={"n": {"$gt": 0}})
+
+
+@pytest.mark.parametrize("backend", ["local", "chroma"])
+def test_swap_collection(tmp_path, backend):
+    if backend == "local":
+        store = LocalVectorStore(str(tmp_path / "vectors"))
+    else:
+        from nexus.nexus_base.chroma_pool import ChromaPool
+
+        store = ChromaPool(str(tmp_path / "chroma"))
+    store.get_collection("docs").add(ids=["old"], embeddings=[[1.0, 0.0]])
+    shadow = working_collection_name("docs")
+    store.get_collection(shadow).add(
+        ids=["new1", "new2"], embeddings=[[0.0, 1.0], [1.0, 1.0]]
+    )
+    assert store.list_collections() == ["docs"]
+
+    store.swap_collection("docs", shadow)
+
+    assert sorted(store.get_collection("docs").get(include=[])["ids"]) == [
+        "new1",
+        "new2",
+    ]
+    # chroma keeps the retired collection for a grace period
+    assert store.list_collections() == ["docs"]
+
+
+@pytest.mark.parametrize("backend", ["local", "chroma"])
+def test_handle_from_before_swap_keeps_reading(tmp_path, backend):
+    if backend == "local":
+        store = LocalVectorStore(str(tmp_path / "vectors"))
+    else:
+        from nexus.nexus_base.chroma_pool import ChromaPool
+
+        store = ChromaPool(str(tmp_path / "chroma"), retire_grace=0.2)
+    held = store.get_collection("docs")
+    held.add(ids=["old"], embeddings=[[1.0, 0.0]], documents=["old"])
+    shadow = working_collection_name("docs")
+    store.get_collection(shadow).add(
+        ids=["new"], embeddings=[[0.0, 1.0]], documents=["new"]
+    )
+
+    store.swap_collection("docs", shadow)
+
+    results = held.query(query_embeddings=[[1.0, 0.0]], n_results=1)
+    assert results["ids"] in ([["old"]], [["new"]])
+    assert held.count() == 1
+    if backend == "chroma":
+        time.sleep(0.5)
+        assert store.list_all_collections() == ["docs"]
+
+
+def test_handle_of_deleted_collection_raises(store):
+    held = store.get_collection("docs")
+    held.add(ids=["a"], embeddings=[[1.0]])
+    store.delete_collection("docs")
+    with pytest.raises(ValueError):
+        held.count()
+    assert store.list_all_collections() == []
+
+
+@pytest.mark.parametrize("backend", ["local", "chroma"])
+def test_working_collections_of_other_stores_are_kept(tmp_path, backend):
+    if backend == "local":
+        store = LocalVectorStore(str(tmp_path / "vectors"))
+    else:
+        from nexus.nexus_base.chroma_pool import ChromaPool
+
+        store = ChromaPool(str(tmp_path / "chroma"))
+    notes_shadow = working_collection_name("notes")
+    notes_retired = working_collection_name("notes", "retired")
+    archive_shadow = working_collection_name("notes-archive")
+    for name in ["notes", "notes-archive", notes_shadow, notes_retired, archive_shadow]:
+        store.get_collection(name).add(ids=["a"], embeddings=[[1.0]])
+
+    store.delete_working_collections("notes")
+
+    assert sorted(store.list_all_collections()) == sorted(
+        ["notes", "notes-archive", notes_retired, archive_shadow]
+    )
+
+
+def test_chroma_handles_are_cached_and_dropped_on_delete(tmp_path):
+    from nexus.nexus_base.chroma_pool import ChromaPool
+
+    store = ChromaPool(str(tmp_path / "chroma"))
+    collection = store.get_collection("docs")
+    assert store.get_collection("docs") is collection
+    collection.add(ids=["a"], embeddings=[[1.0]])
+
+    store.delete_collection("docs")
+
+    assert store.get_collection("docs") is not collection
+    assert store.get_collection("docs").count() == 0
+
+
+def test_chroma_handles_recover_from_another_process(tmp_path):
+    from nexus.nexus_base.chroma_pool import ChromaPool
+
+    # two pools on one path stand in for the API and Streamlit processes
+    api = ChromaPool(str(tmp_path / "chroma"), retire_grace=0)
+    ui = ChromaPool(str(tmp_path / "chroma"), retire_grace=0)
+    held = api.get_collection("docs")
+    held.add(ids=["old"], embeddings=[[1.0]])
+
+    ui.delete_collection("docs")
+    assert held.count() == 0
+    held.add(ids=["again"], embeddings=[[1.0]])
+
+    shadow = working_collection_name("docs")
+    ui.get_collection(shadow).add(ids=["new"], embeddings=[[0.5]])
+    ui.swap_collection("docs", shadow)
+    time.sleep(0.2)  # the retired collection is dropped
+
+    assert held.get(include=[])["ids"] == ["new"]
+    assert api.get_collection("docs").query(query_embeddings=[[1.0]], n_results=1)[
+        "ids"
+    ] == [["new"]]